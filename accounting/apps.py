@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class AccountingConfig(AppConfig):
     name = 'accounting'
+
+    def ready(self):
+        # Register the cache-invalidation receivers
+        import accounting.signals
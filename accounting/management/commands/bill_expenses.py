@@ -0,0 +1,40 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from core.models import User
+from accounting.services import ExpenseBilling
+
+class Command(BaseCommand):
+    help = 'Rebills unbilled billable expense claims as draft invoices, one per client and engagement'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help='Bill claims dated up to this day (YYYY-MM-DD, default today)')
+        parser.add_argument('--issue-date', help='Invoice date (YYYY-MM-DD, default as-of)')
+        parser.add_argument('--user', required=True, help='Email of the user recorded as creator')
+
+    def handle(self, *args, **options):
+        dates = {}
+        for key in ('as_of', 'issue_date'):
+            if options[key]:
+                try:
+                    dates[key] = parse_date(options[key])
+                except ValueError:
+                    dates[key] = None
+                if dates[key] is None:
+                    raise CommandError(f"--{key.replace('_', '-')} must be a date (YYYY-MM-DD)")
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        try:
+            invoices = ExpenseBilling.run(user, **dates)
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+
+        if not invoices:
+            self.stdout.write("No unbilled billable expenses.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(invoices)} draft invoices ({invoices[0].invoices_number} .. {invoices[-1].invoices_number})."
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from accounting.services import import_fx_rates
+
+class Command(BaseCommand):
+    help = 'Loads daily exchange rates from a CSV file (columns: date, currency, rate)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with open(options['path'], newline='', encoding='utf-8-sig') as handle:
+            imported, errors = import_fx_rates(handle, batch_size=options['batch_size'])
+
+        for error in errors:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} rates ({len(errors)} rejected)."))
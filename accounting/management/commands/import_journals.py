@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import User
+from accounting.services import JournalImporter
+
+class Command(BaseCommand):
+    help = 'Streams a CSV / NDJSON file of journal entries into the ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Email of the user recorded as creator')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension')
+        parser.add_argument('--post', action='store_true', help='Post entries instead of importing drafts')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+            fmt = JournalImporter.detect_format(options['path'], options['format'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        importer = JournalImporter(user, post=options['post'], chunk_size=options['chunk_size'])
+        with open(options['path'], newline='', encoding='utf-8-sig') as handle:
+            summary = importer.run(handle, fmt)
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} entries ({summary['failed']} rejected) "
+            f"in {summary['elapsed_seconds']}s - {summary['entries_per_second']} entries/s."
+        ))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from accounting.models import AccountPeriodBalance, JournalsItem
+
+class Command(BaseCommand):
+    help = 'Rebuilds AccountPeriodBalance from posted journal items (backfill / drift repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drifted rows, do not write')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # One grouped pass over the ledger: (account, month) -> totals
+        expected = {
+            (row['accounts'], row['period']): (row['debit_sum'], row['credit_sum'])
+            for row in JournalsItem.objects.filter(entry__status='POSTED')
+            .annotate(period=TruncMonth('entry__date'))
+            .values('accounts', 'period')
+            .annotate(debit_sum=Sum('debit'), credit_sum=Sum('credit'))
+            .order_by()
+            .iterator()
+        }
+        current = {
+            (row.accounts_id, row.period): (row.debit, row.credit)
+            for row in AccountPeriodBalance.objects.iterator()
+        }
+
+        drifted = [key for key in expected.keys() | current.keys() if expected.get(key) != current.get(key)]
+        # Zeroed rows (fully voided months) are not drift
+        drifted = [key for key in drifted if any(expected.get(key, (0, 0))) or any(current.get(key, (0, 0)))]
+        self.stdout.write(f"{len(expected)} period rows expected, {len(drifted)} drifted.")
+
+        if options['check']:
+            return
+
+        with transaction.atomic():
+            AccountPeriodBalance.objects.all().delete()
+            AccountPeriodBalance.objects.bulk_create(
+                (
+                    AccountPeriodBalance(accounts_id=account_id, period=period, debit=debit, credit=credit)
+                    for (account_id, period), (debit, credit) in expected.items()
+                ),
+                batch_size=options['batch_size'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(expected)} period balances.'))
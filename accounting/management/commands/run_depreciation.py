@@ -0,0 +1,38 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from core.models import User
+from accounting.services import DepreciationEngine
+
+class Command(BaseCommand):
+    help = 'Posts month-end depreciation for every fixed asset in one journal entry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('period_end', help='Month end to depreciate through (YYYY-MM-DD)')
+        parser.add_argument('--user', required=True, help='Email of the user recorded as creator')
+
+    def handle(self, *args, **options):
+        try:
+            period_end = parse_date(options['period_end'])
+        except ValueError:
+            period_end = None
+        if period_end is None:
+            raise CommandError('period_end must be a date (YYYY-MM-DD)')
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+
+        try:
+            entry, depreciated, rejected = DepreciationEngine.run(period_end, user)
+        except ValidationError as exc:
+            raise CommandError(exc.messages[0])
+
+        for error in rejected:
+            self.stderr.write(f"Asset {error['id']}: {error['error']}")
+        if entry is None:
+            self.stdout.write(f"Nothing to depreciate through {period_end}.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Depreciated {depreciated} assets through {period_end} (journal entry {entry.pk})."
+        ))
@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from accounting.models import Account
+from accounting.models import Accounts
 
 class Command(BaseCommand):
     help = 'Populates the initial Chart of Accounts'
@@ -9,6 +9,7 @@ class Command(BaseCommand):
             # ASSETS
             ('1000', 'Cash & Bank', 'ASSET', 'Primary operating bank accounts'),
             ('1200', 'Accounts Receivable', 'ASSET', 'Unpaid client invoices'),
+            ('1510', 'Accumulated Depreciation', 'ASSET', 'Contra account for fixed assets'),
             # LIABILITIES
             ('2000', 'Accounts Payable', 'LIABILITY', 'Money owed to vendors'),
             ('2100', 'Sales Tax Payable', 'LIABILITY', 'VAT/GST collected'),
@@ -18,17 +19,21 @@ class Command(BaseCommand):
             # INCOME
             ('4000', 'Audit Fees', 'INCOME', 'Revenue from audits'),
             ('4100', 'Tax Advisory', 'INCOME', 'Revenue from tax services'),
+            ('4900', 'Foreign Exchange Gain/Loss', 'INCOME', 'Realised and unrealised FX differences'),
             # EXPENSES
             ('5000', 'Salaries & Wages', 'EXPENSE', 'Staff payroll'),
             ('5100', 'Office Rent', 'EXPENSE', 'Office lease payments'),
             ('5200', 'Software Costs', 'EXPENSE', 'Tech stack and licenses'),
+            ('5300', 'Depreciation Expense', 'EXPENSE', 'Monthly fixed asset depreciation'),
+            ('5400', 'Staff Expenses', 'EXPENSE', 'Reimbursed employee expense claims'),
+            ('5900', 'General & Administrative', 'EXPENSE', 'Vendor bills without a specific expense account'),
         ]
 
         self.stdout.write("Seeding Chart of Accounts...")
         
         count = 0
         for code, name, acc_type, desc in ACCOUNTS:
-            obj, created = Account.objects.get_or_create(
+            obj, created = Accounts.objects.get_or_create(
                 code=code,
                 defaults={
                     'name': name,
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_period_balances(apps, schema_editor):
+    JournalsItem = apps.get_model('accounting', 'JournalsItem')
+    AccountPeriodBalance = apps.get_model('accounting', 'AccountPeriodBalance')
+    totals = (
+        JournalsItem.objects.filter(entry__status='POSTED')
+        .annotate(period=TruncMonth('entry__date'))
+        .values('accounts', 'period')
+        .annotate(debit_sum=Sum('debit'), credit_sum=Sum('credit'))
+        .order_by()
+    )
+    AccountPeriodBalance.objects.bulk_create(
+        [
+            AccountPeriodBalance(accounts_id=row['accounts'], period=row['period'],
+                                 debit=row['debit_sum'], credit=row['credit_sum'])
+            for row in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0003_alter_bill_issue_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountPeriodBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(help_text='First day of the fiscal month')),
+                ('debit', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('credit', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('accounts', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='accounting.accounts')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period'], name='accounting__period_8b2beb_idx')],
+                'constraints': [models.UniqueConstraint(fields=('accounts', 'period'), name='unique_account_period_balance')],
+            },
+        ),
+        migrations.RunPython(backfill_period_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0004_account_period_balance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField(help_text='Last day of the closed fiscal period', unique=True)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_by', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL)),
+                ('closing_entry', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='period_close', to='accounting.journalsentry')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AccountBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('debit', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('credit', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('accounts', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='accounting.accounts')),
+                ('close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='accounting.periodclose')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('close', 'accounts'), name='unique_close_account_snapshot')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    Accounts = apps.get_model('accounting', 'Accounts')
+    AccountClosure = apps.get_model('accounting', 'AccountClosure')
+    parents = dict(Accounts.objects.values_list('id', 'parent_id'))
+    rows = []
+    for account_id in parents:
+        # Walk up to the root; `seen` guards against pre-existing cycles
+        node, depth, seen = account_id, 0, set()
+        while node is not None and node not in seen:
+            seen.add(node)
+            rows.append(AccountClosure(ancestor_id=node, descendant_id=account_id, depth=depth))
+            node, depth = parents.get(node), depth + 1
+    AccountClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0005_period_close'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='accounting.accounts')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='accounting.accounts')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_account_closure')],
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
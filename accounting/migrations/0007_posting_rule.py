@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0006_account_closure'),
+        ('crm', '0011_clientdocument_category_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('engagement_type', models.CharField(blank=True, help_text='AUDIT, TAX or ADVISORY; blank matches any', max_length=20)),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='posting_rules', to='crm.client')),
+                ('receivable_account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounting.accounts')),
+                ('revenue_account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounting.accounts')),
+                ('tax_account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounting.accounts')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('client', 'engagement_type'), name='unique_posting_rule')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0007_posting_rule'),
+        ('crm', '0011_clientdocument_category_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['status', 'due_date'], name='accounting__status_e3eec5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoices',
+            index=models.Index(fields=['status', 'due_date'], name='accounting__status_9f82a4_idx'),
+        ),
+    ]
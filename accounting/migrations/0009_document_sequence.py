@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:22
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    # Start each counter after the highest number already issued in that format
+    sources = (
+        ('INVOICE', 'Invoices', 'invoices_number', 'INV'),
+        ('BILL', 'Bill', 'bill_number', 'BILL'),
+        ('JOURNAL', 'JournalsEntry', 'reference', 'JE'),
+    )
+    DocumentSequence = apps.get_model('accounting', 'DocumentSequence')
+    highest = {}
+    for doc_type, model_name, field, prefix in sources:
+        pattern = re.compile(rf'^{prefix}-(\d{{4}})-(\d+)$')
+        model = apps.get_model('accounting', model_name)
+        numbers = model.objects.filter(**{f'{field}__startswith': f'{prefix}-'}).values_list(field, flat=True)
+        for number in numbers.iterator():
+            match = pattern.match(number)
+            if match:
+                key = (doc_type, int(match.group(1)))
+                highest[key] = max(highest.get(key, 0), int(match.group(2)))
+    DocumentSequence.objects.bulk_create([
+        DocumentSequence(doc_type=doc_type, fiscal_year=year, next_value=value + 1)
+        for (doc_type, year), value in highest.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0008_aging_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(choices=[('INVOICE', 'Invoice'), ('BILL', 'Bill'), ('JOURNAL', 'Journal entry')], max_length=10)),
+                ('fiscal_year', models.PositiveIntegerField()),
+                ('next_value', models.PositiveBigIntegerField(default=1)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('doc_type', 'fiscal_year'), name='unique_document_sequence')],
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0009_document_sequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='journalsentry',
+            index=models.Index(fields=['-date', 'id'], name='journal_date_id_idx'),
+        ),
+    ]
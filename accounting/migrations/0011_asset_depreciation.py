@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0010_journal_date_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='accumulated_account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounting.accounts'),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='depreciated_through',
+            field=models.DateField(blank=True, help_text='Month end of the last depreciation run', null=True),
+        ),
+        migrations.AddField(
+            model_name='asset',
+            name='expense_account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounting.accounts'),
+        ),
+        migrations.AlterField(
+            model_name='asset',
+            name='depreciation_method',
+            field=models.CharField(choices=[('STRAIGHT_LINE', 'Straight line'), ('DECLINING_BALANCE', 'Declining balance')], default='STRAIGHT_LINE', max_length=50),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0011_asset_depreciation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FxRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('currency', 'date'), name='unique_fx_rate')],
+            },
+        ),
+        migrations.AddField(
+            model_name='journalsitem',
+            name='currency',
+            field=models.CharField(blank=True, help_text='Transaction currency; blank = functional', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='journalsitem',
+            name='amount_currency',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Signed (Dr +, Cr -) amount in `currency`', max_digits=20),
+        ),
+        migrations.AddField(
+            model_name='invoices',
+            name='currency',
+            field=models.CharField(blank=True, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='invoices',
+            name='carrying_rate',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=18, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalinvoices',
+            name='currency',
+            field=models.CharField(blank=True, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='historicalinvoices',
+            name='carrying_rate',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=18, null=True),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='currency',
+            field=models.CharField(blank=True, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='carrying_rate',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=18, null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0012_multi_currency'),
+        ('crm', '0012_clientdocument_recent_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankStatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Signed: deposits +, withdrawals -', max_digits=20)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('imported_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='bank_lines', to='accounting.accounts')),
+                ('document', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_lines', to='crm.clientdocument')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account', 'date'], name='accounting__account_66e552_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_auto', models.BooleanField(default=False)),
+                ('matched_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bank_match', to='accounting.journalsitem')),
+                ('line', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='match', to='accounting.bankstatementline')),
+                ('matched_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
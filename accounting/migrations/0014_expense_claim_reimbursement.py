@@ -0,0 +1,45 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0013_bank_statement_line'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expenseclaim',
+            name='expense_account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounting.accounts'),
+        ),
+        migrations.AddField(
+            model_name='expenseclaim',
+            name='receipt_content_type',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='expenseclaim',
+            name='receipt_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='expenseclaim',
+            name='reimbursement_entry',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='expense_claims', to='accounting.journalsentry'),
+        ),
+        migrations.AddField(
+            model_name='expenseclaim',
+            name='reviewed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='expenseclaim',
+            index=models.Index(fields=['status', 'date'], name='accounting__status_abc924_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0014_expense_claim_reimbursement'),
+        ('crm', '0012_clientdocument_recent_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expenseclaim',
+            name='engagement',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='expense_claims', to='crm.engagement'),
+        ),
+        migrations.AddField(
+            model_name='expenseclaim',
+            name='invoice',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='billed_expenses', to='accounting.invoices'),
+        ),
+        migrations.AddIndex(
+            model_name='expenseclaim',
+            index=models.Index(condition=models.Q(('invoice__isnull', True), ('is_billable', True)), fields=['client', 'engagement'], name='expense_unbilled_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0015_expense_claim_billing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='expense_account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounting.accounts'),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='paid_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='payment_entry',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='paid_bills', to='accounting.journalsentry'),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='expense_account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='accounting.accounts'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:24
+
+from django.db import migrations, models
+
+
+def drop_duplicate_defaults(apps, schema_editor):
+    # Keep the newest rule per engagement type, the one the posting cache ended up using
+    PostingRule = apps.get_model('accounting', 'PostingRule')
+    keep = {}
+    for pk, engagement_type in PostingRule.objects.filter(client__isnull=True).order_by('id').values_list('id', 'engagement_type'):
+        keep[engagement_type] = pk
+    PostingRule.objects.filter(client__isnull=True).exclude(pk__in=keep.values()).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0016_bill_payables'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_defaults, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='postingrule',
+            constraint=models.UniqueConstraint(condition=models.Q(('client__isnull', True)), fields=('engagement_type',), name='unique_default_posting_rule'),
+        ),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+import threading
+from django.db import models, transaction, connection, connections, DEFAULT_DB_ALIAS
+from django.db.models import Sum, F
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
 from django.conf import settings
 from django.utils import timezone
 from simple_history.models import HistoricalRecords
@@ -32,6 +36,62 @@ class Accounts(models.Model):
     def __str__(self):
         return f"{self.code} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        # Keep the closure index in step with inserts and moves
+        is_new = self.pk is None
+        old_parent_id = None
+        if not is_new:
+            old_parent_id = Accounts.objects.filter(pk=self.pk).values_list('parent_id', flat=True).first()
+            if self.parent_id and AccountClosure.objects.filter(ancestor_id=self.pk, descendant_id=self.parent_id).exists():
+                raise ValidationError("An account cannot be moved under itself or one of its sub-accounts.")
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                AccountClosure.objects.create(ancestor=self, descendant=self, depth=0)
+                AccountClosure.attach(self)
+            elif old_parent_id != self.parent_id:
+                AccountClosure.attach(self)
+
+class AccountClosure(models.Model):
+    """
+    Closure index of the chart of accounts: one row per (ancestor, descendant)
+    pair including each account with itself at depth 0, so a whole subtree or
+    rollup is a single join instead of walking `children`.
+    """
+    ancestor = models.ForeignKey(Accounts, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Accounts, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='unique_account_closure'),
+        ]
+
+    @classmethod
+    def attach(cls, node):
+        """(Re)links node's whole subtree under node.parent."""
+        subtree = list(cls.objects.filter(ancestor=node).values_list('descendant_id', 'depth'))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        # Drop links to the old ancestors, keep links inside the subtree
+        cls.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        if node.parent_id:
+            ancestors = cls.objects.filter(descendant_id=node.parent_id).values_list('ancestor_id', 'depth')
+            cls.objects.bulk_create([
+                cls(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+                for ancestor_id, up in ancestors
+                for descendant_id, down in subtree
+            ])
+
+@receiver(pre_delete, sender=Accounts)
+def detach_account_subtree(sender, instance, **kwargs):
+    # Children are re-rooted by SET_NULL, so cut their links to the deleted account's ancestors
+    below = list(
+        AccountClosure.objects.filter(ancestor=instance).exclude(descendant=instance).values_list('descendant_id', flat=True)
+    )
+    if below:
+        AccountClosure.objects.filter(descendant_id__in=below).exclude(ancestor_id__in=below).delete()
+
 class JournalsEntry(models.Model):
     """
     A packet of debits and credits.
@@ -57,30 +117,292 @@ class JournalsEntry(models.Model):
     
     history = HistoricalRecords()
 
+    class Meta:
+        # Keyset pagination of journalss/ walks (-date, id)
+        indexes = [models.Index(fields=['-date', 'id'], name='journal_date_id_idx')]
+
     def validate_balanced(self):
-        debits = sum(item.debit for item in self.items.all())
-        credits = sum(item.credit for item in self.items.all())
+        totals = self.items.aggregate(debits=Sum('debit'), credits=Sum('credit'))
+        debits = totals['debits'] or 0
+        credits = totals['credits'] or 0
         if debits != credits:
             raise ValidationError(f"Entry not balanced. Debits: {debits}, Credits: {credits}")
 
     def post(self):
         self.validate_balanced()
-        self.status = 'POSTED'
-        self.posted_at = timezone.now()
-        self.save()
+        with transaction.atomic():
+            # Lock the row so two concurrent posts can't both hit the period balances
+            current = JournalsEntry.objects.select_for_update().get(pk=self.pk)
+            if current.status != 'DRAFT':
+                raise ValidationError(f"Only draft entries can be posted (status: {current.status}).")
+            self.status = 'POSTED'
+            self.posted_at = timezone.now()
+            self.save()
+            AccountPeriodBalance.apply_entry(self)
+
+    def void(self):
+        """Cancels the entry, backing it out of the period balances if it was posted."""
+        with transaction.atomic():
+            current = JournalsEntry.objects.select_for_update().get(pk=self.pk)
+            if current.status == 'CANCELED':
+                return
+            if current.status == 'POSTED':
+                AccountPeriodBalance.apply_entry(self, sign=-1)
+            self.status = 'CANCELED'
+            self.save()
 
 class JournalsItem(models.Model):
-    """Individual line items in a journals entry."""
+    """
+    Individual line items in a journals entry.
+    debit/credit are always in the functional currency (every report sums
+    them); currency/amount_currency keep the original transaction amount.
+    """
     entry = models.ForeignKey(JournalsEntry, related_name='items', on_delete=models.CASCADE)
     accounts = models.ForeignKey(Accounts, on_delete=models.PROTECT)
     debit = models.DecimalField(max_digits=20, decimal_places=2, default=0)
     credit = models.DecimalField(max_digits=20, decimal_places=2, default=0)
     description = models.CharField(max_length=200, blank=True)
+    currency = models.CharField(max_length=3, blank=True, help_text="Transaction currency; blank = functional")
+    amount_currency = models.DecimalField(max_digits=20, decimal_places=2, default=0, help_text="Signed (Dr +, Cr -) amount in `currency`")
 
     def clean(self):
         if self.debit > 0 and self.credit > 0:
             raise ValidationError("A single line cannot have both debit and credit.")
 
+def functional_currency():
+    """The currency the ledger is kept in (settings.FUNCTIONAL_CURRENCY)."""
+    return getattr(settings, 'FUNCTIONAL_CURRENCY', 'USD')
+
+def month_start(value):
+    """First day of the fiscal month containing `value` (fiscal months follow the calendar)."""
+    if hasattr(value, 'date'):
+        value = value.date()
+    return value.replace(day=1)
+
+class AccountPeriodBalance(models.Model):
+    """
+    Posted debit/credit totals per account per fiscal month.
+    Maintained when entries are posted/voided so reports sum a few period
+    rows instead of every JournalsItem. Rebuild with `rebuild_period_balances`.
+    """
+    accounts = models.ForeignKey(Accounts, on_delete=models.CASCADE, related_name='period_balances')
+    period = models.DateField(help_text="First day of the fiscal month")
+    debit = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    credit = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['accounts', 'period'], name='unique_account_period_balance'),
+        ]
+        indexes = [models.Index(fields=['period'])]
+
+    def __str__(self):
+        return f"{self.accounts.code} {self.period:%Y-%m}"
+
+    @classmethod
+    def apply_entry(cls, entry, sign=1):
+        """Adds (sign=1) or removes (sign=-1) an entry's items from its month's balances."""
+        PeriodClose.assert_open(entry.date)
+        period = month_start(entry.date)
+        totals = entry.items.values('accounts').annotate(debit_sum=Sum('debit'), credit_sum=Sum('credit'))
+        cls.apply_totals(
+            {(row['accounts'], period): (row['debit_sum'], row['credit_sum']) for row in totals},
+            sign=sign,
+        )
+
+    @classmethod
+    def apply_totals(cls, totals, sign=1):
+        """
+        Applies pre-aggregated movements {(account_id, period): (debit, credit)}.
+        Used by batch paths so many entries cost one UPDATE per account-month.
+        """
+        if not totals:
+            return
+        PeriodClose.assert_open(min(period for _, period in totals))
+        # Make sure every (account, month) row exists, then increment in place
+        cls.objects.bulk_create(
+            [cls(accounts_id=account_id, period=period) for account_id, period in totals],
+            ignore_conflicts=True,
+        )
+        for (account_id, period), (debit, credit) in totals.items():
+            cls.objects.filter(accounts_id=account_id, period=period).update(
+                debit=F('debit') + sign * debit,
+                credit=F('credit') + sign * credit,
+            )
+
+class PeriodClose(models.Model):
+    """
+    A closed fiscal period. Everything dated on or before period_end is locked,
+    P&L balances were swept to Retained Earnings by closing_entry, and the
+    post-closing balances are frozen in `snapshots` as the next opening balances.
+    """
+    period_end = models.DateField(unique=True, help_text="Last day of the closed fiscal period")
+    closing_entry = models.OneToOneField(JournalsEntry, on_delete=models.PROTECT, null=True, blank=True, related_name='period_close')
+    closed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Closed through {self.period_end}"
+
+    @classmethod
+    def assert_open(cls, date):
+        if hasattr(date, 'date'):
+            date = date.date()
+        if cls.objects.filter(period_end__gte=date).exists():
+            raise ValidationError(f"The fiscal period containing {date} is closed.")
+
+class AccountBalanceSnapshot(models.Model):
+    """Frozen cumulative (post-closing) totals per account at a PeriodClose."""
+    close = models.ForeignKey(PeriodClose, on_delete=models.CASCADE, related_name='snapshots')
+    accounts = models.ForeignKey(Accounts, on_delete=models.CASCADE, related_name='snapshots')
+    debit = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    credit = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['close', 'accounts'], name='unique_close_account_snapshot'),
+        ]
+
+class FxRate(models.Model):
+    """Daily exchange rate: `rate` units of the functional currency buy one unit of `currency`."""
+    currency = models.CharField(max_length=3)
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['currency', 'date'], name='unique_fx_rate'),
+        ]
+
+    def __str__(self):
+        return f"{self.currency} {self.date}: {self.rate}"
+
+class PostingRule(models.Model):
+    """
+    GL accounts used when an invoice is posted.
+    The most specific rule wins: client + engagement type, client, engagement
+    type, then the default rule (both blank).
+    """
+    client = models.ForeignKey('crm.Client', on_delete=models.CASCADE, null=True, blank=True, related_name='posting_rules')
+    engagement_type = models.CharField(max_length=20, blank=True, help_text="AUDIT, TAX or ADVISORY; blank matches any")
+    receivable_account = models.ForeignKey(Accounts, on_delete=models.PROTECT, related_name='+')
+    revenue_account = models.ForeignKey(Accounts, on_delete=models.PROTECT, related_name='+')
+    tax_account = models.ForeignKey(Accounts, on_delete=models.PROTECT, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['client', 'engagement_type'], name='unique_posting_rule'),
+            # NULLs are distinct in the constraint above, so rules for any client need their own
+            models.UniqueConstraint(
+                fields=['engagement_type'], condition=models.Q(client__isnull=True), name='unique_default_posting_rule',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Posting rule ({self.client or 'any client'} / {self.engagement_type or 'any type'})"
+
+class DocumentSequence(models.Model):
+    """
+    Next document number per document type and fiscal year.
+    The counter row is bumped with a single UPDATE, which holds the row lock
+    until the caller's transaction ends: concurrent workers queue instead of
+    colliding, and a rolled-back document hands its number back (no gaps).
+    Types listed in settings.DOCUMENT_SEQUENCE_BLOCKS reserve a block of
+    numbers per worker process instead, committed at once on the `sequences`
+    connection so the lock is held only for that UPDATE; fewer lock waits, but
+    numbers left in a block when the worker exits or the caller rolls back
+    are skipped.
+    """
+    INVOICE = 'INVOICE'
+    BILL = 'BILL'
+    JOURNAL = 'JOURNAL'
+    TYPE_CHOICES = (
+        (INVOICE, 'Invoice'),
+        (BILL, 'Bill'),
+        (JOURNAL, 'Journal entry'),
+    )
+    # Rendered as <prefix>-<year>-<zero padded number>
+    FORMATS = {INVOICE: ('INV', 4), BILL: ('BILL', 4), JOURNAL: ('JE', 6)}
+
+    doc_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
+    fiscal_year = models.PositiveIntegerField()
+    next_value = models.PositiveBigIntegerField(default=1)
+
+    # (doc_type, fiscal_year) -> [next, end) reserved by this process
+    _blocks = {}
+    _blocks_lock = threading.Lock()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['doc_type', 'fiscal_year'], name='unique_document_sequence'),
+        ]
+
+    def __str__(self):
+        return f"{self.doc_type} {self.fiscal_year}: next {self.next_value}"
+
+    @staticmethod
+    def _block_db():
+        # SQLite has a single writer: a second connection would wait on the caller's own transaction
+        if 'sequences' in settings.DATABASES and connections['sequences'].vendor != 'sqlite':
+            return 'sequences'
+        return DEFAULT_DB_ALIAS
+
+    @classmethod
+    def _advance(cls, doc_type, fiscal_year, count, using=DEFAULT_DB_ALIAS):
+        """Moves the counter on by `count` and returns the first value taken."""
+        counter = cls.objects.using(using).filter(doc_type=doc_type, fiscal_year=fiscal_year)
+        with transaction.atomic(using=using):
+            if not counter.update(next_value=F('next_value') + count):
+                # First number of the year; a concurrent insert just wins the race
+                cls.objects.using(using).bulk_create(
+                    [cls(doc_type=doc_type, fiscal_year=fiscal_year)], ignore_conflicts=True
+                )
+                counter.update(next_value=F('next_value') + count)
+            return counter.values_list('next_value', flat=True).get() - count
+
+    @classmethod
+    def allocate(cls, doc_type, fiscal_year, count=1):
+        """Returns the first of `count` consecutive numbers."""
+        block_size = getattr(settings, 'DOCUMENT_SEQUENCE_BLOCKS', {}).get(doc_type)
+        if not block_size:
+            return cls._advance(doc_type, fiscal_year, count)
+
+        key = (doc_type, fiscal_year)
+        with cls._blocks_lock:
+            block = cls._blocks.get(key)
+            if block and block[1] - block[0] >= count:
+                first = block[0]
+                block[0] += count
+                return first
+
+        size = max(block_size, count)
+        using = cls._block_db()
+        first = cls._advance(doc_type, fiscal_year, size, using=using)
+        block = [first + count, first + size]
+
+        def keep():
+            with cls._blocks_lock:
+                cls._blocks[key] = block
+
+        # Reserved inside the caller's transaction (SQLite), the block only exists once it commits
+        if using == DEFAULT_DB_ALIAS and connection.in_atomic_block:
+            transaction.on_commit(keep)
+        else:
+            keep()
+        return first
+
+    @classmethod
+    def next_numbers(cls, doc_type, date=None, count=1):
+        """Formatted numbers for documents dated `date` (defaults to today)."""
+        fiscal_year = (date or timezone.localdate()).year
+        first = cls.allocate(doc_type, fiscal_year, count)
+        prefix, width = cls.FORMATS[doc_type]
+        return [f"{prefix}-{fiscal_year}-{n:0{width}d}" for n in range(first, first + count)]
+
+    @classmethod
+    def next_number(cls, doc_type, date=None):
+        return cls.next_numbers(doc_type, date)[0]
+
 # ---------------------------------------------------------
 # 2. SUB-LEDGERS: INVOICING (Accounts Receivable)
 # ---------------------------------------------------------
@@ -107,18 +429,49 @@ class Invoices(models.Model):
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='DRAFT')
     notes = models.TextField(blank=True)
+    # Amounts above are in this currency (set from the client's primary currency)
+    currency = models.CharField(max_length=3, blank=True)
+    # Rate the receivable is carried at in the GL (posting rate, then each revaluation)
+    carrying_rate = models.DecimalField(max_digits=18, decimal_places=8, null=True, blank=True)
     
     # Link to the GL Entry once posted
     journals_entry = models.OneToOneField(JournalsEntry, on_delete=models.SET_NULL, null=True, blank=True)
     history = HistoricalRecords()
 
+    class Meta:
+        # AR aging scans open invoices by due date
+        indexes = [models.Index(fields=['status', 'due_date'])]
+
     def save(self, *args, **kwargs):
-        # Auto-calculate totals
+        # Auto-calculate totals (one aggregate, however many lines)
         if self.pk:
-            self.subtotal = sum(line.amount for line in self.lines.all())
+            self.subtotal = self.lines.aggregate(subtotal=Sum('amount'))['subtotal'] or Decimal('0')
             self.total = self.subtotal + self.tax_amount
         super().save(*args, **kwargs)
 
+    def set_lines(self, lines_data):
+        """
+        Replaces every line with one bulk insert, then recomputes the totals
+        and writes a single history record: a creation ('+') for a new
+        invoice, a change ('~') otherwise.
+        """
+        adding = self._state.adding
+        with transaction.atomic():
+            if adding:
+                # The lines need the pk; history waits for the final totals
+                self.save_without_historical_record()
+            else:
+                self.lines.all().delete()
+            lines = [InvoicesLine(invoices=self, **data) for data in lines_data]
+            for line in lines:
+                line.amount = line.quantity * line.unit_price
+            InvoicesLine.objects.bulk_create(lines)
+            if adding:
+                self.save_without_historical_record()
+                Invoices.history.bulk_history_create([self])
+            else:
+                self.save()
+
 class InvoicesLine(models.Model):
     invoices = models.ForeignKey(Invoices, related_name='lines', on_delete=models.CASCADE)
     description = models.CharField(max_length=255)
@@ -129,7 +482,7 @@ class InvoicesLine(models.Model):
     def save(self, *args, **kwargs):
         self.amount = self.quantity * self.unit_price
         super().save(*args, **kwargs)
-        # Trigger parent update
+        # Trigger parent update (single-line edits; Invoices.set_lines for whole sets)
         self.invoices.save()
 
 # ---------------------------------------------------------
@@ -137,6 +490,12 @@ class InvoicesLine(models.Model):
 # ---------------------------------------------------------
 
 class ExpenseClaim(models.Model):
+    """
+    An employee out-of-pocket expense. Approved claims are paid out by the
+    reimbursement run, which posts one journal entry for the whole pay period;
+    billable ones are rebilled to the client by ExpenseBilling, which sets `invoice`.
+    Receipt name/size/type are captured at upload so listings never touch storage.
+    """
     STATUS_CHOICES = (
         ('SUBMITTED', 'Submitted'),
         ('APPROVED', 'Approved'),
@@ -149,28 +508,98 @@ class ExpenseClaim(models.Model):
     date = models.DateField()
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     receipt = models.FileField(upload_to='expenses/%Y/%m/', null=True, blank=True)
+    receipt_size = models.PositiveIntegerField(null=True, blank=True)
+    receipt_content_type = models.CharField(max_length=100, blank=True)
+    # Blank = the default staff expenses account
+    expense_account = models.ForeignKey(Accounts, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     
     # Identify if this is billable to a client
     is_billable = models.BooleanField(default=False)
     client = models.ForeignKey('crm.Client', on_delete=models.SET_NULL, null=True, blank=True)
+    engagement = models.ForeignKey('crm.Engagement', on_delete=models.SET_NULL, null=True, blank=True, related_name='expense_claims')
+    # Set once rebilled; deleting the draft invoice frees the claim for the next run
+    invoice = models.ForeignKey(Invoices, on_delete=models.SET_NULL, null=True, blank=True, related_name='billed_expenses')
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='SUBMITTED')
     approved_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='approved_expenses', on_delete=models.SET_NULL, null=True)
-    
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    reimbursement_entry = models.ForeignKey(JournalsEntry, on_delete=models.PROTECT, null=True, blank=True, related_name='expense_claims')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'date']),
+            # Unbilled rebillable costs, scanned by the billing run
+            models.Index(fields=['client', 'engagement'], name='expense_unbilled_idx',
+                         condition=models.Q(is_billable=True, invoice__isnull=True)),
+        ]
+
     def __str__(self):
         return f"{self.employee} - {self.amount}"
 
 # ---------------------------------------------------------
-# 4. ASSET MANAGEMENT STUB
+# 4. FIXED ASSETS
 # ---------------------------------------------------------
 class Asset(models.Model):
+    """
+    A fixed asset depreciated monthly by DepreciationEngine.
+    accumulated_depreciation / depreciated_through are only written by the
+    month-end run, which posts one consolidated journal entry.
+    """
+    METHOD_CHOICES = (
+        ('STRAIGHT_LINE', 'Straight line'),
+        ('DECLINING_BALANCE', 'Declining balance'),
+    )
+
     name = models.CharField(max_length=200)
     purchase_date = models.DateField()
     purchase_price = models.DecimalField(max_digits=12, decimal_places=2)
     salvage_value = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     useful_life_years = models.IntegerField(default=5)
-    depreciation_method = models.CharField(max_length=50, default='STRAIGHT_LINE')
+    depreciation_method = models.CharField(max_length=50, choices=METHOD_CHOICES, default='STRAIGHT_LINE')
     accumulated_depreciation = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    depreciated_through = models.DateField(null=True, blank=True, help_text="Month end of the last depreciation run")
+    # Blank = the default depreciation accounts (5300 / 1510)
+    expense_account = models.ForeignKey(Accounts, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+    accumulated_account = models.ForeignKey(Accounts, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def book_value(self):
+        return self.purchase_price - self.accumulated_depreciation
+
+# ---------------------------------------------------------
+# 5. BANK RECONCILIATION
+# ---------------------------------------------------------
+class BankStatementLine(models.Model):
+    """One line of an imported bank statement for a cash account; reconciled once it has a BankMatch."""
+    account = models.ForeignKey(Accounts, on_delete=models.PROTECT, related_name='bank_lines')
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=20, decimal_places=2, help_text="Signed: deposits +, withdrawals -")
+    description = models.CharField(max_length=255, blank=True)
+    reference = models.CharField(max_length=100, blank=True)
+    # The uploaded statement this line came from, when imported from the document vault
+    document = models.ForeignKey('crm.ClientDocument', on_delete=models.SET_NULL, null=True, blank=True, related_name='bank_lines')
+    imported_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['account', 'date'])]
+
+    def __str__(self):
+        return f"{self.date} {self.amount} {self.reference or self.description}"
+
+class BankMatch(models.Model):
+    """
+    Clears one statement line against one ledger line. Kept as its own row so
+    an auto-match run is a single bulk insert, and unreconciled ledger lines
+    are simply the JournalsItems without a `bank_match`.
+    """
+    line = models.OneToOneField(BankStatementLine, on_delete=models.CASCADE, related_name='match')
+    item = models.OneToOneField(JournalsItem, on_delete=models.CASCADE, related_name='bank_match')
+    is_auto = models.BooleanField(default=False)
+    matched_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    matched_at = models.DateTimeField(auto_now_add=True)
 
 # ---------------------------------------------------------
 # NEW: VENDOR MANAGEMENT (Accounts Payable)
@@ -181,11 +610,18 @@ class Vendor(models.Model):
     tax_id = models.CharField(max_length=50, blank=True)
     payment_terms = models.CharField(max_length=100, default='Net 30')
     currency = models.CharField(max_length=3, default='USD')
+    # Debited when this vendor's bills are approved (blank = general expenses)
+    expense_account = models.ForeignKey(Accounts, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     
     def __str__(self):
         return self.name
 
 class Bill(models.Model):
+    """
+    A vendor bill. Approval posts it to Accounts Payable (journal_entry);
+    a payment run settles every approved bill of a vendor with one entry
+    per vendor (payment_entry, shared by the bills it paid).
+    """
     STATUS_CHOICES = (
         ('DRAFT', 'Draft'),
         ('APPROVED', 'Approved'),
@@ -199,10 +635,22 @@ class Bill(models.Model):
     due_date = models.DateField()
     
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # total_amount is in this currency (set from the vendor's currency)
+    currency = models.CharField(max_length=3, blank=True)
+    # Rate the payable is carried at in the GL (posting rate, then each revaluation)
+    carrying_rate = models.DecimalField(max_digits=18, decimal_places=8, null=True, blank=True)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='DRAFT')
+    # Blank = the vendor's expense account
+    expense_account = models.ForeignKey(Accounts, on_delete=models.PROTECT, null=True, blank=True, related_name='+')
     # Link to General Ledger
     journal_entry = models.OneToOneField('JournalsEntry', on_delete=models.SET_NULL, null=True, blank=True)
+    payment_entry = models.ForeignKey('JournalsEntry', on_delete=models.SET_NULL, null=True, blank=True, related_name='paid_bills')
+    paid_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        # AP aging scans open bills by due date
+        indexes = [models.Index(fields=['status', 'due_date'])]
 
     def save(self, *args, **kwargs):
         # Auto-calc due date if missing (simple +30 days logic)
@@ -1,17 +1,30 @@
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
+from crm.models import Engagement
 # Update the import to include Vendor and Bill
-from .models import Accounts, JournalsEntry, JournalsItem, Invoices, InvoicesLine, ExpenseClaim, Vendor, Bill
+from .models import Accounts, AccountClosure, JournalsEntry, JournalsItem, Invoices, InvoicesLine, ExpenseClaim, Vendor, Bill, PostingRule, DocumentSequence, Asset, FxRate, BankStatementLine
+from .services import FxRates
 
 class AccountsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Accounts
         fields = '__all__'
 
+    def validate_parent(self, parent):
+        # Moving an account under its own subtree would create a cycle
+        if parent and self.instance and AccountClosure.objects.filter(
+            ancestor=self.instance, descendant=parent
+        ).exists():
+            raise serializers.ValidationError("An account cannot be moved under itself or one of its sub-accounts.")
+        return parent
+
 class JournalsItemSerializer(serializers.ModelSerializer):
     accounts_name = serializers.ReadOnlyField(source='accounts.name')
     class Meta:
         model = JournalsItem
-        fields = ['id', 'accounts', 'accounts_name', 'debit', 'credit', 'description']
+        fields = ['id', 'accounts', 'accounts_name', 'debit', 'credit', 'description', 'currency', 'amount_currency']
 
 class JournalsEntrySerializer(serializers.ModelSerializer):
     items = JournalsItemSerializer(many=True)
@@ -21,13 +34,68 @@ class JournalsEntrySerializer(serializers.ModelSerializer):
     class Meta:
         model = JournalsEntry
         fields = '__all__'
+        # Posting goes through JournalsEntry.post() so period balances stay in sync
+        read_only_fields = ['status', 'posted_at', 'created_by']
+
+    def validate_items(self, items):
+        for item in items:
+            if item.get('debit', 0) > 0 and item.get('credit', 0) > 0:
+                raise serializers.ValidationError("A single line cannot have both debit and credit.")
+        return items
+
+    def validate(self, data):
+        # Foreign lines given only as amount_currency are converted at the entry date's rate
+        date = data.get('date', getattr(self.instance, 'date', None))
+        for item in data.get('items') or []:
+            if not FxRates.is_foreign(item.get('currency')) or item.get('debit') or item.get('credit'):
+                continue
+            try:
+                amount = FxRates.convert(item.get('amount_currency', 0), item['currency'], date or timezone.localdate())
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError({'items': exc.messages})
+            item['debit'] = max(amount, 0)
+            item['credit'] = max(-amount, 0)
+        return data
+
+    def create(self, validated_data):
+        items_data = validated_data.pop('items')
+        with transaction.atomic():
+            if not validated_data.get('reference'):
+                validated_data['reference'] = DocumentSequence.next_number(DocumentSequence.JOURNAL, validated_data.get('date'))
+            entry = JournalsEntry.objects.create(**validated_data)
+            JournalsItem.objects.bulk_create([JournalsItem(entry=entry, **item) for item in items_data])
+        return entry
+
+    def update(self, instance, validated_data):
+        items_data = validated_data.pop('items', None)
+        if instance.status != 'DRAFT':
+            raise serializers.ValidationError("Only draft entries can be edited.")
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if items_data is not None:
+                instance.items.all().delete()
+                JournalsItem.objects.bulk_create([JournalsItem(entry=instance, **item) for item in items_data])
+        return instance
 
+    # Summed from the items JournalsViewSet already prefetched for the nested list
     def get_total_debit(self, obj):
         return sum(item.debit for item in obj.items.all())
 
     def get_total_credit(self, obj):
         return sum(item.credit for item in obj.items.all())
 
+class JournalsEntryListSerializer(serializers.ModelSerializer):
+    """List rows: no nested items, totals come from the queryset annotation."""
+    total_debit = serializers.ReadOnlyField()
+    total_credit = serializers.ReadOnlyField()
+
+    class Meta:
+        model = JournalsEntry
+        fields = [
+            'id', 'date', 'description', 'reference', 'status', 'posted_at', 'created_by',
+            'related_client', 'related_engagement', 'total_debit', 'total_credit',
+        ]
+
 class InvoicesLineSerializer(serializers.ModelSerializer):
     class Meta:
         model = InvoicesLine
@@ -41,32 +109,198 @@ class InvoicesSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoices
         fields = '__all__'
-        read_only_fields = ['subtotal', 'total', 'journals_entry', 'invoices_number']
+        read_only_fields = ['subtotal', 'total', 'journals_entry', 'invoices_number', 'carrying_rate']
 
     def create(self, validated_data):
         lines_data = validated_data.pop('lines')
-        # Simple auto-increment logic for demo
-        last_id = Invoices.objects.order_by('-id').first()
-        new_id = (last_id.id + 1) if last_id else 1
-        validated_data['invoices_number'] = f"INV-{2024}-{new_id:04d}"
-        
-        invoices = Invoices.objects.create(**validated_data)
-        for line_data in lines_data:
-            InvoicesLine.objects.create(invoices=invoices, **line_data)
-        
-        invoices.save() # Triggers total recalc
+        with transaction.atomic():
+            # Allocated in the same transaction so a failed create leaves no gap
+            validated_data['invoices_number'] = DocumentSequence.next_number(
+                DocumentSequence.INVOICE, validated_data.get('issue_date')
+            )
+            if not validated_data.get('currency'):
+                validated_data['currency'] = validated_data['client'].primary_currency
+            invoices = Invoices(**validated_data)
+            # Saved and given its creation history record, with the final totals, by set_lines()
+            invoices.set_lines(lines_data)
         return invoices
 
+    def validate(self, data):
+        # Posted amounts live in the GL; changing the lines would split the invoice from it
+        if self.instance and 'lines' in data and (
+            self.instance.status != 'DRAFT' or self.instance.journals_entry_id
+        ):
+            raise serializers.ValidationError({'lines': "Only the lines of unposted draft invoices can be edited."})
+        return data
+
+    def update(self, instance, validated_data):
+        lines_data = validated_data.pop('lines', None)
+        if lines_data is None:
+            return super().update(instance, validated_data)
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.set_lines(lines_data)
+        return instance
+
+class InvoicesListSerializer(serializers.ModelSerializer):
+    """List rows: header fields only, client joined in by InvoicesViewSet."""
+    client_name = serializers.ReadOnlyField(source='client.name')
+
+    class Meta:
+        model = Invoices
+        fields = [
+            'id', 'client', 'client_name', 'engagement', 'invoices_number', 'issue_date', 'due_date',
+            'subtotal', 'tax_amount', 'total', 'currency', 'status', 'journals_entry',
+        ]
+
 class VendorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vendor
-        fields = ['id', 'name', 'email', 'tax_id', 'payment_terms', 'currency']
+        fields = ['id', 'name', 'email', 'tax_id', 'payment_terms', 'currency', 'expense_account']
 
 class BillSerializer(serializers.ModelSerializer):
     vendor_name = serializers.ReadOnlyField(source='vendor.name')
     issue_date = serializers.DateField(input_formats=['%Y-%m-%d', 'iso-8601'], required=False)
     due_date = serializers.DateField(input_formats=['%Y-%m-%d', 'iso-8601'])
+    # Left blank, the next BILL-<year>-NNNN number is assigned
+    bill_number = serializers.CharField(max_length=50, required=False, allow_blank=True)
 
     class Meta:
         model = Bill
-        fields = ['id', 'vendor', 'vendor_name', 'bill_number', 'issue_date', 'due_date', 'total_amount', 'status']
\ No newline at end of file
+        fields = [
+            'id', 'vendor', 'vendor_name', 'bill_number', 'issue_date', 'due_date', 'total_amount', 'currency',
+            'expense_account', 'status', 'journal_entry', 'payment_entry', 'paid_date',
+        ]
+        # Set by the approve / payment_run actions
+        read_only_fields = ['journal_entry', 'payment_entry', 'paid_date']
+
+    def validate_status(self, value):
+        # APPROVED / PAID are reached by posting, never by editing the field
+        if value not in ('DRAFT', 'VOID'):
+            raise serializers.ValidationError("Bills are approved and paid through the approve and payment_run actions.")
+        return value
+
+    def validate(self, data):
+        if self.instance and self.instance.journal_entry_id:
+            raise serializers.ValidationError("Posted bills cannot be edited.")
+        return data
+
+    def create(self, validated_data):
+        if not validated_data.get('currency'):
+            validated_data['currency'] = validated_data['vendor'].currency
+        with transaction.atomic():
+            if not validated_data.get('bill_number'):
+                validated_data['bill_number'] = DocumentSequence.next_number(
+                    DocumentSequence.BILL, validated_data.get('issue_date')
+                )
+            return super().create(validated_data)
+
+class PostingRuleSerializer(serializers.ModelSerializer):
+    client_name = serializers.ReadOnlyField(source='client.name')
+    # Blank = any engagement type (the default keeps the unique-together check optional)
+    engagement_type = serializers.ChoiceField(
+        choices=[('', 'Any')] + Engagement.TYPE_CHOICES, required=False, allow_blank=True, default=''
+    )
+
+    class Meta:
+        model = PostingRule
+        fields = ['id', 'client', 'client_name', 'engagement_type', 'receivable_account', 'revenue_account', 'tax_account']
+
+class AssetSerializer(serializers.ModelSerializer):
+    book_value = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Asset
+        fields = '__all__'
+        # Only the month-end depreciation run moves these
+        read_only_fields = ['accumulated_depreciation', 'depreciated_through']
+
+    def validate_useful_life_years(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Useful life must be at least one year.")
+        return value
+
+    def validate(self, data):
+        price = data.get('purchase_price', getattr(self.instance, 'purchase_price', None))
+        salvage = data.get('salvage_value', getattr(self.instance, 'salvage_value', 0))
+        if price is not None and salvage > price:
+            raise serializers.ValidationError("Salvage value cannot exceed the purchase price.")
+        return data
+
+class FxRateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FxRate
+        fields = ['id', 'currency', 'date', 'rate']
+
+    def validate_currency(self, value):
+        return value.upper()
+
+    def validate_rate(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Rate must be positive.")
+        return value
+
+class BankStatementLineSerializer(serializers.ModelSerializer):
+    # Reconciliation goes through the match / auto_match actions
+    matched_item = serializers.ReadOnlyField(source='match.item_id', default=None)
+    matched_by_name = serializers.ReadOnlyField(source='match.matched_by.username', default=None)
+    matched_at = serializers.ReadOnlyField(source='match.matched_at', default=None)
+    is_auto = serializers.ReadOnlyField(source='match.is_auto', default=None)
+
+    class Meta:
+        model = BankStatementLine
+        fields = [
+            'id', 'account', 'date', 'amount', 'description', 'reference', 'document',
+            'matched_item', 'matched_by_name', 'matched_at', 'is_auto', 'imported_at',
+        ]
+        read_only_fields = ['imported_at']
+
+class ExpenseClaimSerializer(serializers.ModelSerializer):
+    employee_name = serializers.ReadOnlyField(source='employee.username')
+    approved_by_name = serializers.ReadOnlyField(source='approved_by.username')
+    client_name = serializers.ReadOnlyField(source='client.name')
+
+    class Meta:
+        model = ExpenseClaim
+        fields = [
+            'id', 'employee', 'employee_name', 'description', 'date', 'amount',
+            'receipt', 'receipt_size', 'receipt_content_type', 'expense_account',
+            'is_billable', 'client', 'client_name', 'engagement', 'status', 'approved_by', 'approved_by_name',
+            'reviewed_at', 'reimbursement_entry', 'invoice',
+        ]
+        # Status only moves through the review / reimburse actions, invoice through the billing run
+        read_only_fields = [
+            'employee', 'receipt_size', 'receipt_content_type', 'status',
+            'approved_by', 'reviewed_at', 'reimbursement_entry', 'invoice',
+        ]
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be positive.")
+        return value
+
+    def validate(self, data):
+        is_billable = data.get('is_billable', getattr(self.instance, 'is_billable', False))
+        client = data.get('client', getattr(self.instance, 'client', None))
+        engagement = data.get('engagement', getattr(self.instance, 'engagement', None))
+        if engagement is not None:
+            if client is None:
+                client = data['client'] = engagement.client
+            elif engagement.client_id != client.pk:
+                raise serializers.ValidationError({'engagement': "Engagement belongs to a different client."})
+        if is_billable and client is None:
+            raise serializers.ValidationError({'client': "Billable expenses need a client."})
+        # Captured from the upload so listings never have to stat the file in storage
+        receipt = data.get('receipt')
+        if receipt is not None and hasattr(receipt, 'content_type'):
+            data['receipt_size'] = receipt.size
+            data['receipt_content_type'] = receipt.content_type or ''
+        elif 'receipt' in data:
+            data['receipt_size'], data['receipt_content_type'] = None, ''
+        return data
+
+    def update(self, instance, validated_data):
+        if instance.status != 'SUBMITTED':
+            raise serializers.ValidationError("Only submitted claims can be edited.")
+        return super().update(instance, validated_data)
@@ -1,7 +1,215 @@
-from django.db import transaction
-from .models import JournalsEntry, JournalsItem, Accounts
+import bisect
+import csv
+import itertools
+import json
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from django.db import transaction, DatabaseError
+from django.core.exceptions import ValidationError
+from django.db.models import Sum, Avg, Q, F, Value, DecimalField, OuterRef, Subquery, Case, When
+from django.db.models.functions import Cast, Coalesce, Round, TruncMonth
+from django.utils.dateparse import parse_date
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
+from crm.models import Client, Engagement
+from .models import (
+    JournalsEntry, JournalsItem, Accounts, AccountClosure, AccountPeriodBalance, PeriodClose,
+    AccountBalanceSnapshot, Invoices, InvoicesLine, Bill, PostingRule, DocumentSequence, Asset, FxRate,
+    BankStatementLine, BankMatch, ExpenseClaim, functional_currency, month_start,
+)
 from django.utils import timezone
 
+# Accounts whose balance is naturally a debit (everything else is credit-normal)
+DEBIT_NORMAL_TYPES = ('ASSET', 'EXPENSE')
+PL_TYPES = ('INCOME', 'EXPENSE')
+BS_TYPES = ('ASSET', 'LIABILITY', 'EQUITY')
+RETAINED_EARNINGS_CODE = '3200'
+CASH_CODE = '1000'
+PAYABLE_CODE = '2000'
+STAFF_EXPENSES_CODE = '5400'
+FX_GAIN_LOSS_CODE = '4900'
+GENERAL_EXPENSES_CODE = '5900'
+
+ZERO = Decimal('0.00')
+
+# (label, min days past due, max days past due); None = open-ended
+AGING_BUCKETS = (
+    ('current', None, 0),
+    ('1_30', 1, 30),
+    ('31_60', 31, 60),
+    ('61_90', 61, 90),
+    ('91_120', 91, 120),
+    ('120_plus', 121, None),
+)
+OPEN_INVOICE_STATUSES = ('SENT', 'OVERDUE')
+# Approved bills are posted to Accounts Payable; drafts are not liabilities yet
+OPEN_BILL_STATUSES = ('APPROVED',)
+
+def _zero():
+    return Value(ZERO, output_field=DecimalField(max_digits=20, decimal_places=2))
+
+def _total(field, condition=None):
+    """Conditional SUM that yields 0.00 instead of NULL for accounts with no activity."""
+    return Coalesce(Sum(field, filter=condition), _zero())
+
+def entry_totals():
+    """total_debit / total_credit annotations for a JournalsEntry queryset."""
+    return {'total_debit': _total('items__debit'), 'total_credit': _total('items__credit')}
+
+def _snapshot(close_id, field):
+    """Frozen opening total of the outer account at a given PeriodClose."""
+    frozen = AccountBalanceSnapshot.objects.filter(close_id=close_id, accounts=OuterRef('pk'))
+    return Coalesce(Subquery(frozen.values(field)[:1]), _zero())
+
+class PostingRules:
+    """
+    In-process cache of the invoice posting rules, so posting never queries for GL accounts.
+    Cleared by signals when a PostingRule or Accounts row changes; the TTL bounds
+    how long other worker processes can keep a stale copy.
+    """
+    TTL = 300
+    # Used when no PostingRule matches
+    DEFAULT_CODES = ('1200', '4000', '2100')  # Accounts Receivable, Sales Income, Tax Payable
+
+    _rules = None
+    _loaded_at = 0.0
+
+    @classmethod
+    def invalidate(cls):
+        cls._rules = None
+
+    @classmethod
+    def _load(cls):
+        rules = cls._rules
+        if rules is not None and time.monotonic() - cls._loaded_at < cls.TTL:
+            return rules
+        by_code = dict(Accounts.objects.filter(code__in=cls.DEFAULT_CODES).values_list('code', 'id'))
+        rules = {(None, ''): tuple(by_code.get(code) for code in cls.DEFAULT_CODES)}
+        for client_id, engagement_type, *accounts in PostingRule.objects.values_list(
+            'client_id', 'engagement_type', 'receivable_account_id', 'revenue_account_id', 'tax_account_id'
+        ):
+            rules[(client_id, engagement_type)] = tuple(accounts)
+        cls._rules, cls._loaded_at = rules, time.monotonic()
+        return rules
+
+    @classmethod
+    def resolve(cls, invoice):
+        """(receivable, revenue, tax) account ids for an invoice, most specific rule first."""
+        rules = cls._load()
+        engagement_type = invoice.engagement.engagement_type if invoice.engagement_id else ''
+        for key in ((invoice.client_id, engagement_type), (invoice.client_id, ''),
+                    (None, engagement_type), (None, '')):
+            if key in rules:
+                receivable, revenue, tax = rules[key]
+                break
+        if not receivable or not revenue or (invoice.tax_amount > 0 and not tax):
+            raise ValidationError("No posting accounts configured (add a posting rule or accounts 1200/4000/2100).")
+        return receivable, revenue, tax
+
+class FxRates:
+    """
+    In-process cache of the FxRate table, keyed by currency with dates kept
+    sorted so a lookup is a bisect: the rate of a date is the latest one on or
+    before it (weekends and holidays use the previous business day).
+    Cleared by signals / after imports; the TTL bounds staleness in other workers.
+    """
+    TTL = 300
+    CENT = Decimal('0.01')
+
+    _rates = None
+    _loaded_at = 0.0
+
+    @classmethod
+    def invalidate(cls):
+        cls._rates = None
+
+    @classmethod
+    def _load(cls):
+        rates = cls._rates
+        if rates is not None and time.monotonic() - cls._loaded_at < cls.TTL:
+            return rates
+        rates = {}
+        for currency, date, rate in FxRate.objects.order_by('currency', 'date').values_list('currency', 'date', 'rate'):
+            dates, values = rates.setdefault(currency, ([], []))
+            dates.append(date)
+            values.append(rate)
+        cls._rates, cls._loaded_at = rates, time.monotonic()
+        return rates
+
+    @staticmethod
+    def is_foreign(currency):
+        return bool(currency) and currency != functional_currency()
+
+    @classmethod
+    def rate(cls, currency, date):
+        """Functional units per unit of `currency` on `date`."""
+        if not cls.is_foreign(currency):
+            return Decimal('1')
+        if hasattr(date, 'date'):
+            date = date.date()
+        dates, values = cls._load().get(currency, ((), ()))
+        index = bisect.bisect_right(dates, date) - 1
+        if index < 0:
+            raise ValidationError(f"No {currency} exchange rate on or before {date}.")
+        return values[index]
+
+    @classmethod
+    def convert(cls, amount, currency=None, date=None, rate=None):
+        """`amount` in `currency` expressed in the functional currency, to the cent."""
+        if rate is None:
+            rate = cls.rate(currency, date)
+        return (amount * rate).quantize(cls.CENT, rounding=ROUND_HALF_UP)
+
+    @classmethod
+    def average(cls, currency, date_from, date_to):
+        """Mean daily rate over a window (falls back to the closing rate when none were published)."""
+        if not cls.is_foreign(currency):
+            return Decimal('1')
+        if date_from:
+            mean = FxRate.objects.filter(
+                currency=currency, date__gte=date_from, date__lte=date_to,
+            ).aggregate(mean=Avg('rate'))['mean']
+            if mean:
+                return mean
+        return cls.rate(currency, date_to)
+
+def import_fx_rates(lines, batch_size=1000):
+    """
+    Upserts daily rates from CSV lines with columns date, currency, rate.
+    Returns (imported, errors) where errors is a list of {'row', 'error'}.
+    """
+    imported = 0
+    errors = []
+    batch = []
+
+    def flush():
+        FxRate.objects.bulk_create(
+            batch, update_conflicts=True, unique_fields=['currency', 'date'], update_fields=['rate'],
+        )
+        batch.clear()
+
+    with transaction.atomic():
+        for row_no, row in enumerate(csv.DictReader(lines), start=2):
+            try:
+                date = parse_date((row.get('date') or '').strip())
+                rate = Decimal((row.get('rate') or '').strip())
+            except (ValueError, InvalidOperation):
+                date = rate = None
+            currency = (row.get('currency') or '').strip().upper()
+            if date is None or rate is None or rate <= 0 or len(currency) != 3:
+                errors.append({'row': row_no, 'error': "Expected date (YYYY-MM-DD), 3-letter currency and a positive rate."})
+                continue
+            batch.append(FxRate(currency=currency, date=date, rate=rate))
+            imported += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    # bulk_create sends no post_save, so drop the cache here
+    FxRates.invalidate()
+    return imported, errors
+
 class AccountingService:
     @staticmethod
     def post_invoices_to_gl(invoices, user):
@@ -14,45 +222,1605 @@ class AccountingService:
         if invoices.status != 'SENT' or invoices.journals_entry:
             return # Already posted or not ready
 
+        entries, rejected = AccountingService.post_invoices_batch(Invoices.objects.filter(pk=invoices.pk), user)
+        if rejected:
+            raise ValidationError(rejected[0]['error'])
+        if not entries:
+            return # Posted by a concurrent request
+        invoices.journals_entry = entries[0]
+        return entries[0]
+
+    @staticmethod
+    def post_invoices_batch(queryset, user):
+        """
+        Posts every SENT, not yet posted invoice in `queryset` in ONE transaction:
+        headers via bulk_create (with history), all lines via one bulk_create,
+        period balances as one set of account-month totals and the invoice
+        links via one bulk update. GL accounts come from the PostingRules cache;
+        foreign-currency invoices are converted at the issue-date FxRates rate.
+        Returns (entries, rejected) where rejected is a list of {'id', 'error'}.
+        """
+        with transaction.atomic():
+            invoices = list(
+                queryset.select_for_update(of=('self',))
+                .select_related('client', 'engagement')
+                .filter(status='SENT', journals_entry__isnull=True)
+            )
+            closed_through = PeriodClose.objects.order_by('-period_end').values_list('period_end', flat=True).first()
+
+            rejected = []
+            pending = []
+            for inv in invoices:
+                issue_date = inv.issue_date.date() if hasattr(inv.issue_date, 'date') else inv.issue_date
+                if closed_through and issue_date <= closed_through:
+                    rejected.append({'id': inv.pk, 'error': f"The fiscal period containing {issue_date} is closed."})
+                    continue
+                try:
+                    receivable, revenue, tax = PostingRules.resolve(inv)
+                    rate = FxRates.rate(inv.currency, issue_date)
+                except ValidationError as exc:
+                    rejected.append({'id': inv.pk, 'error': exc.messages[0]})
+                    continue
+
+                # Dr Receivable / Cr Revenue / Cr Tax, in the functional currency at the issue-date rate
+                revenue_amount = FxRates.convert(inv.subtotal, rate=rate)
+                tax_amount = FxRates.convert(inv.tax_amount, rate=rate)
+                currency = inv.currency if FxRates.is_foreign(inv.currency) else ''
+                lines = [
+                    JournalsItem(accounts_id=receivable, debit=revenue_amount + tax_amount, credit=0,
+                                 currency=currency, amount_currency=inv.total if currency else 0),
+                    JournalsItem(accounts_id=revenue, debit=0, credit=revenue_amount,
+                                 currency=currency, amount_currency=-inv.subtotal if currency else 0),
+                ]
+                if inv.tax_amount > 0:
+                    lines.append(JournalsItem(accounts_id=tax, debit=0, credit=tax_amount,
+                                              currency=currency, amount_currency=-inv.tax_amount if currency else 0))
+                inv.carrying_rate = rate if currency else None
+                entry = JournalsEntry(
+                    date=issue_date,
+                    description=f"Invoices #{inv.invoices_number} - {inv.client.name}",
+                    reference=inv.invoices_number,
+                    created_by=user,
+                    related_client_id=inv.client_id,
+                    related_engagement_id=inv.engagement_id,
+                    status='POSTED',
+                    posted_at=timezone.now(),
+                )
+                pending.append((inv, entry, lines))
+
+            if not pending:
+                return [], rejected
+
+            entries = bulk_create_with_history([entry for _, entry, _ in pending], JournalsEntry, default_user=user)
+            items = []
+            totals = defaultdict(lambda: [ZERO, ZERO])
+            for entry, (inv, _, lines) in zip(entries, pending):
+                inv.journals_entry = entry
+                for line in lines:
+                    line.entry = entry
+                    items.append(line)
+                    bucket = totals[(line.accounts_id, month_start(entry.date))]
+                    bucket[0] += line.debit
+                    bucket[1] += line.credit
+            JournalsItem.objects.bulk_create(items)
+            AccountPeriodBalance.apply_totals(totals)
+            bulk_update_with_history(
+                [inv for inv, _, _ in pending], Invoices, ['journals_entry', 'carrying_rate'], default_user=user,
+            )
+        return entries, rejected
+
+    @staticmethod
+    def post_bills_batch(queryset, user):
+        """
+        Approves every DRAFT bill in `queryset` and posts it to Accounts Payable
+        in ONE transaction, like post_invoices_batch:
+        Dr Expense (bill, else vendor, else 5900)
+           Cr Accounts Payable (2000)
+        Foreign bills are converted at the issue-date rate, which becomes their carrying rate.
+        Returns (entries, rejected) where rejected is a list of {'id', 'error'}.
+        """
+        with transaction.atomic():
+            bills = list(
+                queryset.select_for_update(of=('self',))
+                .select_related('vendor')
+                .filter(status='DRAFT', journal_entry__isnull=True)
+            )
+            closed_through = PeriodClose.objects.order_by('-period_end').values_list('period_end', flat=True).first()
+            by_code = dict(Accounts.objects.filter(code__in=(PAYABLE_CODE, GENERAL_EXPENSES_CODE)).values_list('code', 'id'))
+            payable = by_code.get(PAYABLE_CODE)
+
+            rejected = []
+            pending = []
+            for bill in bills:
+                expense = bill.expense_account_id or bill.vendor.expense_account_id or by_code.get(GENERAL_EXPENSES_CODE)
+                if not payable:
+                    rejected.append({'id': bill.pk, 'error': f"Accounts payable account {PAYABLE_CODE} is missing."})
+                    continue
+                if not expense:
+                    rejected.append({'id': bill.pk, 'error': f"No expense account (set one on the bill or vendor, or add account {GENERAL_EXPENSES_CODE})."})
+                    continue
+                if bill.total_amount <= 0:
+                    rejected.append({'id': bill.pk, 'error': "Bill total must be positive."})
+                    continue
+                if closed_through and bill.issue_date <= closed_through:
+                    rejected.append({'id': bill.pk, 'error': f"The fiscal period containing {bill.issue_date} is closed."})
+                    continue
+                try:
+                    rate = FxRates.rate(bill.currency, bill.issue_date)
+                except ValidationError as exc:
+                    rejected.append({'id': bill.pk, 'error': exc.messages[0]})
+                    continue
+
+                amount = FxRates.convert(bill.total_amount, rate=rate)
+                currency = bill.currency if FxRates.is_foreign(bill.currency) else ''
+                lines = [
+                    JournalsItem(accounts_id=expense, debit=amount, credit=ZERO,
+                                 currency=currency, amount_currency=bill.total_amount if currency else 0),
+                    JournalsItem(accounts_id=payable, debit=ZERO, credit=amount,
+                                 currency=currency, amount_currency=-bill.total_amount if currency else 0),
+                ]
+                bill.status = 'APPROVED'
+                bill.carrying_rate = rate if currency else None
+                entry = JournalsEntry(
+                    date=bill.issue_date,
+                    description=f"Bill #{bill.bill_number} - {bill.vendor.name}",
+                    reference=bill.bill_number,
+                    created_by=user,
+                    status='POSTED',
+                    posted_at=timezone.now(),
+                )
+                pending.append((bill, entry, lines))
+
+            if not pending:
+                return [], rejected
+
+            entries = bulk_create_with_history([entry for _, entry, _ in pending], JournalsEntry, default_user=user)
+            items = []
+            totals = defaultdict(lambda: [ZERO, ZERO])
+            for entry, (bill, _, lines) in zip(entries, pending):
+                bill.journal_entry = entry
+                for line in lines:
+                    line.entry = entry
+                    items.append(line)
+                    bucket = totals[(line.accounts_id, month_start(entry.date))]
+                    bucket[0] += line.debit
+                    bucket[1] += line.credit
+            JournalsItem.objects.bulk_create(items, batch_size=1000)
+            AccountPeriodBalance.apply_totals(totals)
+            Bill.objects.bulk_update(
+                [bill for bill, _, _ in pending], ['status', 'journal_entry', 'carrying_rate'], batch_size=1000,
+            )
+        return entries, rejected
+
+    @staticmethod
+    def pay_bills(due_by, user, payment_date=None, cash_account=None, vendor=None):
+        """
+        Payment run: settles every APPROVED, posted bill due on or before due_by
+        in ONE transaction, with one payment entry per vendor:
+        Dr Accounts Payable (one line per bill, at its carrying rate)
+        Dr/Cr FX gain/loss (realised difference on foreign bills)
+           Cr Cash (cash_account, default 1000)
+        Entries and lines are bulk-created and every paid bill is marked PAID
+        by a single UPDATE. Returns (entries, paid_count, rejected).
+        """
+        payment_date = payment_date or timezone.localdate()
+        PeriodClose.assert_open(payment_date)
+        period = month_start(payment_date)
+
+        with transaction.atomic():
+            bills = (
+                Bill.objects.select_for_update(of=('self',)).select_related('vendor')
+                .filter(status='APPROVED', journal_entry__isnull=False, due_date__lte=due_by)
+            )
+            if vendor is not None:
+                bills = bills.filter(vendor=vendor)
+            bills = list(bills.order_by('vendor_id', 'due_date', 'id'))
+            if not bills:
+                return [], 0, []
+
+            by_code = dict(
+                Accounts.objects.filter(code__in=(PAYABLE_CODE, CASH_CODE, FX_GAIN_LOSS_CODE)).values_list('code', 'id')
+            )
+            payable = by_code.get(PAYABLE_CODE)
+            if not payable:
+                raise ValidationError(f"Accounts payable account {PAYABLE_CODE} is missing.")
+            cash = cash_account.pk if cash_account else by_code.get(CASH_CODE)
+            if not cash:
+                raise ValidationError(f"Cash account {CASH_CODE} is missing.")
+            fx_account = by_code.get(FX_GAIN_LOSS_CODE)
+
+            rejected = []
+            runs = []
+            now = timezone.now()
+            for vendor_id, group in itertools.groupby(bills, key=lambda bill: bill.vendor_id):
+                lines = []
+                paid = []
+                cash_total = fx_total = ZERO
+                for bill in group:
+                    currency = bill.currency if FxRates.is_foreign(bill.currency) else ''
+                    carried = settled = bill.total_amount
+                    if currency:
+                        try:
+                            rate = FxRates.rate(currency, payment_date)
+                        except ValidationError as exc:
+                            rejected.append({'id': bill.pk, 'error': exc.messages[0]})
+                            continue
+                        settled = FxRates.convert(bill.total_amount, rate=rate)
+                        carried = FxRates.convert(bill.total_amount, rate=bill.carrying_rate or rate)
+                        if settled != carried and not fx_account:
+                            rejected.append({'id': bill.pk, 'error': f"Foreign exchange gain/loss account {FX_GAIN_LOSS_CODE} is missing."})
+                            continue
+                    lines.append(JournalsItem(
+                        accounts_id=payable, debit=carried, credit=ZERO, description=f"Bill #{bill.bill_number}"[:200],
+                        currency=currency, amount_currency=bill.total_amount if currency else 0,
+                    ))
+                    cash_total += settled
+                    fx_total += settled - carried
+                    paid.append(bill)
+                if not paid:
+                    continue
+                name = paid[0].vendor.name
+                if fx_total:
+                    # Paying more than the payable is carried at is a loss (debit)
+                    lines.append(JournalsItem(accounts_id=fx_account, debit=max(fx_total, ZERO), credit=max(-fx_total, ZERO),
+                                              description="Realised FX difference"))
+                lines.append(JournalsItem(accounts_id=cash, debit=ZERO, credit=cash_total, description=f"Payment - {name}"[:200]))
+                entry = JournalsEntry(
+                    date=payment_date,
+                    description=f"Payment run {payment_date} - {name}",
+                    reference=f"PAY-{payment_date:%Y%m%d}-{vendor_id}",
+                    created_by=user,
+                    status='POSTED',
+                    posted_at=now,
+                )
+                runs.append((vendor_id, entry, lines, paid))
+
+            if not runs:
+                return [], 0, rejected
+
+            entries = bulk_create_with_history([entry for _, entry, _, _ in runs], JournalsEntry, default_user=user)
+            items = []
+            totals = defaultdict(lambda: [ZERO, ZERO])
+            for entry, (_, _, lines, _) in zip(entries, runs):
+                for line in lines:
+                    line.entry = entry
+                    items.append(line)
+                    bucket = totals[(line.accounts_id, period)]
+                    bucket[0] += line.debit
+                    bucket[1] += line.credit
+            JournalsItem.objects.bulk_create(items, batch_size=1000)
+            AccountPeriodBalance.apply_totals(totals)
+
+            paid_ids = [bill.pk for _, _, _, paid in runs for bill in paid]
+            Bill.objects.filter(pk__in=paid_ids).update(
+                status='PAID',
+                paid_date=payment_date,
+                payment_entry=Case(*(
+                    When(vendor_id=vendor_id, then=Value(entry.pk))
+                    for entry, (vendor_id, _, _, _) in zip(entries, runs)
+                )),
+            )
+        return entries, len(paid_ids), rejected
+
+    @staticmethod
+    def post_batch(queryset, user):
+        """
+        Posts every DRAFT entry in `queryset` in one transaction:
+          1. One grouped query finds unbalanced (or empty) entries: HAVING SUM(debit) <> SUM(credit)
+          2. One UPDATE flips the rest to POSTED, with history rows written in bulk
+          3. Their items roll into the period balances as one set of account-month totals
+        Returns (posted_count, rejected) where rejected is a list of {'id', 'error'}.
+        """
+        with transaction.atomic():
+            candidates = list(
+                queryset.select_for_update().filter(status='DRAFT').values_list('pk', 'date')
+            )
+            closed_through = PeriodClose.objects.order_by('-period_end').values_list('period_end', flat=True).first()
+
+            rejected = []
+            open_ids = []
+            for pk, date in candidates:
+                if closed_through and date <= closed_through:
+                    rejected.append({'id': pk, 'error': f"The fiscal period containing {date} is closed."})
+                else:
+                    open_ids.append(pk)
+
+            unbalanced = (
+                JournalsEntry.objects.filter(pk__in=open_ids)
+                .annotate(debits=_total('items__debit'), credits=_total('items__credit'))
+                .filter(Q(debits=0) | ~Q(debits=F('credits')))
+                .values_list('pk', 'debits', 'credits')
+            )
+            bad = set()
+            for pk, debits, credits in unbalanced:
+                bad.add(pk)
+                rejected.append({'id': pk, 'error': f"Entry not balanced. Debits: {debits}, Credits: {credits}"})
+            valid = [pk for pk in open_ids if pk not in bad]
+            if not valid:
+                return 0, rejected
+
+            JournalsEntry.objects.filter(pk__in=valid).update(status='POSTED', posted_at=timezone.now())
+            JournalsEntry.history.bulk_history_create(
+                list(JournalsEntry.objects.filter(pk__in=valid)), update=True, default_user=user,
+            )
+
+            totals = (
+                JournalsItem.objects.filter(entry_id__in=valid)
+                .annotate(period=TruncMonth('entry__date'))
+                .values('accounts', 'period')
+                .annotate(debit_sum=Sum('debit'), credit_sum=Sum('credit'))
+                .order_by()
+            )
+            AccountPeriodBalance.apply_totals(
+                {(row['accounts'], row['period']): (row['debit_sum'], row['credit_sum']) for row in totals}
+            )
+        return len(valid), rejected
+
+    @staticmethod
+    def cumulative_totals(points, accounts=None):
+        """
+        Cumulative posted debit/credit per account at several cut-off dates at once.
+
+        `points` maps a label to an inclusive cut-off date (None = all time) and
+        each account row gets `<label>_debit` / `<label>_credit`. Each cut-off
+        starts from the latest frozen PeriodClose snapshot before it, adds the
+        open months from AccountPeriodBalance and reads only the trailing
+        partial month from JournalsItem, so the cost is bounded by open-period
+        activity rather than the age of the ledger. Three queries at most.
+        Pass `accounts` (a queryset or id list) to restrict the rows returned.
+        """
+        closes = list(PeriodClose.objects.order_by('period_end').values_list('id', 'period_end'))
+
+        annotations = {}
+        partial = {}
+        for label, day in points.items():
+            opening = None
+            for close_id, close_end in closes:
+                if day is None or close_end <= day:
+                    opening = (close_id, close_end)
+
+            condition = Q()
+            if opening:
+                condition &= Q(period_balances__period__gt=opening[1])
+            if day is not None:
+                cutoff = month_start(day + timedelta(days=1))
+                condition &= Q(period_balances__period__lt=cutoff)
+                if cutoff <= day:
+                    partial[label] = (cutoff, day)
+
+            for field in ('debit', 'credit'):
+                total = _total(f'period_balances__{field}', condition or None)
+                if opening:
+                    total = total + _snapshot(opening[0], field)
+                annotations[f'{label}_{field}'] = total
+
+        qs = Accounts.objects.order_by('code')
+        if accounts is not None:
+            qs = qs.filter(pk__in=accounts)
+        rows = list(
+            qs.values('id', 'code', 'name', 'account_type', 'parent').annotate(**annotations)
+        )
+        if not partial:
+            return rows
+
+        item_annotations = {}
+        for label, (start, end) in partial.items():
+            window = Q(entry__date__gte=start, entry__date__lte=end)
+            item_annotations[f'{label}_debit'] = _total('debit', window)
+            item_annotations[f'{label}_credit'] = _total('credit', window)
+        earliest = min(start for start, _ in partial.values())
+        items = JournalsItem.objects.filter(entry__status='POSTED', entry__date__gte=earliest)
+        if accounts is not None:
+            items = items.filter(accounts__in=accounts)
+        extra = {
+            row['accounts']: row
+            for row in items.values('accounts').annotate(**item_annotations)
+        }
+        for row in rows:
+            movement = extra.get(row['id'])
+            if movement:
+                for key in item_annotations:
+                    row[key] += movement[key]
+        return rows
+
+    @staticmethod
+    def account_balance(account, as_of=None):
+        """Signed (normal-side) balance of one account as of a date, from the period table."""
+        [row] = AccountingService.cumulative_totals({'cum': as_of}, accounts=[getattr(account, 'pk', account)])
+        sign = 1 if row['account_type'] in DEBIT_NORMAL_TYPES else -1
+        return sign * (row['cum_debit'] - row['cum_credit'])
+
+    @staticmethod
+    def trial_balance(date_from=None, date_to=None, as_of=None, client=None, engagement=None):
+        """
+        Debit/credit totals for every account in a constant number of queries.
+
+        Two sets of totals are produced side by side:
+          - period_*: movement between date_from and date_to (the P&L window)
+          - debit/credit: cumulative activity up to as_of (the Balance Sheet date)
+        as_of defaults to date_to, so a plain date range gives a matching BS.
+        Firm-wide reports read AccountPeriodBalance; client/engagement scoped
+        ones aggregate JournalsItem directly since period rows are firm-wide.
+        """
+        as_of = as_of or date_to
+        period_end = date_to or as_of
+
+        if client or engagement:
+            rows = AccountingService._scan_trial_balance(date_from, period_end, as_of, client, engagement)
+        else:
+            points = {'cum': as_of, 'end': period_end}
+            if date_from:
+                points['start'] = date_from - timedelta(days=1)
+            rows = AccountingService.cumulative_totals(points)
+
+            # Closing entries inside the window are not P&L activity; back them out of the movement
+            closing = JournalsItem.objects.filter(entry__period_close__isnull=False)
+            if date_from:
+                closing = closing.filter(entry__date__gte=date_from)
+            if period_end:
+                closing = closing.filter(entry__date__lte=period_end)
+            closing = {
+                row['accounts']: row
+                for row in closing.values('accounts').annotate(debit_sum=Sum('debit'), credit_sum=Sum('credit'))
+            }
+
+            for row in rows:
+                start_debit = row.pop('start_debit', ZERO)
+                start_credit = row.pop('start_credit', ZERO)
+                swept = closing.get(row['id'], {'debit_sum': ZERO, 'credit_sum': ZERO})
+                row['period_debit'] = row.pop('end_debit') - start_debit - swept['debit_sum']
+                row['period_credit'] = row.pop('end_credit') - start_credit - swept['credit_sum']
+                row['debit'] = row.pop('cum_debit')
+                row['credit'] = row.pop('cum_credit')
+
+        for row in rows:
+            # Sign balances to the account's normal side (Dr for assets/expenses)
+            sign = 1 if row['account_type'] in DEBIT_NORMAL_TYPES else -1
+            row['period_balance'] = sign * (row['period_debit'] - row['period_credit'])
+            row['balance'] = sign * (row['debit'] - row['credit'])
+        return rows
+
+    @staticmethod
+    def _scan_trial_balance(date_from, period_end, as_of, client, engagement):
+        """Trial balance straight from JournalsItem in one grouped query (used for scoped reports)."""
+        posted = Q(journalsitem__entry__status='POSTED')
+        if client:
+            posted &= Q(journalsitem__entry__related_client=client)
+        if engagement:
+            posted &= Q(journalsitem__entry__related_engagement=engagement)
+
+        cumulative = posted
+        if as_of:
+            cumulative &= Q(journalsitem__entry__date__lte=as_of)
+
+        period = posted
+        if date_from:
+            period &= Q(journalsitem__entry__date__gte=date_from)
+        if period_end:
+            period &= Q(journalsitem__entry__date__lte=period_end)
+
+        return list(
+            Accounts.objects.order_by('code')
+            .values('id', 'code', 'name', 'account_type', 'parent')
+            .annotate(
+                period_debit=_total('journalsitem__debit', period),
+                period_credit=_total('journalsitem__credit', period),
+                debit=_total('journalsitem__debit', cumulative),
+                credit=_total('journalsitem__credit', cumulative),
+            )
+        )
+
+    @staticmethod
+    def financial_statements(currency=None, **filters):
+        """
+        Builds the P&L (period movement) and Balance Sheet (as-of balances) from one trial balance.
+        With `currency`, balances are translated into that presentation currency:
+        the Balance Sheet at the closing rate, the P&L at the period's average
+        rate, and the difference shown as a cumulative translation adjustment.
+        """
+        rows = AccountingService.trial_balance(**filters)
+        translate_bs = translate_pl = lambda amount: amount
+        if FxRates.is_foreign(currency):
+            as_of = filters.get('as_of') or filters.get('date_to') or timezone.localdate()
+            closing_rate = FxRates.rate(currency, as_of)
+            average_rate = FxRates.average(currency, filters.get('date_from'), filters.get('date_to') or as_of)
+            translate_bs = lambda amount: (amount / closing_rate).quantize(FxRates.CENT, rounding=ROUND_HALF_UP)
+            translate_pl = lambda amount: (amount / average_rate).quantize(FxRates.CENT, rounding=ROUND_HALF_UP)
+        for row in rows:
+            row['balance'] = (translate_pl if row['account_type'] in PL_TYPES else translate_bs)(row['balance'])
+            row['period_balance'] = translate_pl(row['period_balance'])
+
+        pl_data = {t: [] for t in PL_TYPES}
+        pl_totals = {t: ZERO for t in PL_TYPES}
+        bs_data = {t: [] for t in BS_TYPES}
+        bs_totals = {t: ZERO for t in BS_TYPES}
+        # Earnings not yet swept to Retained Earnings by a period close
+        retained = ZERO
+
+        for row in rows:
+            acc_type = row['account_type']
+            if acc_type in PL_TYPES:
+                balance = row['period_balance']
+                if balance != 0:
+                    pl_data[acc_type].append({'name': row['name'], 'code': row['code'], 'balance': balance})
+                    pl_totals[acc_type] += balance
+                retained += row['balance'] if acc_type == 'INCOME' else -row['balance']
+            elif acc_type in BS_TYPES:
+                balance = row['balance']
+                if balance != 0:
+                    bs_data[acc_type].append({'name': row['name'], 'code': row['code'], 'balance': balance})
+                    bs_totals[acc_type] += balance
+
+        net_income = pl_totals['INCOME'] - pl_totals['EXPENSE']
+
+        # Closed periods already live in Retained Earnings; only the open period is added here
+        bs_totals['EQUITY'] += retained
+        bs_data['EQUITY'].append({'name': 'Net Income (Current Period)', 'code': '9999', 'balance': retained})
+
+        if FxRates.is_foreign(currency):
+            # Mixed rates leave the translated balance sheet out by the translation difference
+            adjustment = bs_totals['ASSET'] - (bs_totals['LIABILITY'] + bs_totals['EQUITY'])
+            bs_totals['EQUITY'] += adjustment
+            bs_data['EQUITY'].append({'name': 'Cumulative Translation Adjustment', 'code': '9998', 'balance': adjustment})
+
+        return {
+            'currency': currency if FxRates.is_foreign(currency) else functional_currency(),
+            'pl': {
+                'data': pl_data,
+                'totals': pl_totals,
+                'net_income': net_income
+            },
+            'bs': {
+                'data': bs_data,
+                'totals': bs_totals,
+                'check': bs_totals['ASSET'] - (bs_totals['LIABILITY'] + bs_totals['EQUITY'])
+            }
+        }
+
+    @staticmethod
+    def ledger_rows(accounts=None, date_from=None, date_to=None):
+        """
+        General-ledger detail lines with a running balance per account (signed
+        to the account's normal side). Items are read through iterator(), i.e.
+        a server-side cursor, so memory stays flat however long the export is.
+        Opening balances for date_from come from the period table up front.
+        """
+        if date_from:
+            opening = AccountingService.cumulative_totals({'open': date_from - timedelta(days=1)}, accounts=accounts)
+        else:
+            qs = Accounts.objects.all() if accounts is None else Accounts.objects.filter(pk__in=accounts)
+            opening = qs.values('id', 'code', 'name', 'account_type')
+        chart = {}
+        for row in opening:
+            sign = 1 if row['account_type'] in DEBIT_NORMAL_TYPES else -1
+            balance = sign * (row['open_debit'] - row['open_credit']) if date_from else ZERO
+            chart[row['id']] = (row['code'], row['name'], sign, balance)
+
+        items = JournalsItem.objects.filter(entry__status='POSTED')
+        if accounts is not None:
+            items = items.filter(accounts__in=accounts)
+        if date_from:
+            items = items.filter(entry__date__gte=date_from)
+        if date_to:
+            items = items.filter(entry__date__lte=date_to)
+        items = items.order_by('accounts__code', 'entry__date', 'entry_id', 'id').values_list(
+            'accounts_id', 'entry__date', 'entry_id', 'entry__reference', 'entry__description',
+            'description', 'debit', 'credit',
+        )
+
+        current, balance = None, ZERO
+        for account_id, date, entry_id, reference, entry_description, memo, debit, credit in items.iterator(chunk_size=2000):
+            code, name, sign, opening_balance = chart[account_id]
+            if account_id != current:
+                current, balance = account_id, opening_balance
+                if date_from:
+                    yield {'account': code, 'account_name': name, 'date': date_from, 'entry': None,
+                           'reference': '', 'description': 'Opening balance',
+                           'debit': None, 'credit': None, 'balance': balance}
+            balance += sign * (debit - credit)
+            yield {'account': code, 'account_name': name, 'date': date, 'entry': entry_id,
+                   'reference': reference, 'description': memo or entry_description,
+                   'debit': debit, 'credit': credit, 'balance': balance}
+
+    @staticmethod
+    def aging(queryset, party, amount_field, number_field, as_of, party_id=None):
+        """
+        Aged balances of open documents bucketed by days past `due_date` at as_of,
+        in the functional currency: each document at its carrying rate (the
+        rate the GL holds it at), or the as_of rate when it has none.
+
+        Summary: one grouped query with a conditional SUM per bucket, one row
+        per party (client / vendor). With party_id: the drill-down list of that
+        party's documents, also in one query.
+        """
+        queryset = queryset.filter(issue_date__lte=as_of)
+        functional = functional_currency()
+        # Foreign documents the GL carries no rate for; raises ValidationError when a rate is missing
+        uncarried = (
+            queryset.filter(carrying_rate__isnull=True).exclude(currency='').exclude(currency=functional)
+            .values_list('currency', flat=True).distinct()
+        )
+        rate = Coalesce('carrying_rate', Case(
+            *[When(currency=currency, then=Value(FxRates.rate(currency, as_of))) for currency in set(uncarried)],
+            default=Value(Decimal('1')),
+            output_field=DecimalField(max_digits=18, decimal_places=8),
+        ))
+        # Rounded per document, as posting does
+        amount = Cast(Round(F(amount_field) * rate, 2), DecimalField(max_digits=20, decimal_places=2))
+
+        def bucket_filter(low, high):
+            condition = Q()
+            if low is not None:
+                condition &= Q(due_date__lte=as_of - timedelta(days=low))
+            if high is not None:
+                condition &= Q(due_date__gte=as_of - timedelta(days=high))
+            return condition
+
+        labels = [label for label, _, _ in AGING_BUCKETS]
+        if party_id is not None:
+            rows = []
+            for doc in queryset.filter(**{party: party_id}).order_by('due_date', 'id').values(
+                'id', 'issue_date', 'due_date', 'currency', number=F(number_field),
+                document_amount=F(amount_field), amount=amount,
+            ):
+                doc['currency'] = doc['currency'] or functional
+                days = (as_of - doc['due_date']).days
+                doc['days_past_due'] = max(days, 0)
+                doc['bucket'] = next(label for label, low, high in AGING_BUCKETS
+                                     if (low is None or days >= low) and (high is None or days <= high))
+                rows.append(doc)
+            return {'as_of': as_of, 'currency': functional, 'buckets': labels, 'documents': rows}
+
+        # Annotation names are prefixed so they can't clash with model fields (e.g. Invoices.total)
+        annotations = {
+            f'aged_{label}': _total(amount, bucket_filter(low, high))
+            for label, low, high in AGING_BUCKETS
+        }
+        annotations['aged_total'] = _total(amount)
+        rows = []
+        totals = {label: ZERO for label in labels + ['total']}
+        for aged in queryset.values(party, f'{party}__name').annotate(**annotations).order_by(f'{party}__name'):
+            row = {'id': aged[party], 'name': aged[f'{party}__name']}
+            row.update((label, aged[f'aged_{label}']) for label in totals)
+            rows.append(row)
+            for label in totals:
+                totals[label] += row[label]
+        return {'as_of': as_of, 'currency': functional, 'buckets': labels, 'rows': rows, 'totals': totals}
+
+    @staticmethod
+    def account_tree(root=None, **filters):
+        """
+        Nested chart of accounts with own and rolled-up balances.
+        One trial balance plus one closure-index query, whatever the depth of the tree.
+        """
+        rows = AccountingService.trial_balance(**filters)
+        rolled = {row['id']: [ZERO, ZERO, ZERO, ZERO] for row in rows}
+        by_id = {row['id']: row for row in rows}
+        for ancestor_id, descendant_id in AccountClosure.objects.values_list('ancestor_id', 'descendant_id'):
+            child = by_id[descendant_id]
+            totals = rolled[ancestor_id]
+            totals[0] += child['debit']
+            totals[1] += child['credit']
+            totals[2] += child['period_debit']
+            totals[3] += child['period_credit']
+
+        nodes = {}
+        for row in rows:
+            sign = 1 if row['account_type'] in DEBIT_NORMAL_TYPES else -1
+            debit, credit, period_debit, period_credit = rolled[row['id']]
+            nodes[row['id']] = {
+                'id': row['id'],
+                'code': row['code'],
+                'name': row['name'],
+                'account_type': row['account_type'],
+                'parent': row['parent'],
+                'balance': row['balance'],
+                'period_balance': row['period_balance'],
+                'rollup_balance': sign * (debit - credit),
+                'rollup_period_balance': sign * (period_debit - period_credit),
+                'children': [],
+            }
+
+        roots = []
+        for node in nodes.values():
+            if node['parent'] is None:
+                roots.append(node)
+            else:
+                nodes[node['parent']]['children'].append(node)
+
+        if root is not None:
+            return [nodes[int(root)]] if int(root) in nodes else []
+        return roots
+
+    @staticmethod
+    def close_period(period_end, user):
+        """
+        Closes every open fiscal month up to period_end (a month end):
+          1. Sweeps unclosed INCOME/EXPENSE balances to Retained Earnings in one closing entry
+          2. Locks the period against further postings
+          3. Freezes post-closing balances as the next period's opening snapshot
+        """
+        if month_start(period_end + timedelta(days=1)) != period_end + timedelta(days=1):
+            raise ValidationError("Periods can only be closed at a month end.")
+
+        with transaction.atomic():
+            last = PeriodClose.objects.select_for_update().order_by('-period_end').first()
+            if last and period_end <= last.period_end:
+                raise ValidationError(f"Books are already closed through {last.period_end}.")
+            try:
+                retained_earnings = Accounts.objects.get(code=RETAINED_EARNINGS_CODE)
+            except Accounts.DoesNotExist:
+                raise ValidationError(f"Retained Earnings account {RETAINED_EARNINGS_CODE} is missing.")
+
+            # 1. Unclosed P&L balances in one set-based pass (P&L opens at zero after every close)
+            pl_rows = AccountingService.cumulative_totals(
+                {'cum': period_end}, accounts=Accounts.objects.filter(account_type__in=PL_TYPES)
+            )
+            lines = []
+            net = ZERO  # Dr - Cr across all P&L accounts
+            for row in pl_rows:
+                balance = row['cum_debit'] - row['cum_credit']
+                if balance == 0:
+                    continue
+                lines.append(JournalsItem(
+                    accounts_id=row['id'],
+                    debit=-balance if balance < 0 else ZERO,
+                    credit=balance if balance > 0 else ZERO,
+                    description="Period close",
+                ))
+                net += balance
+            if net != 0:
+                lines.append(JournalsItem(
+                    accounts=retained_earnings,
+                    debit=net if net > 0 else ZERO,
+                    credit=-net if net < 0 else ZERO,
+                    description="Period close",
+                ))
+
+            closing_entry = None
+            if lines:
+                closing_entry = JournalsEntry.objects.create(
+                    date=period_end,
+                    description=f"Closing entry {period_end:%Y-%m}",
+                    reference=f"CLOSE-{period_end:%Y-%m}",
+                    created_by=user,
+                    status='POSTED',
+                    posted_at=timezone.now(),
+                )
+                for line in lines:
+                    line.entry = closing_entry
+                JournalsItem.objects.bulk_create(lines)
+                AccountPeriodBalance.apply_entry(closing_entry)
+
+            # 3. Snapshot before the close row exists so the totals come from the previous snapshot
+            frozen = AccountingService.cumulative_totals({'cum': period_end})
+
+            # 2. Lock
+            close = PeriodClose.objects.create(period_end=period_end, closing_entry=closing_entry, closed_by=user)
+            AccountBalanceSnapshot.objects.bulk_create([
+                AccountBalanceSnapshot(close=close, accounts_id=row['id'],
+                                       debit=row['cum_debit'], credit=row['cum_credit'])
+                for row in frozen
+                if row['cum_debit'] or row['cum_credit']
+            ])
+            return close
+
+    @staticmethod
+    def revalue_open_items(period_end, user):
+        """
+        Month-end revaluation of posted, open foreign-currency invoices and bills.
+        Each document is re-measured at the period_end rate against the rate it
+        is carried at; the differences go to receivable/payable vs FX gain/loss
+        in ONE journal entry (bulk-created items, one set of period totals) and
+        the new carrying rates are written with one bulk update per document type.
+        Returns (entry, revalued_count, rejected) where rejected is a list of {'id', 'type', 'error'}.
+        """
+        if month_start(period_end + timedelta(days=1)) != period_end + timedelta(days=1):
+            raise ValidationError("Revaluation can only be run at a month end.")
+        PeriodClose.assert_open(period_end)
+        period = month_start(period_end)
+        foreign = Q(carrying_rate__isnull=False) & ~Q(currency='') & ~Q(currency=functional_currency())
+
+        with transaction.atomic():
+            by_code = dict(Accounts.objects.filter(code__in=(FX_GAIN_LOSS_CODE, PAYABLE_CODE)).values_list('code', 'id'))
+            fx_account = by_code.get(FX_GAIN_LOSS_CODE)
+            if not fx_account:
+                raise ValidationError(f"Foreign exchange gain/loss account {FX_GAIN_LOSS_CODE} is missing.")
+            invoices = list(
+                Invoices.objects.select_for_update(of=('self',)).select_related('engagement')
+                .filter(foreign, status__in=OPEN_INVOICE_STATUSES, journals_entry__isnull=False, issue_date__lte=period_end)
+            )
+            bills = list(
+                Bill.objects.select_for_update()
+                .filter(foreign, status__in=OPEN_BILL_STATUSES, journal_entry__isnull=False, issue_date__lte=period_end)
+            )
+
+            rejected = []
+            lines = []
+            revalued = {'invoice': [], 'bill': []}
+            # (kind, document, open amount, control account, +1 if it is debit-normal)
+            documents = []
+            for inv in invoices:
+                try:
+                    receivable, _, _ = PostingRules.resolve(inv)
+                except ValidationError as exc:
+                    rejected.append({'id': inv.pk, 'type': 'invoice', 'error': exc.messages[0]})
+                    continue
+                documents.append(('invoice', inv, inv.total, receivable, 1))
+            for bill in bills:
+                if not by_code.get(PAYABLE_CODE):
+                    rejected.append({'id': bill.pk, 'type': 'bill', 'error': f"Accounts payable account {PAYABLE_CODE} is missing."})
+                    continue
+                documents.append(('bill', bill, bill.total_amount, by_code[PAYABLE_CODE], -1))
+
+            for kind, doc, amount, control, sign in documents:
+                try:
+                    rate = FxRates.rate(doc.currency, period_end)
+                except ValidationError as exc:
+                    rejected.append({'id': doc.pk, 'type': kind, 'error': exc.messages[0]})
+                    continue
+                # How much the receivable / payable grew in functional terms
+                difference = FxRates.convert(amount, rate=rate) - FxRates.convert(amount, rate=doc.carrying_rate)
+                doc.carrying_rate = rate
+                revalued[kind].append(doc)
+                if not difference:
+                    continue
+                number = doc.invoices_number if kind == 'invoice' else doc.bill_number
+                memo = f"FX revaluation {number} @ {rate}"[:200]
+                # Signed debit on the control account; FX gain/loss takes the other side
+                movement = sign * difference
+                lines.append(JournalsItem(accounts_id=control, debit=max(movement, ZERO), credit=max(-movement, ZERO),
+                                          description=memo, currency=doc.currency))
+                lines.append(JournalsItem(accounts_id=fx_account, debit=max(-movement, ZERO), credit=max(movement, ZERO),
+                                          description=memo))
+
+            entry = None
+            if lines:
+                entry = JournalsEntry.objects.create(
+                    date=period_end,
+                    description=f"FX revaluation {period_end:%Y-%m}",
+                    reference=f"FXREV-{period_end:%Y-%m}",
+                    created_by=user,
+                    status='POSTED',
+                    posted_at=timezone.now(),
+                )
+                totals = defaultdict(lambda: [ZERO, ZERO])
+                for line in lines:
+                    line.entry = entry
+                    bucket = totals[(line.accounts_id, period)]
+                    bucket[0] += line.debit
+                    bucket[1] += line.credit
+                JournalsItem.objects.bulk_create(lines, batch_size=1000)
+                AccountPeriodBalance.apply_totals(totals)
+
+            bulk_update_with_history(revalued['invoice'], Invoices, ['carrying_rate'], default_user=user)
+            Bill.objects.bulk_update(revalued['bill'], ['carrying_rate'], batch_size=1000)
+        return entry, len(revalued['invoice']) + len(revalued['bill']), rejected
+
+
+class JournalImporter:
+    """
+    Streams CSV / NDJSON journal files into the ledger.
+
+    CSV: one row per line item, consecutive rows sharing an `entry` key form
+    one entry. Columns: entry, date, description, reference, account, debit,
+    credit, memo (+ optional client, engagement).
+    NDJSON: one entry per line, {"date", "description", "reference", "client",
+    "engagement", "items": [{"account", "debit", "credit", "memo"}]}.
+
+    Each entry is validated once as it streams past (account codes resolved
+    from an in-memory map, debits == credits), then valid entries are written
+    with bulk_create in chunked transactions. A bad entry is reported with its
+    row number and skipped; it never aborts the rest of the file.
+    """
+    CENT = Decimal('0.01')
+
+    def __init__(self, user, post=False, chunk_size=1000, max_errors=500):
+        self.user = user
+        self.post = post
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.accounts = dict(Accounts.objects.filter(is_active=True).values_list('code', 'id'))
+        self.closed_through = PeriodClose.objects.order_by('-period_end').values_list('period_end', flat=True).first()
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self._pending = []
+        self._started = time.monotonic()
+
+    # --- Readers -------------------------------------------------------
+
+    @staticmethod
+    def detect_format(filename, fmt=None):
+        fmt = (fmt or filename.rsplit('.', 1)[-1]).lower()
+        if fmt == 'csv':
+            return 'csv'
+        if fmt in ('ndjson', 'jsonl'):
+            return 'ndjson'
+        raise ValueError("Unsupported format: use csv or ndjson")
+
+    def run(self, lines, fmt):
+        if fmt == 'csv':
+            return self.import_csv(lines)
+        return self.import_ndjson(lines)
+
+    def import_csv(self, lines):
+        reader = csv.DictReader(lines)
+        key, first_row, header, items = None, None, None, []
+        # Header row is line 1, so data rows start at 2
+        for row_no, row in enumerate(reader, start=2):
+            row_key = (row.get('entry') or '').strip()
+            if items and row_key != key:
+                self._add(first_row, header, items)
+                items = []
+            if not items:
+                key, first_row, header = row_key, row_no, row
+            items.append({
+                'account': row.get('account'),
+                'debit': row.get('debit'),
+                'credit': row.get('credit'),
+                'memo': row.get('memo'),
+            })
+        if items:
+            self._add(first_row, header, items)
+        return self.finish()
+
+    def import_ndjson(self, lines):
+        for row_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as exc:
+                self._error(row_no, f"Invalid JSON: {exc}")
+                continue
+            self._add(row_no, data, data.get('items') or [])
+        return self.finish()
+
+    # --- Validation ----------------------------------------------------
+
+    def _error(self, row_no, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row_no, 'error': message})
+
+    def _amount(self, raw):
+        value = Decimal(str(raw if raw is not None else '').strip() or '0')
+        if value < 0 or value.quantize(self.CENT) != value:
+            raise InvalidOperation
+        return value
+
+    def _add(self, row_no, header, items):
+        try:
+            date = parse_date(str(header.get('date') or '').strip())
+        except ValueError:
+            date = None
+        description = str(header.get('description') or '').strip()
+        if date is None:
+            return self._error(row_no, "Missing or invalid date (YYYY-MM-DD)")
+        if not description:
+            return self._error(row_no, "Missing description")
+        if self.post and self.closed_through and date <= self.closed_through:
+            return self._error(row_no, f"The fiscal period containing {date} is closed.")
+        # NDJSON rows are free-form: items must be a list of objects
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return self._error(row_no, "items must be a list of line objects")
+        if len(items) < 2:
+            return self._error(row_no, "An entry needs at least two lines")
+        links = {}
+        for field in ('client', 'engagement'):
+            raw = str(header.get(field) or '').strip()
+            if raw and not raw.isdigit():
+                return self._error(row_no, f"Invalid {field} id '{raw}'")
+            links[field] = int(raw) if raw else None
+
+        lines, debits, credits = [], Decimal('0'), Decimal('0')
+        for item in items:
+            code = str(item.get('account') or '').strip()
+            account_id = self.accounts.get(code)
+            if account_id is None:
+                return self._error(row_no, f"Unknown or inactive account code '{code}'")
+            try:
+                debit, credit = self._amount(item.get('debit')), self._amount(item.get('credit'))
+            except (InvalidOperation, ValueError):
+                return self._error(row_no, f"Invalid amount on account {code}")
+            if debit > 0 and credit > 0:
+                return self._error(row_no, "A single line cannot have both debit and credit.")
+            debits += debit
+            credits += credit
+            lines.append(JournalsItem(accounts_id=account_id, debit=debit, credit=credit,
+                                      description=str(item.get('memo') or '')[:200]))
+        if debits != credits or debits == 0:
+            return self._error(row_no, f"Entry not balanced. Debits: {debits}, Credits: {credits}")
+
+        entry = JournalsEntry(
+            date=date,
+            description=description[:255],
+            reference=str(header.get('reference') or '')[:100],
+            created_by=self.user,
+            related_client_id=links['client'],
+            related_engagement_id=links['engagement'],
+            status='POSTED' if self.post else 'DRAFT',
+            posted_at=timezone.now() if self.post else None,
+        )
+        self._pending.append((row_no, entry, lines))
+        if len(self._pending) >= self.chunk_size:
+            self._flush()
+
+    # --- Writing -------------------------------------------------------
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        # Unknown client/engagement ids would fail the whole chunk at commit time
+        client_ids = {e.related_client_id for _, e, _ in pending if e.related_client_id}
+        engagement_ids = {e.related_engagement_id for _, e, _ in pending if e.related_engagement_id}
+        known_clients = set(Client.objects.filter(pk__in=client_ids).values_list('pk', flat=True)) if client_ids else set()
+        known_engagements = set(Engagement.objects.filter(pk__in=engagement_ids).values_list('pk', flat=True)) if engagement_ids else set()
+        valid = []
+        for row_no, entry, lines in pending:
+            if entry.related_client_id and entry.related_client_id not in known_clients:
+                self._error(row_no, f"Unknown client {entry.related_client_id}")
+            elif entry.related_engagement_id and entry.related_engagement_id not in known_engagements:
+                self._error(row_no, f"Unknown engagement {entry.related_engagement_id}")
+            else:
+                valid.append((row_no, entry, lines))
+        if not valid:
+            return
+
+        try:
+            with transaction.atomic():
+                # Entries without an external reference get JE numbers, one allocation per year
+                unnumbered = defaultdict(list)
+                for _, entry, _ in valid:
+                    if not entry.reference:
+                        unnumbered[entry.date.year].append(entry)
+                for group in unnumbered.values():
+                    numbers = DocumentSequence.next_numbers(DocumentSequence.JOURNAL, group[0].date, len(group))
+                    for entry, number in zip(group, numbers):
+                        entry.reference = number
+                entries = bulk_create_with_history(
+                    [entry for _, entry, _ in valid], JournalsEntry,
+                    batch_size=self.chunk_size, default_user=self.user,
+                )
+                items = []
+                totals = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+                for entry, (_, _, lines) in zip(entries, valid):
+                    for line in lines:
+                        line.entry = entry
+                        items.append(line)
+                        if self.post:
+                            bucket = totals[(line.accounts_id, month_start(entry.date))]
+                            bucket[0] += line.debit
+                            bucket[1] += line.credit
+                JournalsItem.objects.bulk_create(items, batch_size=self.chunk_size)
+                if totals:
+                    AccountPeriodBalance.apply_totals(totals)
+        except (DatabaseError, ValidationError) as exc:
+            for row_no, _, _ in valid:
+                self._error(row_no, f"Chunk rejected by the database: {exc}")
+            return
+        self.created += len(valid)
+
+    def finish(self):
+        self._flush()
+        elapsed = time.monotonic() - self._started
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'entries_per_second': round(self.created / elapsed) if elapsed else self.created,
+        }
+
+
+def _months_between(start, end):
+    """Whole months from month `start` to month `end` (both first-of-month dates)."""
+    return (end.year - start.year) * 12 + end.month - start.month
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return day.replace(year=day.year + month // 12, month=month % 12 + 1)
+
+class DepreciationEngine:
+    """
+    Month-end depreciation for every fixed asset in one pass.
+
+    Assets are loaded with one query and each one's due months are computed in
+    memory; the run posts a single JournalsEntry (Dr expense / Cr accumulated
+    depreciation per asset) via bulk_create and writes the assets back with
+    one bulk_update, so the cost does not grow in queries with the register.
+    Months missed by earlier runs are caught up in the same entry.
+    """
+    # Used when an asset has no accounts of its own
+    DEFAULT_CODES = ('5300', '1510')  # Depreciation Expense, Accumulated Depreciation
+    # Double-declining: twice the straight-line rate on the remaining book value
+    DECLINING_FACTOR = Decimal('2')
+    CENT = Decimal('0.01')
+
+    @classmethod
+    def monthly_charge(cls, method, cost, salvage, life_months, accumulated, month_index):
+        """Depreciation for the month_index-th month of the asset's life (0-based)."""
+        remaining = cost - salvage - accumulated
+        months_left = life_months - month_index
+        if remaining <= 0 or months_left <= 0:
+            return ZERO
+        if months_left == 1:
+            # Last month of the life absorbs rounding
+            return remaining
+        if method == 'DECLINING_BALANCE':
+            # Switch to straight line once that spreads the rest faster
+            charge = max((cost - accumulated) * cls.DECLINING_FACTOR / life_months, remaining / months_left)
+        else:
+            charge = (cost - salvage) / life_months
+        return min(charge.quantize(cls.CENT, rounding=ROUND_HALF_UP), remaining)
+
+    @classmethod
+    def schedule(cls, asset):
+        """Full monthly plan for one asset: period, depreciation, accumulated, book value."""
+        life_months = asset.useful_life_years * 12
+        start = month_start(asset.purchase_date)
+        accumulated = ZERO
+        rows = []
+        for month_index in range(max(life_months, 0)):
+            charge = cls.monthly_charge(
+                asset.depreciation_method, asset.purchase_price, asset.salvage_value,
+                life_months, accumulated, month_index,
+            )
+            accumulated += charge
+            period = _add_months(start, month_index)
+            rows.append({
+                'period': period,
+                'depreciation': charge,
+                'accumulated': accumulated,
+                'book_value': asset.purchase_price - accumulated,
+            })
+        return rows
+
+    @classmethod
+    def months_covered(cls, asset, life_months):
+        """
+        Months of the schedule already absorbed by accumulated_depreciation, for
+        assets carried in with depreciation but no depreciated_through.
+        """
+        accumulated = ZERO
+        month_index = 0
+        while month_index < life_months and accumulated < asset.accumulated_depreciation:
+            charge = cls.monthly_charge(
+                asset.depreciation_method, asset.purchase_price, asset.salvage_value,
+                life_months, accumulated, month_index,
+            )
+            if not charge:
+                break
+            accumulated += charge
+            month_index += 1
+        return month_index
+
+    @classmethod
+    def run(cls, period_end, user):
+        """
+        Depreciates every asset through period_end (a month end) in ONE transaction.
+        Returns (entry, depreciated_count, rejected) where entry is None when
+        nothing was due and rejected is a list of {'id', 'error'}.
+        """
+        if month_start(period_end + timedelta(days=1)) != period_end + timedelta(days=1):
+            raise ValidationError("Depreciation can only be run at a month end.")
+        PeriodClose.assert_open(period_end)
+        period = month_start(period_end)
+
+        with transaction.atomic():
+            assets = list(
+                Asset.objects.select_for_update()
+                .filter(purchase_date__lte=period_end)
+                .filter(Q(depreciated_through__isnull=True) | Q(depreciated_through__lt=period_end))
+                .filter(accumulated_depreciation__lt=F('purchase_price') - F('salvage_value'))
+                .order_by('id')
+            )
+            by_code = dict(Accounts.objects.filter(code__in=cls.DEFAULT_CODES).values_list('code', 'id'))
+            default_expense, default_accumulated = (by_code.get(code) for code in cls.DEFAULT_CODES)
+
+            rejected = []
+            charges = []
+            for asset in assets:
+                life_months = asset.useful_life_years * 12
+                if life_months <= 0:
+                    rejected.append({'id': asset.pk, 'error': "Useful life must be at least one year."})
+                    continue
+                first = month_start(asset.purchase_date)
+                done = month_start(asset.depreciated_through) if asset.depreciated_through else None
+                if done:
+                    start_index = _months_between(first, done) + 1 if done >= first else 0
+                else:
+                    start_index = cls.months_covered(asset, life_months)
+                accumulated = asset.accumulated_depreciation
+                charge = ZERO
+                for month_index in range(start_index, _months_between(first, period) + 1):
+                    step = cls.monthly_charge(
+                        asset.depreciation_method, asset.purchase_price, asset.salvage_value,
+                        life_months, accumulated, month_index,
+                    )
+                    if not step:
+                        break
+                    accumulated += step
+                    charge += step
+
+                expense = asset.expense_account_id or default_expense
+                contra = asset.accumulated_account_id or default_accumulated
+                if charge and not (expense and contra):
+                    rejected.append({'id': asset.pk, 'error': "No depreciation accounts configured (set them on the asset or add accounts 5300/1510)."})
+                    continue
+                asset.accumulated_depreciation = accumulated
+                asset.depreciated_through = period_end
+                charges.append((asset, charge, expense, contra))
+
+            entry = None
+            lines = []
+            totals = defaultdict(lambda: [ZERO, ZERO])
+            for asset, charge, expense, contra in charges:
+                if not charge:
+                    continue
+                memo = f"Depreciation - {asset.name}"[:200]
+                lines.append(JournalsItem(accounts_id=expense, debit=charge, credit=ZERO, description=memo))
+                lines.append(JournalsItem(accounts_id=contra, debit=ZERO, credit=charge, description=memo))
+                totals[(expense, period)][0] += charge
+                totals[(contra, period)][1] += charge
+
+            if lines:
+                entry = JournalsEntry.objects.create(
+                    date=period_end,
+                    description=f"Depreciation {period_end:%Y-%m}",
+                    reference=f"DEPR-{period_end:%Y-%m}",
+                    created_by=user,
+                    status='POSTED',
+                    posted_at=timezone.now(),
+                )
+                for line in lines:
+                    line.entry = entry
+                JournalsItem.objects.bulk_create(lines, batch_size=1000)
+                AccountPeriodBalance.apply_totals(totals)
+
+            Asset.objects.bulk_update(
+                [asset for asset, _, _, _ in charges], ['accumulated_depreciation', 'depreciated_through'], batch_size=1000,
+            )
+        return entry, len(lines) // 2, rejected
+
+
+class BankReconciler:
+    """
+    Reconciles a cash account against imported bank statement lines.
+
+    Statements stream in as CSV (date, amount or deposit/withdrawal,
+    description, reference) and are bulk-inserted in chunks. auto_match()
+    loads the account's unreconciled posted items once into a hash index
+    keyed by amount bucket, each bucket sorted by date, so every statement
+    line only looks at the few items with a matching amount inside its date
+    window: near-linear overall instead of comparing every line with every
+    item. Reference hits win, then the closest date, then the closest amount.
+    Whatever is left stays open for manual matching.
+    """
+    CENT = Decimal('0.01')
+    DEFAULT_ACCOUNT_CODE = CASH_CODE
+
+    def __init__(self, account, chunk_size=1000, max_errors=500):
+        self.account = account
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+
+    @classmethod
+    def default_account(cls):
+        return Accounts.objects.filter(code=cls.DEFAULT_ACCOUNT_CODE).first()
+
+    # --- Import --------------------------------------------------------
+
+    def _amount(self, row):
+        def parse(raw):
+            raw = (raw or '').strip().replace(',', '')
+            return Decimal(raw).quantize(self.CENT) if raw else ZERO
+
+        if (row.get('amount') or '').strip():
+            return parse(row['amount'])
+        return parse(row.get('deposit') or row.get('credit')) - parse(row.get('withdrawal') or row.get('debit'))
+
+    def import_csv(self, lines, document=None):
+        """Streams statement rows into BankStatementLine. Returns {'imported', 'failed', 'errors'}."""
+        imported = failed = 0
+        errors = []
+        batch = []
+        for row_no, row in enumerate(csv.DictReader(lines), start=2):
+            try:
+                date = parse_date((row.get('date') or '').strip())
+                amount = self._amount(row)
+            except (ValueError, InvalidOperation):
+                date = amount = None
+            if date is None or amount is None:
+                failed += 1
+                if len(errors) < self.max_errors:
+                    errors.append({'row': row_no, 'error': "Expected a YYYY-MM-DD date and a numeric amount."})
+                continue
+            batch.append(BankStatementLine(
+                account=self.account, date=date, amount=amount, document=document,
+                description=(row.get('description') or '').strip()[:255],
+                reference=(row.get('reference') or '').strip()[:100],
+            ))
+            if len(batch) >= self.chunk_size:
+                BankStatementLine.objects.bulk_create(batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            BankStatementLine.objects.bulk_create(batch)
+            imported += len(batch)
+        return {'imported': imported, 'failed': failed, 'errors': errors}
+
+    # --- Matching ------------------------------------------------------
+
+    @staticmethod
+    def _reference_hit(line_reference, item_reference, item_description):
+        reference = line_reference.strip().lower()
+        return bool(reference) and (reference == item_reference.lower() or reference in item_description.lower())
+
+    def auto_match(self, user=None, date_tolerance=3, amount_tolerance=ZERO, lines=None):
+        """
+        Matches open statement lines (optionally a subset queryset) to open
+        ledger items of the same account. Returns {'matched', 'unmatched'}.
+        """
+        if lines is None:
+            lines = BankStatementLine.objects.filter(account=self.account)
+        with transaction.atomic():
+            # Concurrent runs and manual matches over the same lines queue on these row locks
+            list(lines.filter(match__isnull=True).select_for_update(of=('self',)).values_list('id', flat=True))
+            return self._auto_match(user, date_tolerance, amount_tolerance, lines)
+
+    def _auto_match(self, user, date_tolerance, amount_tolerance, lines):
+        # Read again after locking: lines matched by a run we waited on drop out
+        lines = list(lines.filter(match__isnull=True).order_by('date', 'id'))
+        if not lines:
+            return {'matched': 0, 'unmatched': 0}
+
+        window = timedelta(days=date_tolerance)
+        tolerance = int(amount_tolerance / self.CENT)
+        width = tolerance + 1  # Bucket width in cents: a match is in the same or a neighbouring bucket
+        items = (
+            JournalsItem.objects.filter(
+                accounts=self.account, entry__status='POSTED', bank_match__isnull=True,
+                entry__date__gte=lines[0].date - window, entry__date__lte=lines[-1].date + window,
+            )
+            .select_for_update(of=('self',))
+            .values_list('id', 'entry__date', 'debit', 'credit', 'entry__reference', 'description', 'entry__description')
+            .iterator(chunk_size=5000)
+        )
+        index = defaultdict(list)
+        for item_id, date, debit, credit, reference, memo, entry_description in items:
+            cents = int((debit - credit) / self.CENT)
+            index[cents // width].append((date.toordinal(), item_id, cents, reference, f"{memo} {entry_description}"))
+        for bucket in index.values():
+            bucket.sort()
+
+        used = set()
+        matched = []
+        for line in lines:
+            cents = int(line.amount / self.CENT)
+            day = line.date.toordinal()
+            best = None
+            for key in (cents // width - 1, cents // width, cents // width + 1):
+                bucket = index.get(key)
+                if not bucket:
+                    continue
+                start = bisect.bisect_left(bucket, (day - date_tolerance,))
+                for ordinal, item_id, item_cents, reference, description in bucket[start:]:
+                    if ordinal > day + date_tolerance:
+                        break
+                    if item_id in used or abs(item_cents - cents) > tolerance:
+                        continue
+                    score = (
+                        not self._reference_hit(line.reference, reference, description),
+                        abs(ordinal - day),
+                        abs(item_cents - cents),
+                    )
+                    if best is None or score < best[0]:
+                        best = (score, item_id)
+            if best:
+                used.add(best[1])
+                matched.append(BankMatch(line=line, item_id=best[1], is_auto=True, matched_by=user))
+
+        # Matches are inserted rather than written back onto the lines: one multi-row INSERT per batch
+        BankMatch.objects.bulk_create(matched, batch_size=1000)
+        return {'matched': len(matched), 'unmatched': len(lines) - len(matched)}
+
+    @staticmethod
+    def match(line, item_id, user):
+        """Manually clears a statement line against one open ledger item of the same account."""
+        with transaction.atomic():
+            line = BankStatementLine.objects.select_for_update().get(pk=line.pk)
+            if BankMatch.objects.filter(line=line).exists():
+                raise ValidationError("This statement line is already reconciled.")
+            item = (
+                JournalsItem.objects.select_for_update(of=('self',))
+                .filter(pk=item_id, accounts_id=line.account_id, entry__status='POSTED')
+                .first()
+            )
+            if item is None:
+                raise ValidationError("Ledger line not found on this account or not posted.")
+            if BankMatch.objects.filter(item=item).exists():
+                raise ValidationError("This ledger line is already reconciled.")
+            BankMatch.objects.create(line=line, item=item, matched_by=user)
+        return line
+
+
+class ExpenseClaims:
+    """
+    Review and pay-out of employee expense claims.
+
+    Both steps are set-based: a review decision is one UPDATE over the
+    selected claims, and a reimbursement run posts every approved claim of a
+    pay period as ONE journal entry (Dr expense per account / Cr cash or
+    payables per employee) before flipping them to REIMBURSED with one UPDATE.
+    """
+    # pay_from -> account credited by the reimbursement entry
+    CREDIT_CODES = {'cash': CASH_CODE, 'payable': PAYABLE_CODE}
+
+    @staticmethod
+    def review(ids, approve, user):
+        """
+        Approves or rejects SUBMITTED claims in one UPDATE. Nobody reviews
+        their own claim. Returns {'updated', 'skipped'}.
+        """
+        ids = set(ids)
+        updated = (
+            ExpenseClaim.objects.filter(pk__in=ids, status='SUBMITTED')
+            .exclude(employee=user)
+            .update(status='APPROVED' if approve else 'REJECTED', approved_by=user, reviewed_at=timezone.now())
+        )
+        return {'updated': updated, 'skipped': len(ids) - updated}
+
+    @classmethod
+    def reimburse(cls, period_start, period_end, user, pay_from='cash'):
+        """
+        Pays out every APPROVED claim dated within the pay period in ONE
+        transaction; the entry is dated period_end.
+        Returns (entry, reimbursed_count) where entry is None when nothing was due.
+        """
+        if period_start > period_end:
+            raise ValidationError("period_start must be on or before period_end.")
+        credit_code = cls.CREDIT_CODES.get(pay_from)
+        if credit_code is None:
+            raise ValidationError(f"pay_from must be one of: {', '.join(cls.CREDIT_CODES)}.")
+        PeriodClose.assert_open(period_end)
+        period = month_start(period_end)
+
         with transaction.atomic():
-            # 1. Get Accounts (In a real app, fetch these from Settings)
-            ar_accounts = Accounts.objects.get(code='1200') # Accounts Receivable
-            sales_accounts = Accounts.objects.get(code='4000') # Sales Income
-            tax_accounts = Accounts.objects.get(code='2100')   # Tax Payable
+            claims = list(
+                ExpenseClaim.objects.select_for_update(of=('self',))
+                .filter(status='APPROVED', date__gte=period_start, date__lte=period_end)
+                .values_list('id', 'employee_id', 'employee__username', 'expense_account_id', 'amount')
+            )
+            if not claims:
+                return None, 0
+
+            by_code = dict(Accounts.objects.filter(code__in=(credit_code, STAFF_EXPENSES_CODE)).values_list('code', 'id'))
+            if credit_code not in by_code:
+                raise ValidationError(f"Account {credit_code} to pay the claims from is missing.")
+            debits = defaultdict(lambda: ZERO)
+            credits = defaultdict(lambda: ZERO)
+            names = {}
+            for _, employee_id, username, expense_account_id, amount in claims:
+                expense_account_id = expense_account_id or by_code.get(STAFF_EXPENSES_CODE)
+                if not expense_account_id:
+                    raise ValidationError(f"Staff expenses account {STAFF_EXPENSES_CODE} is missing (or set an expense account on every claim).")
+                debits[expense_account_id] += amount
+                credits[employee_id] += amount
+                names[employee_id] = username
 
-            # 2. Create Header
-            je = JournalsEntry.objects.create(
-                date=invoices.issue_date,
-                description=f"Invoices #{invoices.invoices_number} - {invoices.client.name}",
-                reference=invoices.invoices_number,
+            entry = JournalsEntry.objects.create(
+                date=period_end,
+                description=f"Expense reimbursements {period_start} to {period_end}",
+                reference=f"REIMB-{period_end:%Y%m%d}",
                 created_by=user,
-                related_client=invoices.client,
-                related_engagement=invoices.engagement,
                 status='POSTED',
-                posted_at=timezone.now()
+                posted_at=timezone.now(),
             )
+            lines = [
+                JournalsItem(entry=entry, accounts_id=account_id, debit=amount, credit=ZERO, description="Expense claims")
+                for account_id, amount in debits.items()
+            ] + [
+                JournalsItem(entry=entry, accounts_id=by_code[credit_code], debit=ZERO, credit=amount,
+                             description=f"Reimbursement - {names[employee_id]}"[:200])
+                for employee_id, amount in credits.items()
+            ]
+            JournalsItem.objects.bulk_create(lines, batch_size=1000)
+            totals = defaultdict(lambda: [ZERO, ZERO])
+            for line in lines:
+                bucket = totals[(line.accounts_id, period)]
+                bucket[0] += line.debit
+                bucket[1] += line.credit
+            AccountPeriodBalance.apply_totals(totals)
 
-            # 3. Create Debit (AR)
-            JournalsItem.objects.create(
-                entry=je, accounts=ar_accounts, 
-                debit=invoices.total, credit=0
+            ExpenseClaim.objects.filter(pk__in=[row[0] for row in claims]).update(
+                status='REIMBURSED', reimbursement_entry=entry,
             )
+        return entry, len(claims)
+
+
+class ExpenseBilling:
+    """
+    Rebills billable expense claims to clients as DRAFT invoices.
 
-            # 4. Create Credits (Revenue)
-            JournalsItem.objects.create(
-                entry=je, accounts=sales_accounts,
-                debit=0, credit=invoices.subtotal
+    One query reads every unbilled billable claim ordered by client and
+    engagement; each (client, engagement) group becomes one invoice with a
+    line per claim. Invoices (with their history rows) and lines are
+    bulk-inserted and the claims are linked back with one CASE UPDATE per
+    batch of invoices, so a month-end run over hundreds of clients is a
+    handful of statements rather than a round trip per claim.
+    """
+    # Approved costs are billable whether or not the employee was paid yet
+    BILLABLE_STATUSES = ('APPROVED', 'REIMBURSED')
+    DUE_DAYS = 30
+    BATCH_SIZE = 500
+
+    @classmethod
+    def run(cls, user, as_of=None, issue_date=None, due_date=None, client=None):
+        """
+        Bills every unbilled claim dated on or before as_of (default today),
+        optionally for one client. Returns the created invoices.
+        """
+        as_of = as_of or timezone.localdate()
+        issue_date = issue_date or as_of
+        due_date = due_date or issue_date + timedelta(days=cls.DUE_DAYS)
+        if due_date < issue_date:
+            raise ValidationError("due_date cannot be before issue_date.")
+
+        with transaction.atomic():
+            claims = ExpenseClaim.objects.select_for_update(of=('self',)).filter(
+                is_billable=True, invoice__isnull=True, client__isnull=False,
+                status__in=cls.BILLABLE_STATUSES, date__lte=as_of,
+            )
+            if client is not None:
+                claims = claims.filter(client=client)
+            rows = list(
+                claims.order_by('client_id', 'engagement_id', 'date', 'id')
+                .values_list('id', 'client_id', 'engagement_id', 'date', 'description', 'amount')
             )
+            if not rows:
+                return []
+
+            groups = [(key, list(group)) for key, group in itertools.groupby(rows, key=lambda row: (row[1], row[2]))]
+            numbers = DocumentSequence.next_numbers(DocumentSequence.INVOICE, issue_date, len(groups))
+            # Claims are recorded in the functional currency, so the rebill is too
+            currency = functional_currency()
+            invoices = []
+            for ((client_id, engagement_id), group), number in zip(groups, numbers):
+                subtotal = sum((row[5] for row in group), ZERO)
+                invoices.append(Invoices(
+                    client_id=client_id,
+                    engagement_id=engagement_id,
+                    invoices_number=number,
+                    issue_date=issue_date,
+                    due_date=due_date,
+                    subtotal=subtotal,
+                    tax_amount=ZERO,
+                    total=subtotal,
+                    currency=currency,
+                    notes=f"Rebilled expenses through {as_of}",
+                ))
+            invoices = bulk_create_with_history(invoices, Invoices, batch_size=cls.BATCH_SIZE, default_user=user)
+
+            InvoicesLine.objects.bulk_create([
+                InvoicesLine(invoices=invoice, description=f"{date:%Y-%m-%d} {description}"[:255],
+                             quantity=1, unit_price=amount, amount=amount)
+                for invoice, (_, group) in zip(invoices, groups)
+                for _, _, _, date, description, amount in group
+            ], batch_size=1000)
 
-            # 5. Create Credit (Tax)
-            if invoices.tax_amount > 0:
-                JournalsItem.objects.create(
-                    entry=je, accounts=tax_accounts,
-                    debit=0, credit=invoices.tax_amount
+            billed = list(zip(invoices, groups))
+            for start in range(0, len(billed), cls.BATCH_SIZE):
+                batch = billed[start:start + cls.BATCH_SIZE]
+                ExpenseClaim.objects.filter(pk__in=[row[0] for _, (_, group) in batch for row in group]).update(
+                    invoice=Case(*(
+                        When(pk__in=[row[0] for row in group], then=Value(invoice.pk))
+                        for invoice, (_, group) in batch
+                    )),
                 )
-            
-            # 6. Link back
-            invoices.journals_entry = je
-            invoices.save()
-            
-            return je
\ No newline at end of file
+        return invoices
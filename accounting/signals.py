@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Accounts, PostingRule, FxRate
+from .services import PostingRules, FxRates
+
+@receiver([post_save, post_delete], sender=PostingRule)
+@receiver([post_save, post_delete], sender=Accounts)
+def invalidate_posting_rules(sender, **kwargs):
+    """Drops the cached GL account mapping whenever a rule or an account changes."""
+    PostingRules.invalidate()
+
+@receiver([post_save, post_delete], sender=FxRate)
+def invalidate_fx_rates(sender, **kwargs):
+    """Drops the cached rate table whenever a rate is added, corrected or removed."""
+    FxRates.invalidate()
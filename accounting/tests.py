@@ -1,3 +1,254 @@
-from django.test import TestCase
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.models import User
+from .models import (
+    Accounts, AccountPeriodBalance, Asset, DocumentSequence, JournalsEntry, JournalsItem, month_start,
+)
+from .services import AccountingService, DepreciationEngine
+
+
+class LedgerTestCase(TestCase):
+    """A small chart of accounts and a helper to post balanced two-line entries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='ledger', email='ledger@example.com', password='x', is_superuser=True)
+        cls.cash = Accounts.objects.create(code='1000', name='Cash', account_type='ASSET')
+        cls.receivable = Accounts.objects.create(code='1200', name='Accounts Receivable', account_type='ASSET')
+        cls.payable = Accounts.objects.create(code='2000', name='Accounts Payable', account_type='LIABILITY')
+        cls.capital = Accounts.objects.create(code='3000', name='Owner Capital', account_type='EQUITY')
+        cls.retained = Accounts.objects.create(code='3200', name='Retained Earnings', account_type='EQUITY')
+        cls.fees = Accounts.objects.create(code='4000', name='Audit Fees', account_type='INCOME')
+        cls.rent = Accounts.objects.create(code='5100', name='Office Rent', account_type='EXPENSE')
+
+    def entry(self, day, debit_account, credit_account, amount, post=True):
+        entry = JournalsEntry.objects.create(date=day, description='Test entry', created_by=self.user)
+        JournalsItem.objects.bulk_create([
+            JournalsItem(entry=entry, accounts=debit_account, debit=Decimal(amount)),
+            JournalsItem(entry=entry, accounts=credit_account, credit=Decimal(amount)),
+        ])
+        if post:
+            entry.post()
+        return entry
+
+    def book(self):
+        """Three months of activity, with one entry voided after posting and one left as a draft."""
+        self.entry(date(2025, 1, 2), self.cash, self.capital, '10000')
+        self.entry(date(2025, 1, 15), self.receivable, self.fees, '1500')
+        self.entry(date(2025, 1, 31), self.rent, self.cash, '800')
+        self.entry(date(2025, 2, 10), self.cash, self.receivable, '1500')
+        self.entry(date(2025, 2, 20), self.receivable, self.fees, '2250.50').void()
+        self.entry(date(2025, 2, 28), self.rent, self.payable, '800')
+        self.entry(date(2025, 3, 5), self.receivable, self.fees, '3100.25')
+        self.entry(date(2025, 3, 6), self.rent, self.cash, '99.99', post=False)
+
+    def scanned_totals(self, date_from=None, date_to=None, sweeps=True):
+        """{account_id: (debit, credit)} summed straight from the posted journal lines."""
+        items = JournalsItem.objects.filter(entry__status='POSTED')
+        if date_from:
+            items = items.filter(entry__date__gte=date_from)
+        if date_to:
+            items = items.filter(entry__date__lte=date_to)
+        if not sweeps:
+            items = items.filter(entry__period_close__isnull=True)
+        return {
+            row['accounts']: (row['debit'], row['credit'])
+            for row in items.values('accounts').annotate(debit=Sum('debit'), credit=Sum('credit'))
+        }
+
+
+class PeriodBalanceTests(LedgerTestCase):
+    def assertBalancesMatchLines(self):
+        expected = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+        for item in JournalsItem.objects.filter(entry__status='POSTED').select_related('entry'):
+            totals = expected[(item.accounts_id, month_start(item.entry.date))]
+            totals[0] += item.debit
+            totals[1] += item.credit
+        actual = {
+            (row.accounts_id, row.period): [row.debit, row.credit]
+            for row in AccountPeriodBalance.objects.all()
+            if row.debit or row.credit
+        }
+        self.assertEqual(actual, dict(expected))
+
+    def test_post_and_void_keep_period_balances_in_sync(self):
+        self.book()
+        self.assertBalancesMatchLines()
+
+    def test_void_backs_the_entry_out(self):
+        entry = self.entry(date(2025, 4, 1), self.cash, self.fees, '75')
+        entry.void()
+        entry.void()  # voiding twice is a no-op
+        self.assertFalse(
+            AccountPeriodBalance.objects.filter(period=date(2025, 4, 1)).exclude(debit=0, credit=0).exists()
+        )
+        self.assertBalancesMatchLines()
+
+    def test_posting_twice_is_rejected(self):
+        entry = self.entry(date(2025, 4, 1), self.cash, self.fees, '75')
+        with self.assertRaises(ValidationError):
+            entry.post()
+        self.assertBalancesMatchLines()
+
+    def test_unbalanced_entry_is_not_posted(self):
+        entry = JournalsEntry.objects.create(date=date(2025, 4, 1), description='Unbalanced', created_by=self.user)
+        JournalsItem.objects.create(entry=entry, accounts=self.cash, debit=Decimal('10'))
+        with self.assertRaises(ValidationError):
+            entry.post()
+        self.assertFalse(AccountPeriodBalance.objects.exists())
+
+    def test_batch_posting_keeps_period_balances_in_sync(self):
+        Accounts.objects.create(code='1510', name='Accumulated Depreciation', account_type='ASSET')
+        Accounts.objects.create(code='5300', name='Depreciation Expense', account_type='EXPENSE')
+        Asset.objects.create(name='Laptop', purchase_date=date(2025, 1, 10), purchase_price=Decimal('1200'), useful_life_years=1)
+        self.book()
+        DepreciationEngine.run(date(2025, 3, 31), self.user)
+        self.assertBalancesMatchLines()
+
+
+class ReportTests(LedgerTestCase):
+    WINDOWS = (
+        (None, None),
+        (None, date(2025, 1, 31)),
+        (date(2025, 1, 1), date(2025, 1, 31)),
+        (date(2025, 1, 16), date(2025, 2, 14)),
+        (date(2025, 2, 1), date(2025, 3, 31)),
+        (date(2025, 3, 5), date(2025, 3, 5)),
+    )
+
+    def assertTrialBalanceMatchesScan(self):
+        for date_from, date_to in self.WINDOWS:
+            with self.subTest(date_from=date_from, date_to=date_to):
+                rows = {row['id']: row for row in AccountingService.trial_balance(date_from=date_from, date_to=date_to)}
+                cumulative = self.scanned_totals(date_to=date_to)
+                movement = self.scanned_totals(date_from, date_to, sweeps=False)
+                for account in Accounts.objects.all():
+                    row = rows[account.pk]
+                    zero = (Decimal('0'), Decimal('0'))
+                    self.assertEqual((row['debit'], row['credit']), cumulative.get(account.pk, zero), account.code)
+                    self.assertEqual((row['period_debit'], row['period_credit']), movement.get(account.pk, zero), account.code)
+
+    def test_trial_balance_matches_a_full_scan(self):
+        self.book()
+        self.assertTrialBalanceMatchesScan()
+
+    def test_trial_balance_matches_a_full_scan_across_a_close(self):
+        self.book()
+        AccountingService.close_period(date(2025, 1, 31), self.user)
+        self.assertTrialBalanceMatchesScan()
+
+    def test_statements_agree_with_the_lines(self):
+        self.book()
+        AccountingService.close_period(date(2025, 1, 31), self.user)
+        statements = AccountingService.financial_statements(date_from=date(2025, 2, 1), date_to=date(2025, 3, 31))
+
+        movement = self.scanned_totals(date(2025, 2, 1), date(2025, 3, 31), sweeps=False)
+        income = movement[self.fees.pk][1] - movement[self.fees.pk][0]
+        expense = movement[self.rent.pk][0] - movement[self.rent.pk][1]
+        self.assertEqual(statements['pl']['net_income'], income - expense)
+
+        cumulative = self.scanned_totals(date_to=date(2025, 3, 31))
+        cash = cumulative[self.cash.pk][0] - cumulative[self.cash.pk][1]
+        self.assertIn({'name': 'Cash', 'code': '1000', 'balance': cash}, statements['bs']['data']['ASSET'])
+        self.assertEqual(statements['bs']['check'], 0)
+
+
+class PeriodCloseTests(LedgerTestCase):
+    def setUp(self):
+        self.entry(date(2025, 1, 15), self.receivable, self.fees, '1500')
+        AccountingService.close_period(date(2025, 1, 31), self.user)
+
+    def test_posting_into_a_closed_period_is_rejected(self):
+        before = list(AccountPeriodBalance.objects.order_by('id').values_list('debit', 'credit'))
+        entry = self.entry(date(2025, 1, 31), self.cash, self.fees, '10', post=False)
+        with self.assertRaises(ValidationError):
+            entry.post()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'DRAFT')
+        self.assertEqual(list(AccountPeriodBalance.objects.order_by('id').values_list('debit', 'credit')), before)
+
+    def test_voiding_in_a_closed_period_is_rejected(self):
+        entry = JournalsEntry.objects.get(date=date(2025, 1, 15))
+        with self.assertRaises(ValidationError):
+            entry.void()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'POSTED')
+
+    def test_posting_after_the_close_is_accepted(self):
+        self.entry(date(2025, 2, 1), self.cash, self.fees, '10')
+        self.assertTrue(AccountPeriodBalance.objects.filter(period=date(2025, 2, 1), accounts=self.cash, debit=10).exists())
+
+    def test_close_must_move_forward(self):
+        with self.assertRaises(ValidationError):
+            AccountingService.close_period(date(2024, 12, 31), self.user)
+        with self.assertRaises(ValidationError):
+            AccountingService.close_period(date(2025, 2, 14), self.user)
+
+
+class DocumentSequenceTests(TestCase):
+    def setUp(self):
+        DocumentSequence._blocks.clear()
+        self.addCleanup(DocumentSequence._blocks.clear)
+
+    def test_numbers_are_consecutive_without_duplicates(self):
+        numbers = DocumentSequence.next_numbers('INVOICE', date(2025, 6, 1), count=3)
+        numbers += [DocumentSequence.next_number('INVOICE', date(2025, 6, 1)) for _ in range(5)]
+        self.assertEqual(numbers, [f'INV-2025-{n:04d}' for n in range(1, 9)])
+        # Each fiscal year has its own counter
+        self.assertEqual(DocumentSequence.next_number('INVOICE', date(2026, 1, 1)), 'INV-2026-0001')
+
+    @override_settings(DOCUMENT_SEQUENCE_BLOCKS={'JOURNAL': 4})
+    def test_blocks_stay_monotonic_across_workers(self):
+        taken = []
+        for worker in range(3):
+            # A new worker process starts without a reserved block
+            DocumentSequence._blocks.clear()
+            for count in (1, 2, 1, 3, 1):
+                with self.captureOnCommitCallbacks(execute=True):
+                    first = DocumentSequence.allocate('JOURNAL', 2025, count)
+                numbers = list(range(first, first + count))
+                self.assertGreater(numbers[0], max(taken, default=0))
+                taken += numbers
+        self.assertEqual(len(taken), len(set(taken)))
+
+    @override_settings(DOCUMENT_SEQUENCE_BLOCKS={'JOURNAL': 4})
+    def test_block_is_only_kept_once_the_reservation_commits(self):
+        DocumentSequence.allocate('JOURNAL', 2025)  # callbacks discarded: the transaction "rolled back"
+        self.assertEqual(DocumentSequence._blocks, {})
+        with self.captureOnCommitCallbacks(execute=True):
+            first = DocumentSequence.allocate('JOURNAL', 2025)
+        self.assertEqual(first, 5)
+        self.assertEqual(DocumentSequence.allocate('JOURNAL', 2025), 6)
+
+
+class JournalPaginationTests(LedgerTestCase):
+    def test_walks_every_entry_once_in_both_directions(self):
+        for i in range(23):
+            # Few distinct dates, so most page boundaries fall inside a run of equal dates
+            self.entry(date(2025, 1, 1 + i % 3), self.cash, self.fees, '1', post=False)
+        expected = list(JournalsEntry.objects.order_by('-date', 'id').values_list('id', flat=True))
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        seen, url, last = [], '/api/journalss/?page_size=5', None
+        while url:
+            self.assertLess(len(seen), 100, 'cursor is not advancing')
+            last = client.get(url).json()
+            seen += [row['id'] for row in last['results']]
+            url = last['next']
+        self.assertEqual(seen, expected)
+
+        backwards, url = [], last['previous']
+        while url:
+            self.assertLess(len(backwards), 100, 'cursor is not advancing')
+            page = client.get(url).json()
+            backwards = [row['id'] for row in page['results']] + backwards
+            url = page['previous']
+        self.assertEqual(backwards + [row['id'] for row in last['results']], expected)
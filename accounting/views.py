@@ -1,18 +1,86 @@
-from rest_framework import viewsets, permissions, status
+import codecs
+import csv
+import itertools
+import json
+from decimal import Decimal, InvalidOperation
+from rest_framework import viewsets, permissions, status, serializers, parsers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum
-from .models import Accounts, JournalsEntry, Invoices, Vendor, Bill
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse, FileResponse
+from django.db import transaction
+from django.db.models import Prefetch, F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from core.db import reads_from_replica, replica_stream
+from crm.models import ClientDocument
+from .models import Accounts, AccountPeriodBalance, JournalsEntry, JournalsItem, Invoices, Vendor, Bill, PostingRule, Asset, FxRate, BankStatementLine, BankMatch, ExpenseClaim
 from .serializers import (
-    AccountsSerializer, JournalsEntrySerializer, InvoicesSerializer, 
-    VendorSerializer, BillSerializer
+    AccountsSerializer, JournalsEntrySerializer, JournalsEntryListSerializer, InvoicesSerializer,
+    InvoicesListSerializer, VendorSerializer, BillSerializer, PostingRuleSerializer, AssetSerializer, FxRateSerializer,
+    BankStatementLineSerializer, ExpenseClaimSerializer
 )
-from .services import AccountingService
+from .services import AccountingService, JournalImporter, DepreciationEngine, BankReconciler, ExpenseClaims, ExpenseBilling, OPEN_INVOICE_STATUSES, OPEN_BILL_STATUSES, entry_totals
+
+def report_filters(request):
+    """Reads the common reporting query params (dates + client/engagement scope)."""
+    filters = {}
+    for key in ('date_from', 'date_to', 'as_of'):
+        raw = request.query_params.get(key)
+        if raw:
+            value = parse_date(raw)
+            if value is None:
+                raise ValueError(f"Invalid {key}: expected YYYY-MM-DD")
+            filters[key] = value
+    for key in ('client', 'engagement'):
+        raw = request.query_params.get(key)
+        if raw:
+            if not raw.isdigit():
+                raise ValueError(f"Invalid {key}: expected an id")
+            filters[key] = int(raw)
+    return filters
+
+LEDGER_COLUMNS = ['account', 'account_name', 'date', 'entry', 'reference', 'description', 'debit', 'credit', 'balance']
+
+def aging_response(request, queryset, party, amount_field, number_field):
+    try:
+        as_of = parse_date(request.query_params.get('as_of') or '') or timezone.localdate()
+    except ValueError:
+        return Response({'error': 'Invalid as_of: expected YYYY-MM-DD'}, status=400)
+    party_id = request.query_params.get(party)
+    if party_id is not None and not party_id.isdigit():
+        return Response({'error': f'{party} must be an id'}, status=400)
+    try:
+        return Response(AccountingService.aging(queryset, party, amount_field, number_field, as_of, party_id=party_id))
+    except ValidationError as exc:
+        return Response({'error': exc.messages[0]}, status=400)
+
+class _Echo:
+    """File-like object whose write() just hands the line back, for streaming csv.writer output."""
+    def write(self, value):
+        return value
+
+def stream_rows(rows, export, filename):
+    """Wraps a row generator in a StreamingHttpResponse as CSV or NDJSON."""
+    if export == 'csv':
+        writer = csv.writer(_Echo())
+        lines = itertools.chain(
+            [writer.writerow(LEDGER_COLUMNS)],
+            (writer.writerow([row[col] if row[col] is not None else '' for col in LEDGER_COLUMNS]) for row in rows),
+        )
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+    else:
+        lines = (json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export}"'
+    return response
 
 class AccountsViewSet(viewsets.ModelViewSet):
     queryset = Accounts.objects.all().order_by('code')
     serializer_class = AccountsSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('code',)
 
     @action(detail=False, methods=['post'])
     def seed(self, request):
@@ -21,14 +89,20 @@ class AccountsViewSet(viewsets.ModelViewSet):
             ('1000', 'Cash on Hand', 'ASSET'),
             ('1200', 'Accounts Receivable', 'ASSET'),
             ('1500', 'Equipment & Machinery', 'ASSET'),
+            ('1510', 'Accumulated Depreciation', 'ASSET'),
             ('2000', 'Accounts Payable', 'LIABILITY'),
             ('2100', 'Sales Tax Payable', 'LIABILITY'),
             ('3000', 'Owner Equity', 'EQUITY'),
+            ('3200', 'Retained Earnings', 'EQUITY'),
             ('4000', 'Sales Revenue', 'INCOME'),
             ('4100', 'Consulting Income', 'INCOME'),
+            ('4900', 'Foreign Exchange Gain/Loss', 'INCOME'),
             ('5000', 'Rent Expense', 'EXPENSE'),
             ('5100', 'Salaries & Wages', 'EXPENSE'),
             ('5200', 'Software Subscriptions', 'EXPENSE'),
+            ('5300', 'Depreciation Expense', 'EXPENSE'),
+            ('5400', 'Staff Expenses', 'EXPENSE'),
+            ('5900', 'General & Administrative', 'EXPENSE'),
         ]
         created_count = 0
         for code, name, type_ in defaults:
@@ -40,75 +114,115 @@ class AccountsViewSet(viewsets.ModelViewSet):
         return Response({'message': f'Created {created_count} standard accounts.'})
 
     @action(detail=False, methods=['get'])
+    @reads_from_replica
     def financial_statements(self, request):
-        """Generates P&L and Balance Sheet together"""
-        # --- PROFIT & LOSS ---
-        income = Accounts.objects.filter(account_type='INCOME')
-        expenses = Accounts.objects.filter(account_type='EXPENSE')
-        
-        pl_data = {'INCOME': [], 'EXPENSE': []}
-        pl_totals = {'INCOME': 0, 'EXPENSE': 0}
-
-        def get_balance(qs, type_name):
-            for acc in qs:
-                # Calculate Net Movement (Post-close trial balance style)
-                txs = acc.journalsitem_set.filter(entry__status='POSTED')
-                debits = txs.aggregate(Sum('debit'))['debit__sum'] or 0
-                credits = txs.aggregate(Sum('credit'))['credit__sum'] or 0
-                
-                # Income = Credit normal, Expense = Debit normal
-                balance = (credits - debits) if type_name == 'INCOME' else (debits - credits)
-                
-                if balance != 0:
-                    pl_data[type_name].append({'name': acc.name, 'code': acc.code, 'balance': balance})
-                    pl_totals[type_name] += balance
-        
-        get_balance(income, 'INCOME')
-        get_balance(expenses, 'EXPENSE')
+        """
+        Generates P&L and Balance Sheet together.
+        Optional filters: ?date_from=&date_to=&as_of=&client=&engagement=
+        plus ?currency= to translate into a presentation currency.
+        """
+        try:
+            filters = report_filters(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+        currency = (request.query_params.get('currency') or '').upper() or None
+        try:
+            return Response(AccountingService.financial_statements(currency=currency, **filters))
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
 
-        net_income = pl_totals['INCOME'] - pl_totals['EXPENSE']
+    @action(detail=False, methods=['get'])
+    @reads_from_replica
+    def tree(self, request):
+        """
+        Nested chart of accounts with own and rolled-up balances.
+        Optional ?root=<id> plus the financial_statements filters.
+        """
+        try:
+            filters = report_filters(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+        root = request.query_params.get('root')
+        if root is not None and not root.isdigit():
+            return Response({'error': 'root must be an account id'}, status=400)
+        return Response(AccountingService.account_tree(root=root, **filters))
 
-        # --- BALANCE SHEET ---
-        bs_data = {'ASSET': [], 'LIABILITY': [], 'EQUITY': []}
-        bs_totals = {'ASSET': 0, 'LIABILITY': 0, 'EQUITY': 0}
-        
-        bs_accounts = Accounts.objects.filter(account_type__in=['ASSET', 'LIABILITY', 'EQUITY'])
-
-        for acc in bs_accounts:
-            txs = acc.journalsitem_set.filter(entry__status='POSTED')
-            debits = txs.aggregate(Sum('debit'))['debit__sum'] or 0
-            credits = txs.aggregate(Sum('credit'))['credit__sum'] or 0
-            
-            if acc.account_type == 'ASSET':
-                balance = debits - credits
-            else:
-                balance = credits - debits
-            
-            if balance != 0:
-                bs_data[acc.account_type].append({'name': acc.name, 'code': acc.code, 'balance': balance})
-                bs_totals[acc.account_type] += balance
-
-        # Add Net Income to Equity for the report (Retained Earnings simulation)
-        bs_totals['EQUITY'] += net_income
-        bs_data['EQUITY'].append({'name': 'Net Income (Current Period)', 'code': '9999', 'balance': net_income})
+    def _ledger_export(self, request, accounts, filename):
+        export = request.query_params.get('export', 'csv')
+        if export not in ('csv', 'ndjson'):
+            return Response({'error': 'export must be csv or ndjson'}, status=400)
+        try:
+            filters = report_filters(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+        rows = AccountingService.ledger_rows(
+            accounts=accounts, date_from=filters.get('date_from'), date_to=filters.get('date_to'),
+        )
+        return stream_rows(replica_stream(rows, request.user), export, filename)
+
+    @action(detail=True, methods=['get'])
+    def ledger(self, request, pk=None):
+        """Streams one account's GL detail with a running balance. ?export=csv|ndjson&date_from=&date_to="""
+        account = self.get_object()
+        return self._ledger_export(request, [account.pk], f"ledger-{account.code}")
+
+    @action(detail=False, methods=['get'])
+    def ledger_export(self, request):
+        """Streams the firm-wide general ledger detail. ?export=csv|ndjson&date_from=&date_to="""
+        return self._ledger_export(request, None, "general-ledger")
 
+    @action(detail=False, methods=['post'])
+    def close_period(self, request):
+        """Closes the books through a month end (locks it, posts the closing entry, freezes balances)"""
+        try:
+            period_end = parse_date(str(request.data.get('period_end') or ''))
+        except ValueError:
+            period_end = None
+        if period_end is None:
+            return Response({'error': 'period_end (YYYY-MM-DD) is required'}, status=400)
+        try:
+            close = AccountingService.close_period(period_end, request.user)
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
+        return Response({
+            'message': f'Books closed through {close.period_end}.',
+            'closing_entry': close.closing_entry_id,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def revalue(self, request):
+        """Month-end FX revaluation of open foreign-currency invoices and bills"""
+        try:
+            period_end = parse_date(str(request.data.get('period_end') or ''))
+        except ValueError:
+            period_end = None
+        if period_end is None:
+            return Response({'error': 'period_end (YYYY-MM-DD) is required'}, status=400)
+        try:
+            entry, revalued, rejected = AccountingService.revalue_open_items(period_end, request.user)
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
         return Response({
-            'pl': {
-                'data': pl_data,
-                'totals': pl_totals,
-                'net_income': net_income
-            },
-            'bs': {
-                'data': bs_data,
-                'totals': bs_totals,
-                'check': bs_totals['ASSET'] - (bs_totals['LIABILITY'] + bs_totals['EQUITY'])
-            }
-        })
+            'journal_entry': entry.pk if entry else None,
+            'revalued': revalued,
+            'rejected': rejected,
+        }, status=status.HTTP_201_CREATED if entry else status.HTTP_200_OK)
 
 class InvoicesViewSet(viewsets.ModelViewSet):
-    queryset = Invoices.objects.all().order_by('-id') 
+    queryset = Invoices.objects.select_related('client').order_by('-id')
     serializer_class = InvoicesSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-id',)
+
+    def get_queryset(self):
+        if self.action == 'list':
+            return self.queryset
+        return self.queryset.prefetch_related('lines')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return InvoicesListSerializer
+        return InvoicesSerializer
 
     @action(detail=True, methods=['post'])
     def finalize_and_send(self, request, pk=None):
@@ -117,25 +231,481 @@ class InvoicesViewSet(viewsets.ModelViewSet):
         if invoices.status != 'DRAFT':
             return Response({'error': 'Only draft invoices can be finalized'}, status=400)
         
-        invoices.status = 'SENT'
-        invoices.save()
-        
-        # Post to GL automatically
-        AccountingService.post_invoices_to_gl(invoices, request.user)
+        try:
+            with transaction.atomic():
+                invoices.status = 'SENT'
+                invoices.save()
+
+                # Post to GL automatically
+                AccountingService.post_invoices_to_gl(invoices, request.user)
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
         
         return Response({'status': 'Invoice Finalized and Posted to GL'})
 
+    @action(detail=False, methods=['post'])
+    def post_batch(self, request):
+        """
+        Month-end billing: posts sent invoices to the GL in one transaction.
+        Body: {"ids": [...]} (optional, defaults to every sent, unposted invoice).
+        """
+        queryset = Invoices.objects.all()
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(str(pk).isdigit() for pk in ids):
+                return Response({'error': 'ids must be a list of invoice ids'}, status=400)
+            queryset = queryset.filter(pk__in=ids)
+        entries, rejected = AccountingService.post_invoices_batch(queryset, request.user)
+        return Response({'posted': len(entries), 'rejected': rejected})
+
+    @action(detail=False, methods=['post'])
+    def bill_expenses(self, request):
+        """
+        Billing run: turns unbilled billable expense claims into draft invoices,
+        one per client and engagement. Body (all optional): as_of, issue_date,
+        due_date (YYYY-MM-DD), client.
+        """
+        dates = {}
+        for key in ('as_of', 'issue_date', 'due_date'):
+            raw = request.data.get(key)
+            if raw:
+                try:
+                    dates[key] = parse_date(str(raw))
+                except ValueError:
+                    dates[key] = None
+                if dates[key] is None:
+                    return Response({'error': f'{key} must be YYYY-MM-DD'}, status=400)
+        client = request.data.get('client')
+        if client is not None and not str(client).isdigit():
+            return Response({'error': 'client must be a client id'}, status=400)
+        try:
+            invoices = ExpenseBilling.run(request.user, client=client, **dates)
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
+        return Response({
+            'invoices': [invoice.pk for invoice in invoices],
+            'total': sum(invoice.total for invoice in invoices),
+        }, status=status.HTTP_201_CREATED if invoices else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    @reads_from_replica
+    def aging(self, request):
+        """AR aging per client. ?as_of=YYYY-MM-DD (default today), ?client=<id> to drill down"""
+        return aging_response(
+            request, Invoices.objects.filter(status__in=OPEN_INVOICE_STATUSES), 'client', 'total', 'invoices_number',
+        )
+
 class JournalsViewSet(viewsets.ModelViewSet):
     queryset = JournalsEntry.objects.all().order_by('-date')
     serializer_class = JournalsEntrySerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-date', 'id')
+
+    def get_queryset(self):
+        # Lists total in SQL; detail views prefetch items (and their accounts) in one query
+        if self.action == 'list':
+            return self.queryset.annotate(**entry_totals())
+        return self.queryset.prefetch_related(
+            Prefetch('items', queryset=JournalsItem.objects.select_related('accounts').order_by('id'))
+        )
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return JournalsEntryListSerializer
+        return JournalsEntrySerializer
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=False, methods=['post'], parser_classes=[parsers.MultiPartParser, parsers.FormParser])
+    def bulk_import(self, request):
+        """
+        Streams a CSV / NDJSON file of journal entries into the ledger.
+        Form fields: file, format (optional, else from extension), post=true to post on import.
+        """
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'No file provided'}, status=400)
+        try:
+            fmt = JournalImporter.detect_format(upload.name, request.data.get('format'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        importer = JournalImporter(
+            request.user,
+            post=str(request.data.get('post', '')).lower() in ('1', 'true', 'yes'),
+        )
+        summary = importer.run(codecs.iterdecode(upload, 'utf-8-sig'), fmt)
+        return Response(summary, status=status.HTTP_201_CREATED if summary['created'] else 400)
+
+    @action(detail=False, methods=['post'])
+    def post_batch(self, request):
+        """
+        Posts many draft entries at once.
+        Body: {"ids": [...]} or {"date_from": ..., "date_to": ...} for every draft in a range.
+        """
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(str(pk).isdigit() for pk in ids):
+                return Response({'error': 'ids must be a list of entry ids'}, status=400)
+            queryset = JournalsEntry.objects.filter(pk__in=ids)
+        else:
+            try:
+                date_from = parse_date(str(request.data.get('date_from') or ''))
+                date_to = parse_date(str(request.data.get('date_to') or ''))
+            except ValueError:
+                date_from = date_to = None
+            if not date_from or not date_to:
+                return Response({'error': 'Provide ids or a date_from/date_to range'}, status=400)
+            queryset = JournalsEntry.objects.filter(date__gte=date_from, date__lte=date_to)
+
+        # Explicitly requested entries that are not drafts are reported as rejected too
+        not_drafts = []
+        if ids is not None:
+            not_drafts = [
+                {'id': pk, 'error': f'Only draft entries can be posted (status: {entry_status}).'}
+                for pk, entry_status in queryset.exclude(status='DRAFT').values_list('pk', 'status')
+            ]
+
+        posted, rejected = AccountingService.post_batch(queryset, request.user)
+        return Response({'posted': posted, 'rejected': not_drafts + rejected})
+
+    @action(detail=True, methods=['post'])
+    def void(self, request, pk=None):
+        """Cancels an entry and reverses it out of the period balances"""
+        entry = self.get_object()
+        try:
+            entry.void()
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
+        return Response({'status': 'Entry voided'})
+
+    def perform_destroy(self, instance):
+        # Deleting a posted entry must not leave stale period balances behind
+        try:
+            with transaction.atomic():
+                if instance.status == 'POSTED':
+                    AccountPeriodBalance.apply_entry(instance, sign=-1)
+                instance.delete()
+        except ValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+
+class PostingRuleViewSet(viewsets.ModelViewSet):
+    queryset = PostingRule.objects.select_related('client').order_by('id')
+    serializer_class = PostingRuleSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    ordering = ('id',)
+
+class FxRateViewSet(viewsets.ModelViewSet):
+    queryset = FxRate.objects.all()
+    serializer_class = FxRateSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-date', 'id')
+
+    def get_queryset(self):
+        queryset = self.queryset
+        currency = self.request.query_params.get('currency')
+        if currency:
+            queryset = queryset.filter(currency=currency.upper())
+        return queryset
 
 class VendorViewSet(viewsets.ModelViewSet):
     queryset = Vendor.objects.all()
     serializer_class = VendorSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-id',)
 
 class BillViewSet(viewsets.ModelViewSet):
     queryset = Bill.objects.all().order_by('-due_date')
     serializer_class = BillSerializer
-    permission_classes = [permissions.IsAuthenticated]
\ No newline at end of file
+    permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-due_date', 'id')
+
+    @action(detail=True, methods=['post'])
+    def approve(self, request, pk=None):
+        """Approves the bill and posts it to Accounts Payable"""
+        entries, rejected = AccountingService.post_bills_batch(Bill.objects.filter(pk=self.get_object().pk), request.user)
+        if rejected:
+            return Response({'error': rejected[0]['error']}, status=400)
+        if not entries:
+            return Response({'error': 'Only draft bills can be approved'}, status=400)
+        return Response(self.get_serializer(Bill.objects.get(pk=pk)).data)
+
+    @action(detail=False, methods=['post'])
+    def approve_batch(self, request):
+        """
+        Approves and posts draft bills in one transaction.
+        Body: {"ids": [...]} (optional, defaults to every draft bill).
+        """
+        queryset = Bill.objects.all()
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(str(pk).isdigit() for pk in ids):
+                return Response({'error': 'ids must be a list of bill ids'}, status=400)
+            queryset = queryset.filter(pk__in=ids)
+        entries, rejected = AccountingService.post_bills_batch(queryset, request.user)
+        return Response({'posted': len(entries), 'rejected': rejected})
+
+    @action(detail=False, methods=['post'])
+    def payment_run(self, request):
+        """
+        Pays every approved bill due by `due_by` with one payment entry per vendor.
+        Body: due_by (required), payment_date (default today), cash_account (default 1000), vendor.
+        """
+        dates = {}
+        for key in ('due_by', 'payment_date'):
+            try:
+                dates[key] = parse_date(str(request.data.get(key) or ''))
+            except ValueError:
+                dates[key] = None
+        if dates['due_by'] is None:
+            return Response({'error': 'due_by (YYYY-MM-DD) is required'}, status=400)
+        if request.data.get('payment_date') and dates['payment_date'] is None:
+            return Response({'error': 'payment_date must be YYYY-MM-DD'}, status=400)
+        cash_account = None
+        raw = request.data.get('cash_account')
+        if raw:
+            if str(raw).isdigit():
+                cash_account = Accounts.objects.filter(pk=raw, account_type='ASSET').first()
+            if cash_account is None:
+                return Response({'error': 'cash_account must be an asset account id'}, status=400)
+        vendor = request.data.get('vendor')
+        if vendor is not None and not str(vendor).isdigit():
+            return Response({'error': 'vendor must be a vendor id'}, status=400)
+        try:
+            entries, paid, rejected = AccountingService.pay_bills(
+                dates['due_by'], request.user, payment_date=dates['payment_date'], cash_account=cash_account, vendor=vendor,
+            )
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
+        return Response({
+            'payments': [entry.pk for entry in entries],
+            'paid': paid,
+            'rejected': rejected,
+        }, status=status.HTTP_201_CREATED if entries else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    @reads_from_replica
+    def aging(self, request):
+        """AP aging per vendor. ?as_of=YYYY-MM-DD (default today), ?vendor=<id> to drill down"""
+        return aging_response(
+            request, Bill.objects.filter(status__in=OPEN_BILL_STATUSES), 'vendor', 'total_amount', 'bill_number',
+        )
+
+class AssetViewSet(viewsets.ModelViewSet):
+    queryset = Asset.objects.all().order_by('-id')
+    serializer_class = AssetSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-id',)
+
+    @action(detail=True, methods=['get'])
+    def schedule(self, request, pk=None):
+        """Projected monthly depreciation over the asset's whole useful life"""
+        return Response(DepreciationEngine.schedule(self.get_object()))
+
+    @action(detail=False, methods=['post'])
+    def depreciate(self, request):
+        """Month-end run: depreciates every asset through period_end in one journal entry"""
+        try:
+            period_end = parse_date(str(request.data.get('period_end') or ''))
+        except ValueError:
+            period_end = None
+        if period_end is None:
+            return Response({'error': 'period_end (YYYY-MM-DD) is required'}, status=400)
+        try:
+            entry, depreciated, rejected = DepreciationEngine.run(period_end, request.user)
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
+        return Response({
+            'journal_entry': entry.pk if entry else None,
+            'depreciated': depreciated,
+            'rejected': rejected,
+        }, status=status.HTTP_201_CREATED if entry else status.HTTP_200_OK)
+
+
+class BankStatementLineViewSet(viewsets.ModelViewSet):
+    """Imported bank statement lines; ?account=<id> (default cash 1000) and ?status=matched|unmatched"""
+    serializer_class = BankStatementLineSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-date', 'id')
+
+    def _account(self, source):
+        account_id = source.get('account')
+        if account_id:
+            if not str(account_id).isdigit():
+                raise serializers.ValidationError({'account': 'must be an account id'})
+            account = Accounts.objects.filter(pk=account_id).first()
+        else:
+            account = BankReconciler.default_account()
+        if account is None:
+            raise serializers.ValidationError({'account': 'Cash account not found'})
+        return account
+
+    def get_queryset(self):
+        queryset = BankStatementLine.objects.select_related('match__matched_by')
+        if self.action == 'list':
+            queryset = queryset.filter(account=self._account(self.request.query_params))
+            state = self.request.query_params.get('status')
+            if state == 'matched':
+                queryset = queryset.filter(match__isnull=False)
+            elif state == 'unmatched':
+                queryset = queryset.filter(match__isnull=True)
+        return queryset
+
+    @action(detail=False, methods=['post'], parser_classes=[parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser])
+    def import_statement(self, request):
+        """
+        Streams a statement CSV in: either an uploaded `file` or a BANK_STATEMENT
+        `document` id from the vault. Columns: date, amount (or deposit/withdrawal),
+        description, reference. Optional `account` (default cash 1000).
+        """
+        account = self._account(request.data)
+        document = None
+        upload = request.FILES.get('file')
+        if not upload and request.data.get('document'):
+            document = ClientDocument.objects.filter(pk=request.data['document'], category='BANK_STATEMENT').first()
+            if document is None:
+                return Response({'error': 'Bank statement document not found'}, status=400)
+            upload = document.file
+        if not upload:
+            return Response({'error': 'Provide a file or a bank statement document'}, status=400)
+
+        upload.open('rb')
+        try:
+            summary = BankReconciler(account).import_csv(codecs.iterdecode(upload, 'utf-8-sig'), document=document)
+        finally:
+            upload.close()
+        return Response(summary, status=status.HTTP_201_CREATED if summary['imported'] else 400)
+
+    @action(detail=False, methods=['post'])
+    def auto_match(self, request):
+        """Matches open lines to open ledger items. Body: account, date_tolerance (days), amount_tolerance, document"""
+        account = self._account(request.data)
+        try:
+            date_tolerance = int(request.data.get('date_tolerance', 3))
+            amount_tolerance = Decimal(str(request.data.get('amount_tolerance', '0')))
+        except (ValueError, InvalidOperation):
+            return Response({'error': 'date_tolerance must be an integer and amount_tolerance a number'}, status=400)
+        if date_tolerance < 0 or amount_tolerance < 0:
+            return Response({'error': 'Tolerances cannot be negative'}, status=400)
+        lines = BankStatementLine.objects.filter(account=account)
+        if request.data.get('document'):
+            lines = lines.filter(document_id=request.data['document'])
+        return Response(BankReconciler(account).auto_match(
+            request.user, date_tolerance=date_tolerance, amount_tolerance=amount_tolerance, lines=lines,
+        ))
+
+    @action(detail=False, methods=['get'])
+    def open_items(self, request):
+        """Posted ledger lines of the account still waiting for a statement line (for manual matching)"""
+        account = self._account(request.query_params)
+        items = (
+            JournalsItem.objects.filter(accounts=account, entry__status='POSTED', bank_match__isnull=True)
+            .annotate(date=F('entry__date'), reference=F('entry__reference'), entry_description=F('entry__description'))
+            .values('id', 'entry', 'date', 'reference', 'entry_description', 'description', 'debit', 'credit')
+        )
+        return self.get_paginated_response(self.paginate_queryset(items))
+
+    @action(detail=True, methods=['post'])
+    def match(self, request, pk=None):
+        """Manually reconciles this line. Body: {"item": <journal item id>}"""
+        item_id = request.data.get('item')
+        if not str(item_id or '').isdigit():
+            return Response({'error': 'item must be a journal item id'}, status=400)
+        try:
+            line = BankReconciler.match(self.get_object(), item_id, request.user)
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
+        return Response(self.get_serializer(line).data)
+
+    @action(detail=True, methods=['post'])
+    def unmatch(self, request, pk=None):
+        line = self.get_object()
+        BankMatch.objects.filter(line=line).delete()
+        line = self.get_object()
+        return Response(self.get_serializer(line).data)
+
+
+class ExpenseClaimViewSet(viewsets.ModelViewSet):
+    """Employee expense claims; ?status=, ?employee=<id>, ?mine=true, ?unbilled=true"""
+    serializer_class = ExpenseClaimSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser]
+    ordering = ('-date', 'id')
+
+    def get_queryset(self):
+        queryset = ExpenseClaim.objects.select_related('employee', 'approved_by', 'client')
+        params = self.request.query_params
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'].upper())
+        if params.get('mine', '').lower() in ('1', 'true', 'yes'):
+            queryset = queryset.filter(employee=self.request.user)
+        elif params.get('employee'):
+            queryset = queryset.filter(employee_id=params['employee'])
+        if params.get('unbilled', '').lower() in ('1', 'true', 'yes'):
+            queryset = queryset.filter(is_billable=True, invoice__isnull=True)
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(employee=self.request.user)
+
+    def destroy(self, request, *args, **kwargs):
+        if self.get_object().status == 'REIMBURSED':
+            return Response({'error': 'Reimbursed claims cannot be deleted'}, status=400)
+        return super().destroy(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post'])
+    def review(self, request):
+        """Bulk approve/reject of submitted claims. Body: {"ids": [...], "decision": "approve"|"reject"}"""
+        ids = request.data.get('ids')
+        decision = request.data.get('decision')
+        if not isinstance(ids, list) or not ids or not all(str(pk).isdigit() for pk in ids):
+            return Response({'error': 'ids must be a non-empty list of claim ids'}, status=400)
+        if decision not in ('approve', 'reject'):
+            return Response({'error': 'decision must be "approve" or "reject"'}, status=400)
+        return Response(ExpenseClaims.review([int(pk) for pk in ids], decision == 'approve', request.user))
+
+    @action(detail=False, methods=['post'])
+    def reimburse(self, request):
+        """Pays out approved claims of a pay period in one journal entry. Body: period_start, period_end, pay_from=cash|payable"""
+        try:
+            period_start = parse_date(str(request.data.get('period_start') or ''))
+            period_end = parse_date(str(request.data.get('period_end') or ''))
+        except ValueError:
+            period_start = period_end = None
+        if period_start is None or period_end is None:
+            return Response({'error': 'period_start and period_end (YYYY-MM-DD) are required'}, status=400)
+        try:
+            entry, reimbursed = ExpenseClaims.reimburse(
+                period_start, period_end, request.user, pay_from=request.data.get('pay_from', 'cash'),
+            )
+        except ValidationError as exc:
+            return Response({'error': exc.messages[0]}, status=400)
+        return Response({
+            'journal_entry': entry.pk if entry else None,
+            'reimbursed': reimbursed,
+        }, status=status.HTTP_201_CREATED if entry else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def receipts(self, request):
+        """Receipt index (name, size, type, url) from the stored metadata; no file is opened"""
+        rows = self.paginate_queryset(
+            self.get_queryset().exclude(receipt='').exclude(receipt__isnull=True)
+            .annotate(employee_name=F('employee__username'))
+            .values('id', 'date', 'amount', 'status', 'employee_name', 'receipt', 'receipt_size', 'receipt_content_type')
+        )
+        storage = ExpenseClaim._meta.get_field('receipt').storage
+        for row in rows:
+            row['receipt_url'] = request.build_absolute_uri(storage.url(row['receipt']))
+        return self.get_paginated_response(rows)
+
+    @action(detail=True, methods=['get'])
+    def receipt(self, request, pk=None):
+        """Streams the receipt file itself"""
+        claim = self.get_object()
+        if not claim.receipt:
+            return Response({'error': 'This claim has no receipt'}, status=404)
+        return FileResponse(
+            claim.receipt.open('rb'), filename=claim.receipt.name.rsplit('/', 1)[-1],
+            content_type=claim.receipt_content_type or None,
+        )
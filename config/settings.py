@@ -45,6 +45,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,6 +87,17 @@ DATABASES = {
     )
 }
 
+# Optional read replica for reporting reads (see core/db.py). Locally, a second
+# SQLite file works: REPLICA_DATABASE_URL=sqlite:///replica.sqlite3
+if os.environ.get('REPLICA_DATABASE_URL'):
+    DATABASES['replica'] = dj_database_url.parse(os.environ['REPLICA_DATABASE_URL'], conn_max_age=600)
+    # The test runner points the replica at the test primary instead of creating a second database
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+# After a write, the user's reads stay on the primary this long (replication lag budget)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -143,7 +155,10 @@ AUTH_USER_MODEL = 'core.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    # Every list route is cursor-paginated on the view's `ordering`
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -158,4 +173,15 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CORS_ALLOW_CREDENTIALS = True
-CORS_ALLOW_ALL_ORIGINS = False
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = False
+# Currency the ledger is kept in; foreign amounts are converted with FxRate
+FUNCTIONAL_CURRENCY = 'USD'
+
+# Document types whose numbers are reserved in blocks per worker process
+# (faster under load, gaps possible). Invoices and bills stay gap-free.
+DOCUMENT_SEQUENCE_BLOCKS = {
+    'JOURNAL': 100,
+}
+# Second connection to the primary, used to reserve those blocks in their own
+# short transaction instead of holding the counter lock until the caller commits
+DATABASES['sequences'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
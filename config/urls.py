@@ -6,7 +6,7 @@ from rest_framework_simplejwt.views import (
 )
 from rest_framework.routers import DefaultRouter
 from core.views import StaffManageViewSet, get_current_user
-from accounting.views import AccountsViewSet, InvoicesViewSet, JournalsViewSet, VendorViewSet, BillViewSet
+from accounting.views import AccountsViewSet, InvoicesViewSet, JournalsViewSet, VendorViewSet, BillViewSet, PostingRuleViewSet, AssetViewSet, FxRateViewSet, BankStatementLineViewSet, ExpenseClaimViewSet
 from crm.views import ClientViewSet, ClientContactViewSet, EngagementViewSet, EngagementTaskViewSet, ClientDocumentViewSet, ClientNoteViewSet
 from portal.views import PortalViewSet
 from django.conf import settings
@@ -20,6 +20,11 @@ router.register(r'invoices', InvoicesViewSet, basename='invoices')
 router.register(r'journalss', JournalsViewSet, basename='journalss')
 router.register(r'vendors', VendorViewSet, basename='vendors')
 router.register(r'bills', BillViewSet, basename='bills')
+router.register(r'posting-rules', PostingRuleViewSet, basename='posting-rules')
+router.register(r'assets', AssetViewSet, basename='assets')
+router.register(r'fx-rates', FxRateViewSet, basename='fx-rates')
+router.register(r'bank-lines', BankStatementLineViewSet, basename='bank-lines')
+router.register(r'expense-claims', ExpenseClaimViewSet, basename='expense-claims')
 router.register(r'clients', ClientViewSet, basename='client')
 router.register(r'client-contacts', ClientContactViewSet, basename='client-contacts')
 router.register(r'engagements', EngagementViewSet, basename='engagements')
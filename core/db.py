@@ -0,0 +1,114 @@
+"""
+Read-replica routing.
+
+Writes always go to `default`. Reads go to the `replica` alias only where a
+view opts in (@reads_from_replica on an action, replica_stream() around a
+streamed report, or .using(reporting_db(user)) on a queryset), and never once
+the current request has written or while the same user is inside the
+read-your-writes window after a write (settings.REPLICA_PIN_SECONDS), so
+nobody sees data older than their own last change. Without a `replica`
+database configured everything stays on `default`.
+"""
+import contextvars
+import functools
+from django.conf import settings
+from django.core.cache import cache
+
+REPLICA = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Reads of the current block may use the replica
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+# The current request has written: read from the primary from now on
+_wrote = contextvars.ContextVar('replica_wrote', default=False)
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+def pin_to_primary(user):
+    """Keeps the user's reads on the primary for the read-your-writes window."""
+    if user is not None and user.is_authenticated:
+        cache.set(_pin_key(user.pk), True, timeout=settings.REPLICA_PIN_SECONDS)
+
+def reporting_db(user=None):
+    """Alias reporting reads for this user should use right now."""
+    if REPLICA not in settings.DATABASES or _wrote.get():
+        return 'default'
+    if user is not None and user.is_authenticated and cache.get(_pin_key(user.pk)):
+        return 'default'
+    return REPLICA
+
+def reads_from_replica(view_method):
+    """Routes the reads of a read-only view action to the replica."""
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        token = _replica_reads.set(reporting_db(request.user) == REPLICA)
+        try:
+            return view_method(self, request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+def replica_stream(rows, user=None):
+    """
+    Consumes a lazy row generator with its queries routed to the replica.
+    Streamed responses are iterated after the view has returned, so the
+    routing is applied around every step instead of around the view.
+    """
+    # Decided now, while the request is still in scope
+    use_replica = reporting_db(user) == REPLICA
+
+    def routed(rows):
+        while True:
+            token = _replica_reads.set(use_replica)
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            finally:
+                _replica_reads.reset(token)
+            yield row
+    return routed(iter(rows))
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and not _wrote.get():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Anything after a write in the same request must see it
+        _wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Scopes the written-in-this-request flag to the request and, after a
+    request that changed data, pins its user to the primary for
+    REPLICA_PIN_SECONDS. The pin lives in the cache, so it has to be a
+    shared one (Redis/Memcached) when several workers serve the API.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            _wrote.reset(token)
+        # DRF authenticates inside the view and copies the user back onto the request
+        if wrote or request.method not in SAFE_METHODS:
+            pin_to_primary(getattr(request, 'user', None))
+        return response
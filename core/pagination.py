@@ -0,0 +1,108 @@
+import json
+from collections import OrderedDict
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination for every list route.
+    The cursor holds the values of every column in the view's `ordering`
+    (non-null columns ending in a unique tie-breaker, e.g. ('-date', 'id')),
+    and the next page is the rows after that tuple, so page N costs the same
+    as page 1 however many rows share a date. ?page_size= is capped at
+    max_page_size and ?count=true adds the total row count, which is an extra
+    COUNT(*) so it is opt-in.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None)
+        if ordering:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def _get_position_from_instance(self, instance, ordering):
+        fields = [order.lstrip('-') for order in ordering]
+        if isinstance(instance, dict):
+            return json.dumps([str(instance[field]) for field in fields])
+        return json.dumps([str(getattr(instance, field)) for field in fields])
+
+    def _after(self, ordering, position):
+        """Rows strictly after `position` in `ordering`: (a, b) > (x, y) spelled out for the ORM."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        after, equal = Q(), {}
+        for order, value in zip(ordering, values):
+            field = order.lstrip('-')
+            after |= Q(**equal, **{f"{field}__{'lt' if order.startswith('-') else 'gt'}": value})
+            equal[field] = value
+        return after
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.count = queryset.count()
+
+        # CursorPagination.paginate_queryset, filtering on the whole ordering
+        # tuple instead of its first column plus an offset into the ties
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self._after(ordering, current_position))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def encode_cursor(self, cursor):
+        # Only the first page pays for the count; next/previous links drop it
+        return remove_query_param(super().encode_cursor(cursor), self.count_query_param)
+
+    def get_paginated_response(self, data):
+        body = OrderedDict([('next', self.get_next_link()), ('previous', self.get_previous_link())])
+        if self.count is not None:
+            body['count'] = self.count
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return response_schema
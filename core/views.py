@@ -15,6 +15,7 @@ class IsPartnerOrAdmin(permissions.BasePermission):
 # Combine into ONE class
 class StaffManageViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
+    ordering = ('last_name', 'id')
     
     def get_permissions(self):
         # Allow anyone authenticated to see their own profile ('me')
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0011_clientdocument_category_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clientdocument',
+            index=models.Index(fields=['client', '-uploaded_at', 'id'], name='document_client_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clientdocument',
+            index=models.Index(fields=['engagement', '-uploaded_at', 'id'], name='document_engagement_recent_idx'),
+        ),
+    ]
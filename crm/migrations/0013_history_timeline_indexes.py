@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+# The historical models are generated by simple_history and have no Meta of
+# their own to declare indexes on, so these exist in the database only; the
+# engagement timeline reads each table by (engagement, history_date, history_id).
+TIMELINE_INDEXES = [
+    ('historicalengagement', models.Index(fields=['id', '-history_date', '-history_id'], name='hist_engagement_timeline_idx')),
+    ('historicalengagementtask', models.Index(fields=['engagement', '-history_date', '-history_id'], name='hist_task_timeline_idx')),
+    ('historicalclientdocument', models.Index(fields=['engagement', '-history_date', '-history_id'], name='hist_document_timeline_idx')),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0012_clientdocument_recent_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AddIndex(model_name=model_name, index=index)
+                for model_name, index in TIMELINE_INDEXES
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0013_history_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clientnote',
+            index=models.Index(fields=['client', 'created_at'], name='note_client_created_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations
+
+
+# Search indexes for crm/search.py. Neither kind can be declared on the model:
+# Postgres gets GIN trigram indexes (maintained by Postgres itself), SQLite an
+# external-content FTS5 table that triggers keep in step with crm_client.
+POSTGRES_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS client_name_trgm_idx ON crm_client USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS client_tax_id_trgm_idx ON crm_client USING gin (tax_id_number gin_trgm_ops)",
+]
+POSTGRES_REVERSE_SQL = [
+    "DROP INDEX IF EXISTS client_name_trgm_idx",
+    "DROP INDEX IF EXISTS client_tax_id_trgm_idx",
+]
+
+SQLITE_SQL = [
+    """CREATE VIRTUAL TABLE crm_client_search USING fts5(
+        name, tax_id_number, content='crm_client', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER crm_client_search_ai AFTER INSERT ON crm_client BEGIN
+        INSERT INTO crm_client_search(rowid, name, tax_id_number) VALUES (new.id, new.name, new.tax_id_number);
+    END""",
+    """CREATE TRIGGER crm_client_search_ad AFTER DELETE ON crm_client BEGIN
+        INSERT INTO crm_client_search(crm_client_search, rowid, name, tax_id_number)
+        VALUES ('delete', old.id, old.name, old.tax_id_number);
+    END""",
+    """CREATE TRIGGER crm_client_search_au AFTER UPDATE OF name, tax_id_number ON crm_client BEGIN
+        INSERT INTO crm_client_search(crm_client_search, rowid, name, tax_id_number)
+        VALUES ('delete', old.id, old.name, old.tax_id_number);
+        INSERT INTO crm_client_search(rowid, name, tax_id_number) VALUES (new.id, new.name, new.tax_id_number);
+    END""",
+    "INSERT INTO crm_client_search(crm_client_search) VALUES ('rebuild')",
+]
+SQLITE_REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS crm_client_search_ai",
+    "DROP TRIGGER IF EXISTS crm_client_search_ad",
+    "DROP TRIGGER IF EXISTS crm_client_search_au",
+    "DROP TABLE IF EXISTS crm_client_search",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0014_client_note_thread_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_SQL, 'sqlite': SQLITE_SQL}),
+            _run({'postgresql': POSTGRES_REVERSE_SQL, 'sqlite': SQLITE_REVERSE_SQL}),
+        ),
+    ]
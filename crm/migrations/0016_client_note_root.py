@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def set_roots(apps, schema_editor):
+    ClientNote = apps.get_model('crm', 'ClientNote')
+    parents = dict(ClientNote.objects.filter(parent__isnull=False).values_list('id', 'parent_id'))
+    roots = {}
+    for note_id in parents:
+        top = note_id
+        while top in parents:
+            top = parents[top]
+        roots[note_id] = top
+    ClientNote.objects.bulk_update(
+        [ClientNote(pk=note_id, root_id=root_id) for note_id, root_id in roots.items()], ['root'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0015_client_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientnote',
+            name='root',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_notes', to='crm.clientnote'),
+        ),
+        migrations.RunPython(set_roots, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.utils import timezone
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
 from simple_history.models import HistoricalRecords
+from simple_history.utils import bulk_update_with_history
 
 class Client(models.Model):
     ENTITY_CHOICES = [
@@ -63,13 +64,46 @@ class ClientNote(models.Model):
     client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='notes')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    # Top note of the thread (null on the top note itself), set on save
+    root = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='thread_notes', editable=False)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     is_resolved = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [models.Index(fields=['client', 'created_at'], name='note_client_created_idx')]
+
     def __str__(self):
         return f"Note by {self.author} on {self.created_at}"
 
+    def save(self, *args, **kwargs):
+        if self.parent_id:
+            self.root_id = self.parent.root_id or self.parent_id
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def attach_threads(cls, notes):
+        """
+        Sets `thread` on every note (and on each reply below it) to its direct
+        replies, oldest first. Every reply carries its thread's root, so the
+        replies under the given notes are one query however deep the threads
+        go, and only the threads being shown are read.
+        """
+        notes = list(notes)
+        children = {}
+        replies = (
+            cls.objects.filter(root_id__in={note.root_id or note.pk for note in notes})
+            .select_related('author').order_by('created_at', 'id')
+        )
+        for reply in replies:
+            children.setdefault(reply.parent_id, []).append(reply)
+        for reply_list in children.values():
+            for reply in reply_list:
+                reply.thread = children.get(reply.pk, [])
+        for note in notes:
+            note.thread = children.get(note.pk, [])
+        return notes
+
 class Engagement(models.Model):
     STATUS_CHOICES = [
         ('PLANNING', 'Planning'),
@@ -103,12 +137,51 @@ class Engagement(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def update_progress(self):
-        # Helper to auto-calculate progress based on tasks
-        total = self.tasks.count()
-        if total == 0: return
-        completed = self.tasks.filter(status='DONE').count()
-        self.completion_percentage = int((completed / total) * 100)
-        self.save()
+        self.recompute_progress([self.pk])
+        self.refresh_from_db(fields=['completion_percentage'])
+
+    @classmethod
+    def recompute_progress(cls, engagement_ids):
+        """
+        Sets completion_percentage (share of DONE tasks) for the given
+        engagements from one conditional aggregate; only engagements whose
+        progress actually moved are written, with their history rows.
+        """
+        progress = (
+            EngagementTask.objects.filter(engagement=OuterRef('pk'))
+            .values('engagement')
+            .annotate(pct=Count('pk', filter=Q(status='DONE')) * 100 / Count('pk'))
+            .values('pct')
+        )
+        changed = []
+        rows = cls.objects.filter(pk__in=engagement_ids).annotate(progress=Coalesce(Subquery(progress), Value(0)))
+        for engagement in rows:
+            if engagement.completion_percentage != engagement.progress:
+                engagement.completion_percentage = engagement.progress
+                changed.append(engagement)
+        if changed:
+            bulk_update_with_history(changed, cls, ['completion_percentage'], batch_size=500)
+
+    @classmethod
+    def schedule_progress(cls, engagement_ids, using='default'):
+        """
+        Recomputes progress once the current transaction commits (at once
+        outside one). Every engagement touched in the transaction is
+        coalesced into a single recompute, so bulk task edits cost the same
+        three queries as a single one.
+        """
+        connection = transaction.get_connection(using)
+        pending = connection.__dict__.setdefault('_pending_progress', set())
+        pending.update(engagement_ids)
+
+        def flush():
+            # The first callback to run takes everything; the rest find nothing
+            ids = connection.__dict__.pop('_pending_progress', None)
+            if ids:
+                cls.recompute_progress(ids)
+        # One callback per call, not per transaction, so ids scheduled inside a
+        # rolled-back savepoint are still flushed by a later callback
+        transaction.on_commit(flush, using=using)
 
 class EngagementTask(models.Model):
     TASK_STATUS = [
@@ -155,16 +228,12 @@ class EngagementTask(models.Model):
         self.status = 'DONE'
         self.save()
 
-@receiver([post_save, post_delete], sender=EngagementTask)
-def update_engagement_progress(sender, instance, **kwargs):
-    engagement = instance.engagement
-    total = engagement.tasks.count()
-    if total > 0:
-        completed = engagement.tasks.filter(status='DONE').count()
-        engagement.completion_percentage = int((completed / total) * 100)
-    else:
-        engagement.completion_percentage = 0
-    engagement.save(update_fields=['completion_percentage'])
+def task_counts(prefix='tasks'):
+    """task_count plus tasks_<status> annotations (one conditional COUNT each) for an Engagement queryset."""
+    counts = {'task_count': Count(prefix, distinct=True)}
+    for status, _ in EngagementTask.TASK_STATUS:
+        counts[f'tasks_{status.lower()}'] = Count(prefix, filter=Q(**{f'{prefix}__status': status}), distinct=True)
+    return counts
 
 class ClientDocument(models.Model):
     client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='documents')
@@ -189,6 +258,13 @@ class ClientDocument(models.Model):
         default='OTHER'
     )
 
+    class Meta:
+        # documents/ is always listed per client or engagement, newest first
+        indexes = [
+            models.Index(fields=['client', '-uploaded_at', 'id'], name='document_client_recent_idx'),
+            models.Index(fields=['engagement', '-uploaded_at', 'id'], name='document_engagement_recent_idx'),
+        ]
+
     def __str__(self):
         return self.description
 
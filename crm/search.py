@@ -0,0 +1,69 @@
+"""
+Indexed client lookup by name or tax ID.
+
+Postgres matches with pg_trgm word similarity over GIN trigram indexes, so
+prefixes, substrings and typos ("acme hodlings") all hit the index and are
+ranked by similarity. SQLite (local development and tests) uses an FTS5
+table with the trigram tokenizer, kept in sync with crm_client by triggers,
+ranked by bm25 over the term's trigrams. Both are created by migration
+0015_client_search; the index follows every write to crm_client, including
+queryset.update() and bulk_create().
+"""
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+# Shorter terms have no trigrams to look up and fall back to a prefix match
+MIN_TERM_LENGTH = 3
+SQLITE_TABLE = 'crm_client_search'
+
+
+def _trigrams(term):
+    grams = []
+    for word in term.lower().split():
+        for i in range(len(word) - 2):
+            if word[i:i + 3] not in grams:
+                grams.append(word[i:i + 3])
+    return grams
+
+def _postgres(queryset, term):
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    return (
+        queryset.filter(Q(TrigramWordSimilar(F('name'), term)) | Q(TrigramWordSimilar(F('tax_id_number'), term)))
+        .annotate(rank=Greatest(TrigramWordSimilarity(term, 'name'), TrigramWordSimilarity(term, 'tax_id_number')))
+    )
+
+def _sqlite(queryset, term, limit):
+    grams = _trigrams(term)
+    if not grams:
+        return None
+    match = ' OR '.join('"%s"' % gram.replace('"', '""') for gram in grams)
+    # Ranked and limited inside FTS5 (rank is bm25, lower is better), then
+    # loaded through the queryset so its restrictions and joins still apply.
+    # The unary + keeps SQLite from re-running the MATCH once per scoped rowid.
+    scope, params = queryset.values('pk').query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s AND +rowid IN ({scope}) '
+            f'ORDER BY rank LIMIT %s',
+            [match, *params, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    clients = queryset.in_bulk(ids)
+    return [clients[pk] for pk in ids]
+
+def search_clients(queryset, term, limit=50):
+    """Up to `limit` clients of `queryset` matching `term`, best match first."""
+    term = term.strip()
+    if len(term.replace(' ', '')) >= MIN_TERM_LENGTH:
+        vendor = connections[queryset.db].vendor
+        if vendor == 'postgresql':
+            return list(_postgres(queryset, term).order_by('-rank', 'name', 'id')[:limit])
+        if vendor == 'sqlite':
+            ranked = _sqlite(queryset, term, limit)
+            if ranked is not None:
+                return ranked
+    return list(
+        queryset.filter(Q(name__istartswith=term) | Q(tax_id_number__istartswith=term)).order_by('name', 'id')[:limit]
+    )
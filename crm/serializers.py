@@ -30,11 +30,21 @@ class ClientNoteSerializer(serializers.ModelSerializer):
         fields = ['id', 'client', 'content', 'created_at', 'author', 'author_name', 'parent', 'replies', 'is_resolved']
         read_only_fields = ['created_at', 'author']
 
+    def validate(self, data):
+        # Replies carry their thread's root, so a note cannot be moved to another thread
+        if self.instance and 'parent' in data and data['parent'] != self.instance.parent:
+            raise serializers.ValidationError({'parent': "A note cannot be moved to another thread."})
+        parent = data.get('parent', getattr(self.instance, 'parent', None))
+        client = data.get('client', getattr(self.instance, 'client', None))
+        if parent and parent.client_id != getattr(client, 'pk', None):
+            raise serializers.ValidationError({'parent': "A reply must belong to the same client as its note."})
+        return data
+
     def get_replies(self, obj):
-        # Recursive serialization for threads
-        if obj.replies.exists():
-            return ClientNoteSerializer(obj.replies.all(), many=True).data
-        return []
+        # Threads are assembled in memory by ClientNote.attach_threads
+        if not hasattr(obj, 'thread'):
+            ClientNote.attach_threads([obj])
+        return ClientNoteSerializer(obj.thread, many=True, context=self.context).data
 
 class EngagementTaskSerializer(serializers.ModelSerializer):
     preparer_name = serializers.ReadOnlyField(source='prepared_by.username')
@@ -54,8 +64,28 @@ class EngagementSerializer(serializers.ModelSerializer):
         fields = '__all__'
         
     def get_task_count(self, obj):
+        # Annotated by EngagementViewSet; freshly created engagements fall back to a COUNT
+        if hasattr(obj, 'tasks_done'):
+            return obj.task_count
         return obj.tasks.count()
 
+class EngagementListSerializer(serializers.ModelSerializer):
+    """List rows: no nested tasks, counts come from the task_counts() annotation."""
+    client_name = serializers.ReadOnlyField(source='client.name')
+    task_count = serializers.ReadOnlyField()
+    tasks_pending = serializers.ReadOnlyField()
+    tasks_in_progress = serializers.ReadOnlyField()
+    tasks_review = serializers.ReadOnlyField()
+    tasks_done = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Engagement
+        fields = [
+            'id', 'client', 'client_name', 'name', 'engagement_type', 'status', 'start_date', 'deadline',
+            'lead_auditor', 'methodology', 'completion_percentage', 'year', 'fee', 'created_at',
+            'task_count', 'tasks_pending', 'tasks_in_progress', 'tasks_review', 'tasks_done',
+        ]
+
 class ClientDocumentSerializer(serializers.ModelSerializer):
     uploader_name = serializers.SerializerMethodField()
     file_name = serializers.SerializerMethodField()
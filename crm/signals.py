@@ -1,21 +1,12 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import EngagementTask
+from .models import Engagement, EngagementTask
 
 @receiver([post_save, post_delete], sender=EngagementTask)
-def update_engagement_progress(sender, instance, **kwargs):
+def update_engagement_progress(sender, instance, using, **kwargs):
     """
-    Automatically updates the Engagement's completion percentage 
-    whenever a task is saved, updated, or deleted.
+    Queues the task's engagement for a progress recompute on commit.
+    bulk_create() and queryset.update() send no signals, so code using them
+    calls Engagement.schedule_progress() itself.
     """
-    engagement = instance.engagement
-    total_tasks = engagement.tasks.count() # Uses the related_name='tasks'
-    
-    if total_tasks > 0:
-        completed_tasks = engagement.tasks.filter(status='DONE').count()
-        engagement.completion_percentage = int((completed_tasks / total_tasks) * 100)
-    else:
-        engagement.completion_percentage = 0
-        
-    # update_fields prevents a recursive loop by only saving the percentage
-    engagement.save(update_fields=['completion_percentage'])
\ No newline at end of file
+    Engagement.schedule_progress([instance.engagement_id], using=using)
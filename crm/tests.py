@@ -1,3 +1,63 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from core.models import User
+from .models import Client
+from .search import search_clients
+
+
+class ClientListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', is_superuser=True)
+        # Repeated names, so most page boundaries fall between clients that tie on name
+        Client.objects.bulk_create([
+            Client(name=name, tax_id_number=f'TAX-{i:03d}')
+            for i, name in enumerate(['Acme Holdings', 'Beta Audit', 'Acme Holdings', 'Cobalt Ltd'] * 8)
+        ])
+        Client.objects.create(name='Northwind Traders', tax_id_number='NW-7781')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def walk(self, url, direction='next'):
+        pages = []
+        while url:
+            self.assertLess(len(pages), 20, 'cursor is not advancing')
+            page = self.client.get(url).json()
+            pages.append([row['id'] for row in page['results']])
+            url = page[direction]
+        return pages, page
+
+    def test_cursor_walks_forward_and_back_without_gaps_or_duplicates(self):
+        expected = list(Client.objects.order_by('name', 'id').values_list('id', flat=True))
+        forward, last = self.walk('/api/clients/?page_size=6')
+        self.assertEqual(sum(forward, []), expected)
+        self.assertEqual([len(page) for page in forward], [6, 6, 6, 6, 6, 3])
+
+        backward, _ = self.walk(last['previous'], 'previous')
+        self.assertEqual(sum(reversed(backward), []) + forward[-1], expected)
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_count_is_opt_in_and_only_on_the_first_page(self):
+        page = self.client.get('/api/clients/?page_size=10').json()
+        self.assertNotIn('count', page)
+        page = self.client.get('/api/clients/?page_size=10&count=true').json()
+        self.assertEqual(page['count'], 33)
+        self.assertNotIn('count=', page['next'])
+
+    def test_bad_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/clients/?cursor=garbage').status_code, 404)
+
+    def test_search_matches_name_and_tax_id(self):
+        names = [row['name'] for row in self.client.get('/api/clients/?search=northwind').json()['results']]
+        self.assertEqual(names, ['Northwind Traders'])
+        self.assertEqual([c.tax_id_number for c in search_clients(Client.objects.all(), '7781')], ['NW-7781'])
+        self.assertEqual(len(search_clients(Client.objects.all(), 'acme', limit=3)), 3)
+
+    def test_search_follows_updates(self):
+        client = Client.objects.get(tax_id_number='NW-7781')
+        Client.objects.filter(pk=client.pk).update(name='Zephyr Partners')
+        self.assertEqual(search_clients(Client.objects.all(), 'northwind'), [])
+        self.assertEqual(search_clients(Client.objects.all(), 'zephyr'), [client])
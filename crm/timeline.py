@@ -0,0 +1,136 @@
+"""
+Unified engagement timeline: engagement, procedure and workpaper history,
+newest first.
+
+Each history table is read with a keyset query ordered by
+(history_date, history_id) with the acting user joined in, and the three
+ordered streams are k-way merged with heapq.merge. A page therefore reads at
+most page_size + 1 rows per table however long the audit has been running,
+and the cursor is just the (date, source, history_id) of the last event.
+"""
+import base64
+import heapq
+import itertools
+import json
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from .models import Engagement, EngagementTask, ClientDocument
+
+ENGAGEMENT_ACTIONS = {'+': 'Engagement Opened', '~': 'Details Updated', '-': 'Engagement Deleted'}
+
+
+def _engagement_event(row):
+    return {
+        'action': ENGAGEMENT_ACTIONS.get(row['history_type'], 'Action'),
+        'details': f"Status set to {row['status']}. Progress: {row['completion_percentage']}%",
+        'severity': 'info',
+    }
+
+def _procedure_event(row):
+    if row['history_type'] == '+':
+        action = "New Procedure Added"
+    elif row['history_type'] == '-':
+        action = "❌ Procedure Removed"
+    elif row['status'] == 'DONE':
+        action = "✅ Audit Sign-off"
+    elif row['status'] == 'REVIEW':
+        action = "👀 Submitted for Review"
+    else:
+        action = "Procedure Modified"
+    return {
+        'action': action,
+        'details': f"Ref: {row['title']}",
+        'severity': 'success' if row['status'] == 'DONE' else 'warning' if row['history_type'] == '-' else 'info',
+    }
+
+def _document_event(row):
+    if row['history_type'] == '+':
+        action = "📁 Workpaper Uploaded"
+    elif row['history_type'] == '-':
+        action = "🗑️ Workpaper Deleted"
+    else:
+        action = "Workpaper Modified"
+    return {'action': action, 'details': f"File: {row['description']}", 'severity': 'primary'}
+
+
+class EngagementTimeline:
+    # (type, history model, engagement column, extra columns, formatter); the position breaks date ties
+    SOURCES = (
+        ('ENGAGEMENT', Engagement.history.model, 'id', ('status', 'completion_percentage'), _engagement_event),
+        ('PROCEDURE', EngagementTask.history.model, 'engagement_id', ('title', 'status'), _procedure_event),
+        ('DOCUMENT', ClientDocument.history.model, 'engagement_id', ('description',), _document_event),
+    )
+
+    def __init__(self, engagement_id, since=None):
+        self.engagement_id = engagement_id
+        self.since = since
+
+    @staticmethod
+    def encode_cursor(key):
+        date, source, history_id = key
+        raw = json.dumps([date.isoformat(), source, history_id])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @classmethod
+    def decode_cursor(cls, cursor):
+        """(date, source, history_id) of the last event seen; ValueError when malformed."""
+        try:
+            date, source, history_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            date = parse_datetime(date)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise ValueError("Invalid cursor")
+        if date is None or source not in range(len(cls.SOURCES)) or not isinstance(history_id, int):
+            raise ValueError("Invalid cursor")
+        return date, source, history_id
+
+    def _rows(self, source, after, limit):
+        """One source's events older than `after`, newest first, as ((date, source, id), row)."""
+        _, model, column, columns, _ = self.SOURCES[source]
+        rows = model.objects.filter(**{column: self.engagement_id})
+        if self.since:
+            rows = rows.filter(history_date__gt=self.since)
+        if after:
+            date, after_source, history_id = after
+            older = Q(history_date__lt=date)
+            if source < after_source:
+                older |= Q(history_date=date)
+            elif source == after_source:
+                older |= Q(history_date=date, history_id__lt=history_id)
+            rows = rows.filter(older)
+        rows = (
+            rows.order_by('-history_date', '-history_id')
+            .values('history_id', 'history_date', 'history_type', *columns, user_name=F('history_user__username'))
+        )
+        for row in rows[:limit]:
+            yield (row['history_date'], source, row['history_id']), row
+
+    def _event(self, key, row):
+        kind, _, _, _, formatter = self.SOURCES[key[1]]
+        return {
+            'id': f"{kind}-{row['history_id']}",
+            'date': row['history_date'],
+            'user': row['user_name'] or 'System',
+            'type': kind,
+            **formatter(row),
+        }
+
+    def page(self, after=None, page_size=50):
+        """Returns (events, cursor of the next page or None)."""
+        merged = heapq.merge(
+            *(self._rows(source, after, page_size + 1) for source in range(len(self.SOURCES))),
+            key=lambda item: item[0], reverse=True,
+        )
+        window = list(itertools.islice(merged, page_size + 1))
+        events = [self._event(key, row) for key, row in window[:page_size]]
+        next_cursor = self.encode_cursor(window[page_size - 1][0]) if len(window) > page_size else None
+        return events, next_cursor
+
+    def stream(self, chunk_size=500):
+        """Every event, newest first, read one bounded page at a time."""
+        after = None
+        while True:
+            events, cursor = self.page(after, chunk_size)
+            yield from events
+            if cursor is None:
+                return
+            after = self.decode_cursor(cursor)
@@ -1,25 +1,47 @@
+import json
 from django.shortcuts import render
 from django.db import transaction
+from django.db.models import Prefetch
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, permissions, filters, parsers, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Client, ClientContact, Engagement, ClientDocument, ClientNote, PBCRequest, EngagementTask
-from .serializers import ClientSerializer, ClientContactSerializer, EngagementSerializer, EngagementTaskSerializer, ClientDocumentSerializer, ClientNoteSerializer, EngagementHistorySerializer, PBCRequestSerializer
+from rest_framework.utils.urls import replace_query_param
+from .models import Client, ClientContact, Engagement, ClientDocument, ClientNote, PBCRequest, EngagementTask, task_counts
+from .serializers import ClientSerializer, ClientContactSerializer, EngagementSerializer, EngagementListSerializer, EngagementTaskSerializer, ClientDocumentSerializer, ClientNoteSerializer, EngagementHistorySerializer, PBCRequestSerializer
 from .permissions import IsPartnerOrAdmin
 from core.models import User
+from core.db import reads_from_replica, replica_stream
+from core.pagination import KeysetPagination
+from .search import search_clients
+from .timeline import EngagementTimeline
 from django.utils import timezone
 
 class ClientViewSet(viewsets.ModelViewSet):
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated, IsPartnerOrAdmin]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['name', 'tax_id_number']
+    ordering = ('name', 'id')
 
     def get_queryset(self):
         user = self.request.user
+        queryset = Client.objects.select_related('assigned_partner')
         if user.is_superuser:
-            return Client.objects.all().order_by('name')
-        return Client.objects.filter(assigned_partner=user).order_by('name')
+            return queryset.order_by('name')
+        return queryset.filter(assigned_partner=user).order_by('name')
+
+    def list(self, request, *args, **kwargs):
+        """
+        ?search= matches name or tax ID (prefix, substring and typo tolerant,
+        see crm/search.py) and returns the best page_size matches, ranked,
+        as a single page.
+        """
+        term = request.query_params.get('search', '').strip()
+        if not term:
+            return super().list(request, *args, **kwargs)
+        clients = search_clients(self.get_queryset(), term, self.paginator.get_page_size(request))
+        return Response({'next': None, 'previous': None, 'results': self.get_serializer(clients, many=True).data})
 
     # 1. New Action to fetch list of assignable users (Partners/Managers)
     @action(detail=False, methods=['get'])
@@ -87,6 +109,7 @@ class ClientViewSet(viewsets.ModelViewSet):
 class ClientContactViewSet(viewsets.ModelViewSet):
     serializer_class = ClientContactSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('id',)
 
     def get_queryset(self):
         client_id = self.request.query_params.get('client')
@@ -95,10 +118,22 @@ class ClientContactViewSet(viewsets.ModelViewSet):
 class EngagementViewSet(viewsets.ModelViewSet):
     serializer_class = EngagementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-year', 'id')
+
+    def _expanded(self):
+        # Lists carry task counts only; ?expand=tasks restores the nested task list
+        return self.action != 'list' or self.request.query_params.get('expand') == 'tasks'
 
     def get_queryset(self):
         user = self.request.user
         queryset = Engagement.objects.all().order_by('-year')
+        # Only the routes that render engagements pay for the counts and tasks
+        if self.action in ('list', 'retrieve', 'update', 'partial_update'):
+            queryset = queryset.select_related('client').annotate(**task_counts())
+            if self._expanded():
+                queryset = queryset.prefetch_related(Prefetch(
+                    'tasks', queryset=EngagementTask.objects.select_related('prepared_by', 'reviewed_by').order_by('id')
+                ))
 
         # SECURITY: If user is a Client, they only see their own engagements
         if user.role == 'CLIENT':
@@ -110,65 +145,47 @@ class EngagementViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(client_id=client_id)
         return queryset
 
+    def get_serializer_class(self):
+        if self._expanded():
+            return EngagementSerializer
+        return EngagementListSerializer
+
     @action(detail=True, methods=['get'])
+    @reads_from_replica
     def unified_history(self, request, pk=None):
+        """
+        Engagement, procedure and workpaper history merged newest first.
+        Cursor-paginated (?cursor=, ?page_size= up to 500); ?since=<ISO datetime>
+        returns only newer events for incremental refresh; ?export=ndjson streams everything.
+        """
         engagement = self.get_object()
-        combined = []
-
-        # 1. ENGAGEMENT LOGS
-        for h in engagement.history.all():
-            action_map = {'+': 'Engagement Opened', '~': 'Details Updated', '-': 'Engagement Deleted'}
-            combined.append({
-                'date': h.history_date,
-                'user': h.history_user.username if h.history_user else 'System',
-                'type': 'ENGAGEMENT',
-                'action': action_map.get(h.history_type, 'Action'),
-                'details': f"Status set to {h.status}. Progress: {h.completion_percentage}%",
-                'severity': 'info'
-            })
-
-        # 2. PROCEDURE (TASK) LOGS - Handles Deletions and Sign-offs
-        task_h = EngagementTask.history.filter(engagement=engagement)
-        for h in task_h:
-            # Determine exact action
-            if h.history_type == '+':
-                action = "New Procedure Added"
-            elif h.history_type == '-':
-                action = "❌ Procedure Removed"
-            elif h.status == 'DONE':
-                action = "✅ Audit Sign-off"
-            elif h.status == 'REVIEW':
-                action = "👀 Submitted for Review"
-            else:
-                action = "Procedure Modified"
-
-            combined.append({
-                'date': h.history_date,
-                'user': h.history_user.username if h.history_user else 'System',
-                'type': 'PROCEDURE',
-                'action': action,
-                'details': f"Ref: {h.title}",
-                'severity': 'success' if h.status == 'DONE' else 'warning' if h.history_type == '-' else 'info'
-            })
-
-        # 3. WORKPAPER (DOCUMENT) LOGS
-        if hasattr(ClientDocument, 'history'):
-            doc_h = ClientDocument.history.filter(engagement=engagement)
-            for h in doc_h:
-                action = "📁 Workpaper Uploaded" if h.history_type == '+' else "Workpaper Modified"
-                if h.history_type == '-': action = "🗑️ Workpaper Deleted"
-                
-                combined.append({
-                    'date': h.history_date,
-                    'user': h.history_user.username if h.history_user else 'System',
-                    'type': 'DOCUMENT',
-                    'action': action,
-                    'details': f"File: {h.description}",
-                    'severity': 'primary'
-                })
-
-        combined.sort(key=lambda x: x['date'], reverse=True)
-        return Response(combined)
+        params = request.query_params
+        since = None
+        if params.get('since'):
+            try:
+                since = parse_datetime(params['since'])
+            except ValueError:
+                pass
+            if since is None:
+                return Response({'error': 'since must be an ISO datetime'}, status=400)
+        timeline = EngagementTimeline(engagement.pk, since=since)
+
+        if params.get('export') == 'ndjson':
+            lines = (json.dumps(event, cls=DjangoJSONEncoder) + '\n' for event in timeline.stream())
+            response = StreamingHttpResponse(replica_stream(lines, request.user), content_type='application/x-ndjson')
+            response['Content-Disposition'] = f'attachment; filename="engagement-{engagement.pk}-history.ndjson"'
+            return response
+
+        try:
+            after = timeline.decode_cursor(params['cursor']) if params.get('cursor') else None
+            page_size = min(int(params.get('page_size', KeysetPagination.page_size)), KeysetPagination.max_page_size)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+        if page_size < 1:
+            return Response({'error': 'page_size must be positive'}, status=400)
+        events, cursor = timeline.page(after, page_size)
+        next_link = replace_query_param(request.build_absolute_uri(), 'cursor', cursor) if cursor else None
+        return Response({'next': next_link, 'previous': None, 'results': events})
 
     @action(detail=False, methods=['post'])
     def create_with_user(self, request):
@@ -245,6 +262,7 @@ class EngagementViewSet(viewsets.ModelViewSet):
                 EngagementTask(engagement=engagement, title=title, status='PENDING') 
                 for title in tasks
             ])
+            Engagement.schedule_progress([engagement.pk])
 
             # 4. Initialize PBC (Provided by Client) Requests
             pbc_items = ["Trial Balance", "General Ledger", "Bank Statements", "Fixed Asset Register"]
@@ -258,6 +276,7 @@ class EngagementTaskViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'description']
+    ordering = ('id',)
 
     def get_queryset(self):
         # Allow filtering by engagement ID (e.g., ?engagement=7)
@@ -309,22 +328,28 @@ class EngagementTaskViewSet(viewsets.ModelViewSet):
         return Response({'status': 'updated', 'new_status': task.status})
 
 class ClientNoteViewSet(viewsets.ModelViewSet):
-    queryset = ClientNote.objects.all()
+    queryset = ClientNote.objects.select_related('author')
     serializer_class = ClientNoteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-created_at', 'id')
 
     def get_queryset(self):
-            # 1. Get the base queryset
-            queryset = self.queryset
-            
-            # 2. Only apply the client filter if we are listing (GET /api/notes/)
-            # If we are doing a PATCH or GET /api/notes/3/, 'pk' will be in self.kwargs
-            if self.action == 'list':
-                client_id = self.request.query_params.get('client')
-                if client_id:
-                    queryset = queryset.filter(client_id=client_id)
-            
-            return queryset
+        queryset = self.queryset
+        # Lists page through root threads (?client=, ?is_resolved=); replies come nested.
+        # Detail routes (GET/PATCH /api/notes/3/) reach replies too.
+        if self.action == 'list':
+            params = self.request.query_params
+            queryset = queryset.filter(parent__isnull=True)
+            if params.get('client'):
+                queryset = queryset.filter(client_id=params['client'])
+            if params.get('is_resolved'):
+                queryset = queryset.filter(is_resolved=params['is_resolved'].lower() in ('1', 'true', 'yes'))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        roots = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        ClientNote.attach_threads(roots)
+        return self.get_paginated_response(self.get_serializer(roots, many=True).data)
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -333,6 +358,7 @@ class ClientDocumentViewSet(viewsets.ModelViewSet):
     serializer_class = ClientDocumentSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [parsers.MultiPartParser, parsers.FormParser]
+    ordering = ('-uploaded_at', 'id')
 
     def get_queryset(self):
         queryset = ClientDocument.objects.all().order_by('-uploaded_at')
@@ -345,6 +371,10 @@ class ClientDocumentViewSet(viewsets.ModelViewSet):
             return queryset.filter(client_id=client_id)
         return ClientDocument.objects.none()
 
+    @reads_from_replica
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         engagement_id = self.request.data.get('engagement')
         client_id = self.request.data.get('client')
@@ -374,6 +404,7 @@ class PortalViewSet(viewsets.ModelViewSet):
     """
     serializer_class = PBCRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-requested_at', 'id')
 
     def get_queryset(self):
         user = self.request.user
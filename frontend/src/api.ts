@@ -57,4 +57,16 @@ api.interceptors.response.use(
   }
 );
 
+// Every row of a paginated list route: follows `next` (500 rows a page) until it runs out
+export const fetchAll = async <T = any>(url: string, params: Record<string, unknown> = {}): Promise<T[]> => {
+  let res = await api.get(url, { params: { page_size: 500, ...params } });
+  if (!res.data.results) return res.data;
+  const rows: T[] = [...res.data.results];
+  while (res.data.next) {
+    res = await api.get(res.data.next);
+    rows.push(...res.data.results);
+  }
+  return rows;
+};
+
 export default api;
\ No newline at end of file
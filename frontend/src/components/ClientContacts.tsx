@@ -4,7 +4,7 @@ import {
   Button, Dialog, DialogTitle, DialogContent, DialogActions,
   TextField, Switch, FormControlLabel, Box
 } from '@mui/material';
-import api from '../api';
+import api, { fetchAll } from '../api';
 
 const ClientContacts = ({ clientId }: { clientId: number }) => {
   const [contacts, setContacts] = useState([]);
@@ -17,8 +17,7 @@ const ClientContacts = ({ clientId }: { clientId: number }) => {
   });
 
   const fetchContacts = async () => {
-    const res = await api.get(`client-contacts/?client=${clientId}`);
-    setContacts(res.data);
+    setContacts(await fetchAll(`client-contacts/?client=${clientId}`));
   };
 
   useEffect(() => {
@@ -24,7 +24,7 @@ import {
   PictureAsPdf,
   TableChart
 } from '@mui/icons-material';
-import api from '../api';
+import api, { fetchAll } from '../api';
 
 interface Doc {
   id: number;
@@ -47,8 +47,7 @@ const ClientDocuments = ({ clientId }: { clientId: number }) => {
   const fetchDocs = async () => {
     setLoading(true);
     try {
-      const res = await api.get(`documents/?client=${clientId}`);
-      setDocs(res.data);
+      setDocs(await fetchAll(`documents/?client=${clientId}`));
     } catch (err) {
       console.error('Failed to fetch client documents', err);
     } finally {
@@ -4,7 +4,7 @@ import {
   ListItemText, Divider, Avatar, IconButton, Tooltip, Fade 
 } from '@mui/material';
 import { Send, CheckCircle, RadioButtonUnchecked, ChatBubbleOutline } from '@mui/icons-material';
-import api from '../api';
+import api, { fetchAll } from '../api';
 
 interface Note {
   id: number;
@@ -19,9 +19,9 @@ const ClientNotes = ({ clientId, onNotesCountChange }: { clientId: number, onNot
   const [newNote, setNewNote] = useState('');
 
   const fetchNotes = async () => {
-    const res = await api.get(`notes/?client=${clientId}`);
-    const activeNotes = res.data.filter((n: any) => !n.is_resolved);
-    setNotes(res.data);
+    const data = await fetchAll(`notes/?client=${clientId}`);
+    const activeNotes = data.filter((n: any) => !n.is_resolved);
+    setNotes(data);
     if (onNotesCountChange) onNotesCountChange(activeNotes.length);
   };
 
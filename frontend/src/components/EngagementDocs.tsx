@@ -8,7 +8,7 @@ import {
   UploadFile, InsertDriveFile, Download, Delete,
   Shield, Search, PictureAsPdf, Description, TableChart
 } from '@mui/icons-material';
-import api from '../api';
+import api, { fetchAll } from '../api';
 
 // ---------------- TYPES ----------------
 interface Doc {
@@ -34,8 +34,7 @@ const EngagementDocs = ({ engagementId }: { engagementId: number }) => {
   const fetchDocs = async () => {
     setLoading(true);
     try {
-      const res = await api.get(`documents/?engagement=${engagementId}`);
-      setDocs(res.data);
+      setDocs(await fetchAll(`documents/?engagement=${engagementId}`));
     } catch (err) {
       console.error('Fetch failed', err);
     } finally {
@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react';
-import { Paper, Typography, Box, Chip, Avatar, CircularProgress, Tooltip } from '@mui/material';
+import { Paper, Typography, Box, Chip, Avatar, CircularProgress, Tooltip, Button } from '@mui/material';
 import { Timeline, TimelineItem, TimelineSeparator, TimelineConnector, TimelineContent, TimelineDot, TimelineOppositeContent } from '@mui/lab';
 import { Description, Assignment, TaskAlt, DeleteForever, Info } from '@mui/icons-material';
 import api from '../api';
@@ -7,13 +7,22 @@ import api from '../api';
 const EngagementHistory = ({ engagementId }: { engagementId: string }) => {
   const [history, setHistory] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
+  const [next, setNext] = useState<string | null>(null);
 
   useEffect(() => {
     api.get(`engagements/${engagementId}/unified_history/`)
-      .then(res => { setHistory(res.data); setLoading(false); })
+      .then(res => { setHistory(res.data.results || res.data); setNext(res.data.next || null); setLoading(false); })
       .catch(() => setLoading(false));
   }, [engagementId]);
 
+  const loadOlder = () => {
+    if (!next) return;
+    api.get(next).then(res => {
+      setHistory(prev => [...prev, ...res.data.results]);
+      setNext(res.data.next);
+    });
+  };
+
   const getStyle = (action: string, type: string) => {
     if (action.includes("Deleted") || action.includes("Removed")) return { color: '#d32f2f', icon: <DeleteForever sx={{ fontSize: 18 }} /> };
     if (action.includes("Sign-off")) return { color: '#2e7d32', icon: <TaskAlt sx={{ fontSize: 18 }} /> };
@@ -35,7 +44,7 @@ const EngagementHistory = ({ engagementId }: { engagementId: string }) => {
           const style = getStyle(record.action, record.type);
           
           return (
-            <TimelineItem key={index}>
+            <TimelineItem key={record.id || index}>
               <TimelineOppositeContent sx={{ flex: 0.2, py: 2, fontSize: '0.7rem', fontWeight: 600, color: 'text.secondary' }}>
                 {new Date(record.date).toLocaleDateString([], { month: 'short', day: 'numeric' })}
                 <br />
@@ -82,6 +91,11 @@ const EngagementHistory = ({ engagementId }: { engagementId: string }) => {
           );
         })}
       </Timeline>
+      {next && (
+        <Box sx={{ textAlign: 'center', mt: 2 }}>
+          <Button variant="outlined" size="small" onClick={loadOlder}>Load older activity</Button>
+        </Box>
+      )}
     </Paper>
   );
 };
@@ -6,7 +6,7 @@ import {
   DialogContent, TextField, DialogActions, IconButton, Tooltip 
 } from '@mui/material';
 import { Add, Delete, CheckCircle, RateReview } from '@mui/icons-material';
-import api from '../api';
+import api, { fetchAll } from '../api';
 
 // --- Types ---
 interface Task {
@@ -35,8 +35,7 @@ const EngagementTasks: React.FC<EngagementTasksProps> = ({ engagementId, onUpdat
   
   const fetchTasks = async () => {
     try {
-      const res = await api.get<Task[]>(`engagement-tasks/?engagement=${engagementId}`);
-      setTasks(res.data);
+      setTasks(await fetchAll<Task>(`engagement-tasks/?engagement=${engagementId}`));
     } catch (err) {
       console.error("Failed to fetch tasks", err);
     }
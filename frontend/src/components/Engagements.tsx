@@ -5,7 +5,7 @@ import {
 } from '@mui/material';
 import { Add, Launch, PostAdd } from '@mui/icons-material';
 import { useNavigate } from 'react-router-dom';
-import api from '../api';
+import api, { fetchAll } from '../api';
 
 const Engagements = ({ clientId }: { clientId: number }) => {
   const [engagements, setEngagements] = useState([]);
@@ -18,8 +18,7 @@ const Engagements = ({ clientId }: { clientId: number }) => {
 
   const fetchEngagements = async () => {
     try {
-      const res = await api.get(`engagements/?client=${clientId}`);
-      setEngagements(res.data);
+      setEngagements(await fetchAll(`engagements/?client=${clientId}`));
     } catch (err) { console.error("Fetch failed", err); }
   };
 
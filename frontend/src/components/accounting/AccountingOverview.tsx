@@ -4,7 +4,7 @@ import { TrendingUp, AccountBalance, ReceiptLong, Wallet } from '@mui/icons-mate
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 import { useNavigate } from 'react-router-dom';
 import KPICard from './KPICard';
-import api from '../../api';
+import api, { fetchAll } from '../../api';
 
 const AccountingOverview = () => {
   const navigate = useNavigate();
@@ -26,14 +26,11 @@ const AccountingOverview = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [invRes, accRes, billRes] = await Promise.all([
-          api.get('invoices/'),
+        const [invoices, accRes, bills] = await Promise.all([
+          fetchAll('invoices/'),
           api.get('accounts/financial_statements/'),
-          api.get('bills/'),
+          fetchAll('bills/'),
         ]);
-        
-        const invoices = invRes.data.results || invRes.data;
-        const bills = billRes.data.results || billRes.data;
 
         const receivable = invoices
           .filter((i: any) => i.status !== 'PAID' && i.status !== 'VOID')
@@ -5,7 +5,7 @@ import {
   DialogContent, TextField, DialogActions 
 } from '@mui/material';
 import { SettingsInputComponent } from '@mui/icons-material';
-import api from '../../api';
+import api, { fetchAll } from '../../api';
 
 const ChartOfAccounts = () => {
   const [accounts, setAccounts] = useState<any[]>([]);
@@ -13,8 +13,7 @@ const ChartOfAccounts = () => {
 
   const fetchAccounts = async () => {
     try {
-        const res = await api.get('accounts/');
-        const data = res.data.results || res.data;
+        const data = await fetchAll('accounts/');
         setAccounts(Array.isArray(data) ? data : []);
     } catch (e) { console.error(e); }
   };
@@ -6,7 +6,7 @@ import {
 } from '@mui/material';
 import Grid from '@mui/material/Grid';
 import { Add, Close as CloseIcon, Delete as DeleteIcon, Save as SaveIcon, Description } from '@mui/icons-material';
-import api from '../../api'; 
+import api, { fetchAll } from '../../api';
 
 interface Client { id: number; name: string; }
 interface InvoicesLineItem { description: string; quantity: number; unit_price: number; amount: number; }
@@ -34,11 +34,9 @@ const CreateInvoicesModal: React.FC<Props> = ({ open, onClose, onSuccess }) => {
     if (open) {
       setFetchingClients(true);
       
-      // --- FIX 2: Use 'api.get' and remove '/api/' prefix (handled by baseURL) ---
-      api.get('clients/') 
-        .then(res => {
-          // Handle both pagination results or direct list
-          const data = res.data.results ? res.data.results : res.data;
+      // Every client, not just the first page
+      fetchAll('clients/')
+        .then(data => {
           console.log("Clients fetched:", data); 
           setClients(Array.isArray(data) ? data : []);
           
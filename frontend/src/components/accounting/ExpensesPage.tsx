@@ -4,7 +4,7 @@ import {
   TableHead, TableRow, Chip, Button, Modal, TextField, MenuItem 
 } from '@mui/material';
 import { Wallet, Add } from '@mui/icons-material';
-import api from '../../api';
+import api, { fetchAll } from '../../api';
 import CreateVendorModal from './CreateVendorModal';
 
 const ExpensesPage = () => {
@@ -22,12 +22,12 @@ const ExpensesPage = () => {
 
   const fetchData = async () => {
     try {
-      const [billRes, vendorRes] = await Promise.all([
-        api.get('bills/'),
-        api.get('vendors/')
+      const [billRows, vendorRows] = await Promise.all([
+        fetchAll('bills/'),
+        fetchAll('vendors/')
       ]);
-      setBills(billRes.data.results || billRes.data);
-      setVendors(vendorRes.data.results || vendorRes.data);
+      setBills(billRows);
+      setVendors(vendorRows);
     } catch (err) {
       console.error("Failed to fetch data", err);
     }
@@ -4,7 +4,7 @@ import {
   TableContainer, TableHead, TableRow, Chip 
 } from '@mui/material';
 import { Add, ReceiptLong } from '@mui/icons-material';
-import api from '../../api'; // Use configured API
+import api, { fetchAll } from '../../api';
 import CreateInvoicesModal from './CreateInvoiceModal';
 
 const InvoicesPage = () => {
@@ -13,8 +13,7 @@ const InvoicesPage = () => {
 
   const fetchInvoices = async () => {
     try {
-      const res = await api.get('invoices/');
-      const data = res.data.results || res.data;
+      const data = await fetchAll('invoices/');
       setInvoices(Array.isArray(data) ? data : []);
     } catch (err) {
       console.error("Failed to fetch invoices", err);
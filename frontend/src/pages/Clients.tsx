@@ -6,7 +6,7 @@ import {
   Avatar, Chip, Tooltip, FormControl, InputLabel, Select
 } from '@mui/material';
 import { AddBusiness } from '@mui/icons-material';
-import api from '../api';
+import api, { fetchAll } from '../api';
 import { useNavigate } from 'react-router-dom';
 
 const Clients = () => {
@@ -29,8 +29,7 @@ const Clients = () => {
 
   const fetchClients = async () => {
     try {
-      const res = await api.get('clients/');
-      setClients(res.data);
+      setClients(await fetchAll('clients/'));
     } catch (err) {
       console.error("Failed to fetch clients", err);
     }
@@ -7,7 +7,7 @@ import {
   CheckCircleOutline, 
 } from '@mui/icons-material';
 import Grid from '@mui/material/Grid';
-import api from '../api';
+import { fetchAll } from '../api';
 
 const DashboardOverview = () => {
   const [stats, setStats] = useState({
@@ -23,14 +23,11 @@ const DashboardOverview = () => {
   useEffect(() => {
     const fetchDashboardData = async () => {
       try {
-        const [clientRes, engRes] = await Promise.all([
-          api.get('clients/'),
-          api.get('engagements/')
+        const [clients, engagements] = await Promise.all([
+          fetchAll('clients/'),
+          fetchAll('engagements/')
         ]);
 
-        const clients = clientRes.data;
-        const engagements = engRes.data;
-
         // Calculate metrics from live data
         const active = engagements.filter((e: any) => e.status !== 'COMPLETED').length;
         const completed = engagements.filter((e: any) => e.status === 'COMPLETED').length;
@@ -11,7 +11,7 @@ import Grid from '@mui/material/Grid';
 import {
   Search, Visibility, Business, TrendingUp, Add
 } from '@mui/icons-material';
-import api from '../api';
+import api, { fetchAll } from '../api';
 
 // 1. Define Props with optional clientId
 interface EngagementsProps {
@@ -45,8 +45,7 @@ const Engagements = ({ clientId }: EngagementsProps) => {
   const fetchEngagements = async () => {
     try {
       setLoading(true);
-      const res = await api.get('engagements/');
-      setEngagements(res.data);
+      setEngagements(await fetchAll('engagements/'));
     } catch (err) {
       console.error("Failed to fetch engagements", err);
     } finally {
@@ -57,8 +56,7 @@ const Engagements = ({ clientId }: EngagementsProps) => {
   // 3. Fetch Clients list only if we are in Global Mode (no clientId prop)
   const fetchClients = async () => {
     try {
-      const res = await api.get('clients/');
-      setClients(res.data);
+      setClients(await fetchAll('clients/'));
     } catch (err) {
       console.error("Failed to fetch clients", err);
     }
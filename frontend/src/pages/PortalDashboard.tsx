@@ -17,10 +17,11 @@ const PortalDashboard = () => {
     const fetchPortal = async () => {
         try {
             const res = await api.get('portal/'); 
-            setRequests(res.data || []);
+            const data = res.data.results || res.data || [];
+            setRequests(data);
             
             const types: any = {};
-            res.data.forEach((r: any) => types[r.id] = 'GENERAL_LEDGER');
+            data.forEach((r: any) => types[r.id] = 'GENERAL_LEDGER');
             setDocTypes(types);
         } catch (err) {
             console.error("Fetch failed", err);
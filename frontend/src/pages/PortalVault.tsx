@@ -6,7 +6,7 @@ import {
 import { 
     Download, Delete, PictureAsPdf, Description, TableChart, InsertDriveFile 
 } from '@mui/icons-material';
-import api from '../api';
+import { fetchAll } from '../api';
 
 const getFileIcon = (fileName: string) => {
     const ext = fileName?.split('.').pop()?.toLowerCase();
@@ -20,8 +20,7 @@ const PortalVault = () => {
     const [docs, setDocs] = useState([]);
 
     const fetchDocs = async () => {
-        const res = await api.get('portal/documents/');
-        setDocs(res.data);
+        setDocs(await fetchAll('portal/documents/'));
     };
 
     const handleDownload = (url: string, fileName: string) => {
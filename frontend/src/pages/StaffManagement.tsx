@@ -10,7 +10,7 @@ import Grid from '@mui/material/Grid';
 import {
   PersonAdd, Security, Visibility, VisibilityOff, Edit, AddCircle
 } from '@mui/icons-material';
-import api from '../api';
+import api, { fetchAll } from '../api';
 
 // Initial state for a fresh user
 const INITIAL_USER = {
@@ -45,8 +45,7 @@ const StaffManagement = () => {
 
   const fetchUsers = async () => {
     try {
-      const res = await api.get('staff/');
-      setUsers(res.data);
+      setUsers(await fetchAll('staff/'));
     } catch (err) {
       console.error("Failed to fetch users", err);
     }
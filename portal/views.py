@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from crm.models import PBCRequest, Engagement, ClientDocument
 from accounting.models import Invoices
+from core.pagination import KeysetPagination
 from crm.serializers import ClientDocumentSerializer, PBCRequestSerializer  # Import PBCRequestSerializer
 
 class PortalViewSet(viewsets.ViewSet):
@@ -16,6 +17,13 @@ class PortalViewSet(viewsets.ViewSet):
             return None
         return self.request.user.client_profile.client
 
+    def paginate(self, queryset, serializer_class, ordering):
+        # Plain ViewSet has no pagination hooks, so page the portal lists explicitly
+        paginator = KeysetPagination()
+        paginator.ordering = ordering
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
     def list(self, request):
         """Fetch list of pending PBC requests for the client's portal dashboard."""
         client = self.get_client()
@@ -26,10 +34,8 @@ class PortalViewSet(viewsets.ViewSet):
         queryset = PBCRequest.objects.filter(
             engagement__client=client,
             status__in=['OPEN', 'REJECTED']
-        ).order_by('-requested_at')
-        
-        serializer = PBCRequestSerializer(queryset, many=True)
-        return Response(serializer.data)
+        )
+        return self.paginate(queryset, PBCRequestSerializer, ('-requested_at', 'id'))
 
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
@@ -57,8 +63,8 @@ class PortalViewSet(viewsets.ViewSet):
         """The Client Vault: View all history"""
         client = self.get_client()
         # Get PBC requests that have files attached OR general documents
-        docs = ClientDocument.objects.filter(client=client).order_by('-uploaded_at')
-        return Response(ClientDocumentSerializer(docs, many=True).data)
+        docs = ClientDocument.objects.filter(client=client)
+        return self.paginate(docs, ClientDocumentSerializer, ('-uploaded_at', 'id'))
 
     @action(detail=True, methods=['post'], url_path='upload')
     def upload(self, request, pk=None):